@@ -55,22 +55,63 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.profiling.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-request query counts and timings, see core.instrumentation.
+REQUEST_METRICS = bool(int(os.environ.get('REQUEST_METRICS', 0)))
+REQUEST_METRICS_SLOW_MS = int(os.environ.get('REQUEST_METRICS_SLOW_MS', 500))
+REQUEST_METRICS_SLOW_STATEMENTS = int(
+    os.environ.get('REQUEST_METRICS_SLOW_STATEMENTS', 5))
+# The parameters of slow statements include secrets such as token keys,
+# so they are only logged when debugging locally.
+REQUEST_METRICS_LOG_PARAMS = bool(
+    int(os.environ.get('REQUEST_METRICS_LOG_PARAMS', 0)))
+
+# Prometheus metrics, see core.metrics. Each process writes its own file
+# in METRICS_DIR, which should be emptied when the server is restarted.
+# When METRICS_TOKEN is set, scrapes must send it as a bearer token.
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+
+# Staff can profile a request with ?profile= or an X-Profile header when
+# REQUEST_PROFILER is set, see core.profiling. Stored profiles are
+# written to REQUEST_PROFILE_DIR and listed in the admin.
+REQUEST_PROFILER = bool(int(os.environ.get('REQUEST_PROFILER', 0)))
+REQUEST_PROFILE_DIR = os.environ.get(
+    'REQUEST_PROFILE_DIR', '/vol/web/profiles')
+
+# Multiplier of the wall-time budgets in tests, see core.testing. Wall
+# time depends on the machine, so only query budgets are checked unless
+# this is set, e.g. to 1 on a quiet machine.
+TEST_TIME_BUDGET_SCALE = float(os.environ.get('TEST_TIME_BUDGET_SCALE', 0))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.requests': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
 ROOT_URLCONF = 'app.urls'
 
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -78,10 +119,26 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Compile each template once per process, also under DEBUG.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
 
+# Storage of new report sections: 'tables' keeps a row per section,
+# 'document' one JSONB findings document per report. Existing reports
+# are moved between them with the convert_report_layout command.
+REPORT_SECTION_LAYOUT = os.environ.get('REPORT_SECTION_LAYOUT', 'tables')
+
+# Cache holding rendered report section fragments.
+REPORT_FRAGMENT_CACHE_ALIAS = os.environ.get(
+    'REPORT_FRAGMENT_CACHE_ALIAS', 'default')
+
 WSGI_APPLICATION = 'app.wsgi.application'
 
 
@@ -118,6 +175,28 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# https://docs.djangoproject.com/en/4.2/topics/auth/passwords/
+# New passwords use scrypt; PBKDF2 hashes are upgraded on the next login.
+# Tune the scrypt cost with `manage.py benchmark_hashers`.
+
+PASSWORD_HASHERS = [
+    'user.hashers.ScryptPasswordHasher',
+    'user.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+PASSWORD_SCRYPT_WORK_FACTOR = int(
+    os.environ.get('PASSWORD_SCRYPT_WORK_FACTOR', 2 ** 14))
+PASSWORD_SCRYPT_BLOCK_SIZE = int(
+    os.environ.get('PASSWORD_SCRYPT_BLOCK_SIZE', 8))
+
+# Concurrent password hashes per process, and seconds a login waits for one.
+PASSWORD_HASHER_CONCURRENCY = int(os.environ.get(
+    'PASSWORD_HASHER_CONCURRENCY', max(1, (os.cpu_count() or 2) // 2)))
+PASSWORD_HASHER_TIMEOUT = float(os.environ.get('PASSWORD_HASHER_TIMEOUT', 5))
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -142,6 +221,23 @@ MEDIA_URL = '/static/media/'
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/static'
 
+# Report photos are served by the authenticated media view at
+# PROTECTED_MEDIA_URL. MEDIA_SENDFILE hands the transfer to the front
+# server: 'nginx' sets X-Accel-Redirect to MEDIA_ACCEL_PREFIX + name for
+# an internal location aliased to MEDIA_ROOT, 'sendfile' sets X-Sendfile
+# for Apache mod_xsendfile or uWSGI. Unset, Django serves the file.
+PROTECTED_MEDIA_URL = '/api/report/media/'
+MEDIA_SENDFILE = os.environ.get('MEDIA_SENDFILE')
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+
+# Resumable photo uploads: largest photo, largest chunk per request and
+# the directory partial uploads are written to (MEDIA_ROOT/partial).
+PHOTO_UPLOAD_MAX_SIZE = int(
+    os.environ.get('PHOTO_UPLOAD_MAX_SIZE', 50 * 1024 * 1024))
+PHOTO_UPLOAD_MAX_CHUNK = int(
+    os.environ.get('PHOTO_UPLOAD_MAX_CHUNK', 8 * 1024 * 1024))
+PHOTO_UPLOAD_DIR = os.environ.get('PHOTO_UPLOAD_DIR')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -153,6 +249,14 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
+# Authenticated tokens are cached for TOKEN_CACHE_TTL seconds once
+# TOKEN_CACHE_ALIAS names a cache shared by every worker, such as Redis or
+# Memcached. Without one every request looks its token up, so a token
+# revoked through one worker is never accepted by another.
+TOKEN_CACHE_TTL = int(os.environ.get('TOKEN_CACHE_TTL', 300))
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 1024))
+TOKEN_CACHE_ALIAS = os.environ.get('TOKEN_CACHE_ALIAS') or None
+
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
 }
@@ -23,6 +23,8 @@ from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
 
+from core.views import metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
@@ -32,7 +34,8 @@ urlpatterns = [
         name='api-docs',
     ),
     path('api/user/', include('user.urls')),
-    path('api/report/', include('report.urls'))
+    path('api/report/', include('report.urls')),
+    path('metrics', metrics, name='metrics'),
 ]
 
 if settings.DEBUG:
@@ -3,9 +3,15 @@ Django admin customization.
 """
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 
 from core import models
+from core.profiling import load_stats, stats_text
 
 
 class UserAdmin(BaseUserAdmin):
@@ -44,5 +50,53 @@ class UserAdmin(BaseUserAdmin):
     )
 
 
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Define the admin pages for stored request profiles."""
+    list_display = ['created', 'method', 'path', 'view', 'status',
+                    'duration_ms', 'queries', 'user', 'download']
+    list_filter = ['view', 'method']
+    search_fields = ['path']
+    readonly_fields = ['created', 'user', 'method', 'path', 'view', 'status',
+                       'duration_ms', 'queries', 'download', 'top_functions']
+    exclude = ['stats']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<int:pk>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='core_requestprofile_download',
+            ),
+            *super().get_urls(),
+        ]
+
+    def download_view(self, request, pk):
+        """Return a stored profile as a .prof file."""
+        profile = get_object_or_404(models.RequestProfile, pk=pk)
+        if not self.has_view_permission(request, profile):
+            raise PermissionDenied
+        return FileResponse(
+            profile.stats.open('rb'),
+            as_attachment=True,
+            filename=profile.stats.name.rsplit('/', 1)[-1],
+        )
+
+    @admin.display(description=_('Profile'))
+    def download(self, obj):
+        url = reverse('admin:core_requestprofile_download', args=[obj.pk])
+        return format_html('<a href="{}">{}</a>', url, _('Download'))
+
+    @admin.display(description=_('Top functions'))
+    def top_functions(self, obj):
+        return format_html('<pre>{}</pre>', stats_text(load_stats(obj)))
+
+
 admin.site.register(models.User, UserAdmin)
+admin.site.register(models.RequestProfile, RequestProfileAdmin)
 admin.site.register(models.ReportDetails)
@@ -0,0 +1,88 @@
+"""
+Reference counting and garbage collection of stored blobs.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+from functools import lru_cache
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, FileField
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from core.models import Blob, PhotoVariant
+from core.storage import BlobStorage, get_blob_storage
+
+
+@lru_cache(maxsize=None)
+def blob_fields(model):
+    """Return the file fields of a model stored as blobs."""
+    return tuple(
+        field for field in model._meta.concrete_fields
+        if isinstance(field, FileField)
+        and isinstance(field.storage, BlobStorage)
+    )
+
+
+def blob_names(instance):
+    """Return the blob names held by an instance's file fields.
+
+    Values are read from the instance dict so deferred fields are not
+    loaded.
+    """
+    names = []
+    for field in blob_fields(type(instance)):
+        value = instance.__dict__.get(field.attname)
+        name = getattr(value, 'name', value)
+        if name:
+            names.append(name)
+
+    return names
+
+
+def update_refcounts(added=(), removed=()):
+    """Count references added to and removed from blobs by name."""
+    now = timezone.now()
+    for names, sign in ((added, 1), (removed, -1)):
+        by_count = defaultdict(list)
+        for name, count in Counter(names).items():
+            by_count[count].append(name)
+        for count, group in by_count.items():
+            Blob.objects.filter(name__in=group).update(
+                refcount=Greatest(F('refcount') + sign * count, 0),
+                last_seen=now,
+            )
+
+
+def collect_garbage(batch_size=500, grace=timedelta(hours=1)):
+    """Delete unreferenced blobs in batches, returning how many went.
+
+    Blobs are kept for `grace` after they were last stored or
+    referenced, so uploads not yet saved on a model are not collected.
+    Each batch is locked while its files are removed, making concurrent
+    uploads of the same content wait and write the file again.
+    """
+    storage = get_blob_storage()
+    cutoff = timezone.now() - grace
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            names = list(
+                Blob.objects
+                .select_for_update(skip_locked=True)
+                .filter(refcount=0, last_seen__lt=cutoff)
+                .values_list('name', flat=True)[:batch_size]
+            )
+            variants = PhotoVariant.objects.filter(source__in=names)
+            for image in variants.exclude(image=None).exclude(image='') \
+                    .values_list('image', flat=True):
+                default_storage.delete(image)
+            variants.delete()
+            Blob.objects.filter(name__in=names).delete()
+            for name in names:
+                storage.delete(name)
+
+        deleted += len(names)
+        if len(names) < batch_size:
+            return deleted
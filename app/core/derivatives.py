@@ -0,0 +1,167 @@
+"""
+Derivative images of uploaded photos.
+"""
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from PIL import Image, ImageOps
+
+from core.models import PhotoVariant
+
+
+DEFAULT_VARIANTS = {
+    'thumbnail': {'size': 320, 'format': 'JPEG'},
+    'medium': {'size': 1280, 'format': 'JPEG'},
+    'webp': {'size': 1280, 'format': 'WEBP'},
+}
+
+EXTENSIONS = {'JPEG': '.jpg', 'WEBP': '.webp', 'PNG': '.png'}
+
+MAX_ATTEMPTS = 3
+
+
+def photo_variants():
+    """Return the configured variants by name."""
+    return getattr(settings, 'PHOTO_VARIANTS', DEFAULT_VARIANTS)
+
+
+def photo_sources(instance):
+    """Return the stored file names of a model's image fields."""
+    return [
+        getattr(instance, field.attname).name
+        for field in instance._meta.concrete_fields
+        if field.get_internal_type() == 'FileField'
+        and getattr(instance, field.attname)
+    ]
+
+
+def variant_name(source, variant):
+    """Return the storage name of a variant of a source file."""
+    image_format = photo_variants()[variant]['format']
+    root = os.path.splitext(source)[0]
+    return os.path.join(
+        'variants', f'{root}.{variant}{EXTENSIONS[image_format]}')
+
+
+def render_variant(content, size, image_format):
+    """Return image content scaled to fit `size` pixels in a format.
+
+    Runs in worker processes, so it only touches Pillow.
+    """
+    with Image.open(io.BytesIO(content)) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        out = io.BytesIO()
+        image.save(out, image_format, quality=85)
+
+    return out.getvalue()
+
+
+def _render_job(job):
+    """Render one variant, returning None if the source is not an image."""
+    try:
+        return render_variant(*job)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+
+def enqueue_variants(sources):
+    """Queue every variant of the given source files not yet queued."""
+    PhotoVariant.objects.bulk_create(
+        [
+            PhotoVariant(source=source, variant=variant)
+            for source in sources
+            for variant in photo_variants()
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def claim_variants(limit, stale_after=timedelta(minutes=10)):
+    """Mark up to `limit` queued variants as processing and return them.
+
+    Variants left processing by a worker that died are claimed again
+    once they are older than `stale_after`.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            PhotoVariant.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(status=PhotoVariant.PENDING)
+                | Q(status=PhotoVariant.PROCESSING,
+                    updated__lt=now - stale_after)
+            )
+            .order_by('id')
+            .values_list('id', flat=True)[:limit]
+        )
+        PhotoVariant.objects.filter(id__in=ids).update(
+            status=PhotoVariant.PROCESSING,
+            attempts=F('attempts') + 1,
+            updated=now,
+        )
+
+    return list(PhotoVariant.objects.filter(id__in=ids).order_by('id'))
+
+
+def build_variants(limit=50, workers=None):
+    """Build up to `limit` queued variants, returning how many were claimed.
+
+    Images are resized in a pool of `workers` processes, or in this
+    process when `workers` is 0.
+    """
+    variants = claim_variants(limit)
+    if not variants:
+        return 0
+
+    sources = {}
+    jobs = []
+    for variant in variants:
+        if variant.source not in sources:
+            try:
+                with default_storage.open(variant.source) as source:
+                    sources[variant.source] = source.read()
+            except OSError:
+                sources[variant.source] = None
+        options = photo_variants().get(variant.variant)
+        content = sources[variant.source]
+        jobs.append(
+            (content, options['size'], options['format'])
+            if options and content else None
+        )
+
+    if workers == 0:
+        results = [job and _render_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            rendered = iter(pool.map(_render_job, filter(None, jobs)))
+            results = [job and next(rendered) for job in jobs]
+
+    now = timezone.now()
+    for variant, job, content in zip(variants, jobs, results):
+        if content is not None:
+            variant.image.name = default_storage.save(
+                variant_name(variant.source, variant.variant),
+                ContentFile(content),
+            )
+            variant.status = PhotoVariant.DONE
+        elif job is None or variant.attempts >= MAX_ATTEMPTS:
+            variant.status = PhotoVariant.FAILED
+        else:
+            variant.status = PhotoVariant.PENDING
+        variant.updated = now
+    PhotoVariant.objects.bulk_update(variants, ['image', 'status', 'updated'])
+
+    return len(variants)
@@ -0,0 +1,208 @@
+"""
+Per-request query count and timing instrumentation.
+"""
+import contextvars
+import heapq
+import json
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+logger = logging.getLogger('core.requests')
+slow_logger = logging.getLogger('core.requests.slow')
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Queries and timings collected while handling one request."""
+
+    def __init__(self, keep_statements=5, keep_params=False):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.timings = {}
+        self.keep_statements = keep_statements
+        self.keep_params = keep_params
+        self.slowest = []
+        self._depth = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        """Time a statement, as a connection.execute_wrapper()."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.queries += 1
+            self.db_time += duration
+            entry = (duration, self.queries, sql,
+                     params if self.keep_params else None)
+            if len(self.slowest) < self.keep_statements:
+                heapq.heappush(self.slowest, entry)
+            elif self.keep_statements:
+                heapq.heappushpop(self.slowest, entry)
+
+    def add(self, name, duration):
+        """Add time spent on a named step."""
+        self.timings[name] = self.timings.get(name, 0.0) + duration
+
+    def elapsed(self):
+        """Return the seconds since the request started."""
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total):
+        """Return the Server-Timing header value."""
+        metrics = [
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"'
+        ]
+        metrics.extend(
+            f'{name};dur={duration * 1000:.1f}'
+            for name, duration in self.timings.items()
+        )
+        metrics.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(metrics)
+
+    def record(self, request, response, total, size):
+        """Return the structured log record of the request."""
+        return {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 1),
+            **{
+                f'{name}_ms': round(duration * 1000, 1)
+                for name, duration in self.timings.items()
+            },
+            'total_ms': round(total * 1000, 1),
+            'response_bytes': size,
+        }
+
+    def slowest_statements(self):
+        """Return the slowest statements, slowest first.
+
+        Parameters, which hold values such as token keys, are only
+        included when kept.
+        """
+        statements = []
+        for duration, _, sql, params in sorted(self.slowest, reverse=True):
+            statement = {'ms': round(duration * 1000, 1), 'sql': sql}
+            if self.keep_params:
+                statement['params'] = repr(params)
+            statements.append(statement)
+        return statements
+
+
+@contextmanager
+def timed(name):
+    """Add the time spent in the block to the current request's `name`.
+
+    Nested blocks of the same name are counted once, and nothing is
+    measured outside an instrumented request.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+
+    depth = metrics._depth.get(name, 0)
+    metrics._depth[name] = depth + 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics._depth[name] = depth
+        if not depth:
+            metrics.add(name, time.perf_counter() - start)
+
+
+class TimedRepresentationMixin:
+    """Count a serializer's to_representation() as serialize time."""
+
+    def to_representation(self, instance):
+        with timed('serialize'):
+            return super().to_representation(instance)
+
+
+class RequestMetricsMiddleware:
+    """Record query count, DB time, step timings and response size.
+
+    The figures are sent in a Server-Timing header and logged as JSON
+    to `core.requests`. Requests slower than REQUEST_METRICS_SLOW_MS
+    are also logged to `core.requests.slow` with their slowest SQL,
+    and its parameters if REQUEST_METRICS_LOG_PARAMS is set. Unless
+    REQUEST_METRICS is set the middleware removes itself.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics(
+            getattr(settings, 'REQUEST_METRICS_SLOW_STATEMENTS', 5),
+            getattr(settings, 'REQUEST_METRICS_LOG_PARAMS', False))
+        token = _current.set(metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        response.headers['Server-Timing'] = \
+            metrics.server_timing(metrics.elapsed())
+        if response.streaming:
+            response.streaming_content = self._log_when_streamed(
+                request, response, metrics, response.streaming_content)
+        else:
+            self.log(request, response, metrics, len(response.content))
+        return response
+
+    def process_template_response(self, request, response):
+        """Time the rendering of DRF and template responses."""
+        metrics = _current.get()
+        if metrics is not None:
+            start = time.perf_counter()
+            response.add_post_render_callback(
+                lambda response: metrics.add(
+                    'render', time.perf_counter() - start))
+        return response
+
+    def _log_when_streamed(self, request, response, metrics, content):
+        """Pass streamed content through, logging once it is sent.
+
+        Statements run while streaming, such as chunked reads of an
+        export, are counted too.
+        """
+        size = 0
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                for chunk in content:
+                    size += len(chunk)
+                    yield chunk
+        finally:
+            self.log(request, response, metrics, size)
+
+    def log(self, request, response, metrics, size):
+        """Log the request, and its statements if it was slow."""
+        total = metrics.elapsed()
+        record = metrics.record(request, response, total, size)
+        logger.info(json.dumps(record))
+
+        slow_ms = getattr(settings, 'REQUEST_METRICS_SLOW_MS', 500)
+        if total * 1000 >= slow_ms:
+            slow_logger.warning(json.dumps({
+                **record,
+                'statements': metrics.slowest_statements(),
+            }))
@@ -0,0 +1,51 @@
+"""
+Django command to build queued photo variants.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.derivatives import build_variants
+
+
+class Command(BaseCommand):
+    """Django command to resize queued photos into their variants."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=50,
+            help='Number of variants claimed from the queue at a time.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Resizing processes, 0 to resize in this process.',
+        )
+        parser.add_argument(
+            '--watch',
+            action='store_true',
+            help='Keep polling the queue instead of exiting when empty.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2,
+            help='Seconds between polls of an empty queue.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        built = 0
+        while True:
+            claimed = build_variants(options['limit'], options['workers'])
+            built += claimed
+            if claimed:
+                continue
+            if not options['watch']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {built} variants.'))
@@ -0,0 +1,33 @@
+"""
+Django command to delete stored blobs no longer referenced.
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from core.blobs import collect_garbage
+
+
+class Command(BaseCommand):
+    """Django command to garbage-collect unreferenced blobs."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of blobs deleted per transaction.',
+        )
+        parser.add_argument(
+            '--grace',
+            type=int,
+            default=3600,
+            help='Seconds an unreferenced blob is kept before deletion.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        deleted = collect_garbage(
+            options['batch_size'], timedelta(seconds=options['grace']))
+
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} blobs.'))
@@ -0,0 +1,366 @@
+"""
+Multi-process metrics in the Prometheus text exposition format.
+"""
+import abc
+import bisect
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0,
+    7.5, 10.0, float('inf'),
+)
+
+REGISTRY = []
+
+# Request methods labelled by name. Others, which clients can make up,
+# are labelled `other` so they do not add series.
+METHODS = frozenset(
+    ['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'])
+
+
+class MmapedDict:
+    """Float values by key in a file mapped into memory.
+
+    Each process writes only its own file, so values can be updated in
+    place without locking between processes. Entries are appended and
+    the used length in the header is written last, so a reader never
+    sees a half written entry.
+    """
+    INITIAL_SIZE = 64 * 1024
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._file = open(path, 'a+b')
+        self._file.seek(0, os.SEEK_END)
+        self._capacity = self._file.tell()
+        if self._capacity == 0:
+            self._capacity = self.INITIAL_SIZE
+            self._file.truncate(self._capacity)
+        self._map = mmap.mmap(self._file.fileno(), self._capacity)
+        self._used = struct.unpack_from('i', self._map, 0)[0]
+        if not self._used:
+            self._used = 8
+            struct.pack_into('i', self._map, 0, self._used)
+        self._positions = {
+            key: position
+            for key, _, position in self.read_entries(self._map, self._used)
+        }
+
+    @staticmethod
+    def read_entries(data, used):
+        """Yield (key, value, value position) of each entry."""
+        position = 8
+        while position < used:
+            length = struct.unpack_from('i', data, position)[0]
+            position += 4
+            key = bytes(data[position:position + length]).decode().rstrip()
+            position += length
+            yield key, struct.unpack_from('d', data, position)[0], position
+            position += 8
+
+    @classmethod
+    def read_file(cls, path):
+        """Return the values stored in a file by key."""
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < 8:
+            return {}
+        used = struct.unpack_from('i', data, 0)[0]
+        return {key: value for key, value, _ in cls.read_entries(data, used)}
+
+    def _add_entry(self, key):
+        encoded = key.encode()
+        padding = b' ' * (-(4 + len(encoded)) % 8)
+        encoded += padding
+        end = self._used + 4 + len(encoded) + 8
+        while end > self._capacity:
+            self._capacity *= 2
+            self._map.close()
+            self._file.truncate(self._capacity)
+            self._map = mmap.mmap(self._file.fileno(), self._capacity)
+        struct.pack_into(f'i{len(encoded)}sd', self._map, self._used,
+                         len(encoded), encoded, 0.0)
+        self._positions[key] = end - 8
+        self._used = end
+        struct.pack_into('i', self._map, 0, self._used)
+
+    def add(self, key, amount):
+        """Add an amount to the value of a key."""
+        self.add_many([(key, amount)])
+
+    def add_many(self, amounts):
+        """Add amounts to the values of keys, given as (key, amount).
+
+        Keys are stored even when their amount is zero.
+        """
+        with self._lock:
+            for key, amount in amounts:
+                position = self._positions.get(key)
+                if position is None:
+                    self._add_entry(key)
+                    position = self._positions[key]
+                if amount:
+                    value = struct.unpack_from('d', self._map, position)[0]
+                    struct.pack_into('d', self._map, position, value + amount)
+
+
+_store = None
+_store_pid = None
+_store_lock = threading.Lock()
+
+
+def metrics_dir():
+    """Return the directory of the metric files, or None if disabled."""
+    return getattr(settings, 'METRICS_DIR', None)
+
+
+def get_store():
+    """Return the metric file of this process, or None if disabled."""
+    global _store, _store_pid
+    directory = metrics_dir()
+    if not directory:
+        return None
+    pid = os.getpid()
+    if _store_pid != pid or _store is None:
+        with _store_lock:
+            if _store_pid != pid or _store is None:
+                os.makedirs(directory, exist_ok=True)
+                _store = MmapedDict(
+                    os.path.join(directory, f'metrics_{pid}.db'))
+                _store_pid = pid
+    return _store
+
+
+def reset_store():
+    """Forget the metric file of this process."""
+    global _store, _store_pid
+    _store = _store_pid = None
+
+
+def sample_key(metric, suffix, labels):
+    """Return the key a sample is stored under."""
+    return json.dumps([metric, suffix, labels], sort_keys=True)
+
+
+class Metric(abc.ABC):
+    """Named metric with a fixed set of labels."""
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._keys = {}
+        REGISTRY.append(self)
+
+    @abc.abstractmethod
+    def sample_keys(self, labels):
+        """Return the keys of the samples of a label set."""
+
+    def _sample_keys(self, labels):
+        """Return the sample keys of the given labels, built once."""
+        values = tuple(str(labels[name]) for name in self.labelnames)
+        keys = self._keys.get(values)
+        if keys is None:
+            keys = self._keys[values] = self.sample_keys(
+                dict(zip(self.labelnames, values)))
+        return keys
+
+
+class Counter(Metric):
+    """Monotonic counter summed over every process."""
+    kind = 'counter'
+
+    def sample_keys(self, labels):
+        return sample_key(self.name, '_total', labels)
+
+    def inc(self, amount=1, **labels):
+        """Increment the counter for the given labels."""
+        store = get_store()
+        if store is not None:
+            store.add(self._sample_keys(labels), amount)
+
+
+class Histogram(Metric):
+    """Histogram of observations summed over every process."""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def sample_keys(self, labels):
+        buckets = [
+            sample_key(self.name, '_bucket',
+                       {**labels, 'le': format_value(bound)})
+            for bound in self.buckets
+        ]
+        return (buckets,
+                sample_key(self.name, '_count', labels),
+                sample_key(self.name, '_sum', labels))
+
+    def observe(self, value, **labels):
+        """Record an observation for the given labels.
+
+        Buckets are cumulative, so the observation is counted in the
+        first bucket it fits and every one after it.
+        """
+        store = get_store()
+        if store is None:
+            return
+        buckets, count, total = self._sample_keys(labels)
+        first = bisect.bisect_left(self.buckets, value)
+        store.add_many([
+            *((key, 0) for key in buckets[:first]),
+            *((key, 1) for key in buckets[first:]),
+            (count, 1),
+            (total, value),
+        ])
+
+
+def format_value(value):
+    """Format a number for the exposition format."""
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+def format_labels(labels):
+    """Format a label set for the exposition format."""
+    if not labels:
+        return ''
+    escaped = (
+        '{}="{}"'.format(name, value.replace('\\', r'\\')
+                         .replace('\n', r'\n').replace('"', r'\"'))
+        for name, value in sorted(labels.items())
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def collect():
+    """Return every sample summed over the metric files by key."""
+    totals = defaultdict(float)
+    for path in glob.glob(os.path.join(metrics_dir(), 'metrics_*.db')):
+        for key, value in MmapedDict.read_file(path).items():
+            totals[key] += value
+    return totals
+
+
+def exposition():
+    """Return all metrics in the text exposition format."""
+    samples = defaultdict(list)
+    for key, value in collect().items():
+        name, suffix, labels = json.loads(key)
+        samples[name].append((suffix, labels, value))
+
+    lines = []
+    for metric in sorted(REGISTRY, key=lambda metric: metric.name):
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        for suffix, labels, value in sorted(
+                samples.get(metric.name, []),
+                key=lambda sample: (
+                    sample[0],
+                    sorted((k, v) for k, v in sample[1].items() if k != 'le'),
+                    float(sample[1].get('le', '0').replace('+Inf', 'inf')),
+                )):
+            lines.append(
+                f'{metric.name}{suffix}{format_labels(labels)} '
+                f'{format_value(value)}')
+
+    return '\n'.join(lines) + '\n'
+
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds',
+    'Time to respond to a request, by route.',
+    ['route', 'method', 'status'],
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries',
+    'Database queries run for a request, by route.',
+    ['route'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, float('inf')),
+)
+DB_QUERY_DURATION = Histogram(
+    'db_query_duration_seconds',
+    'Time taken by a database statement.',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+             0.5, 1.0, float('inf')),
+)
+CACHE_REQUESTS = Counter(
+    'cache_requests',
+    'Cache lookups by cache and result (hit or miss).',
+    ['cache', 'result'],
+)
+AUTH_FAILURES = Counter(
+    'auth_failures',
+    'Failed authentications by reason.',
+    ['reason'],
+)
+
+
+def count_cache(cache, hits=0, misses=0):
+    """Count hits and misses of a cache."""
+    if hits:
+        CACHE_REQUESTS.inc(hits, cache=cache, result='hit')
+    if misses:
+        CACHE_REQUESTS.inc(misses, cache=cache, result='miss')
+
+
+class MetricsMiddleware:
+    """Observe request latency and database use by route.
+
+    Routes are labelled with the URL name and unknown methods as
+    `other`, so the number of series does not grow with the ids in
+    URLs or with made up methods. Unless METRICS_DIR is set the
+    middleware removes itself.
+    """
+
+    def __init__(self, get_response):
+        if not metrics_dir():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = 0
+
+        def observe_query(execute, sql, params, many, context):
+            nonlocal queries
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries += 1
+                DB_QUERY_DURATION.observe(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(observe_query))
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        route = match.view_name if match else 'unmatched'
+        method = request.method if request.method in METHODS else 'other'
+        REQUEST_DURATION.observe(
+            time.perf_counter() - start,
+            route=route, method=method, status=response.status_code,
+        )
+        REQUEST_QUERIES.observe(queries, route=route)
+        return response
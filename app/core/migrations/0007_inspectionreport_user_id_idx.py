@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_alter_inspectionreport_user_alter_reportdetails_user'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inspectionreport',
+            index=models.Index(fields=['user', '-id'], name='report_user_id_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_reportsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PhotoVariant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255)),
+                ('variant', models.CharField(max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('image', models.ImageField(null=True, upload_to='variants')),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status__in', ['pending', 'processing'])), fields=['status', 'id'], name='photo_variant_status_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='photovariant',
+            constraint=models.UniqueConstraint(fields=('source', 'variant'), name='photo_variant_source_variant'),
+        ),
+    ]
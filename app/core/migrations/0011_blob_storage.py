@@ -0,0 +1,103 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:45
+
+import core.models
+import core.storage
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_photovariant'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='photos',
+            name='basement_photos',
+            field=models.ImageField(null=True, storage=core.storage.get_blob_storage, upload_to=core.models.logo_image_file_path),
+        ),
+        migrations.AlterField(
+            model_name='photos',
+            name='bathroom_photos',
+            field=models.ImageField(null=True, storage=core.storage.get_blob_storage, upload_to=core.models.logo_image_file_path),
+        ),
+        migrations.AlterField(
+            model_name='photos',
+            name='bedrooms_photos',
+            field=models.ImageField(null=True, storage=core.storage.get_blob_storage, upload_to=core.models.logo_image_file_path),
+        ),
+        migrations.AlterField(
+            model_name='photos',
+            name='crawl_photos',
+            field=models.ImageField(null=True, storage=core.storage.get_blob_storage, upload_to=core.models.logo_image_file_path),
+        ),
+        migrations.AlterField(
+            model_name='photos',
+            name='dining_room_photos',
+            field=models.ImageField(null=True, storage=core.storage.get_blob_storage, upload_to=core.models.logo_image_file_path),
+        ),
+        migrations.AlterField(
+            model_name='photos',
+            name='exterior_photos',
+            field=models.ImageField(null=True, storage=core.storage.get_blob_storage, upload_to=core.models.logo_image_file_path),
+        ),
+        migrations.AlterField(
+            model_name='photos',
+            name='garage_photos',
+            field=models.ImageField(null=True, storage=core.storage.get_blob_storage, upload_to=core.models.logo_image_file_path),
+        ),
+        migrations.AlterField(
+            model_name='photos',
+            name='grounds_photos',
+            field=models.ImageField(null=True, storage=core.storage.get_blob_storage, upload_to=core.models.logo_image_file_path),
+        ),
+        migrations.AlterField(
+            model_name='photos',
+            name='heating_photos',
+            field=models.ImageField(null=True, storage=core.storage.get_blob_storage, upload_to=core.models.logo_image_file_path),
+        ),
+        migrations.AlterField(
+            model_name='photos',
+            name='interior_photos',
+            field=models.ImageField(null=True, storage=core.storage.get_blob_storage, upload_to=core.models.logo_image_file_path),
+        ),
+        migrations.AlterField(
+            model_name='photos',
+            name='kitchen_photos',
+            field=models.ImageField(null=True, storage=core.storage.get_blob_storage, upload_to=core.models.logo_image_file_path),
+        ),
+        migrations.AlterField(
+            model_name='photos',
+            name='laundry_photos',
+            field=models.ImageField(null=True, storage=core.storage.get_blob_storage, upload_to=core.models.logo_image_file_path),
+        ),
+        migrations.AlterField(
+            model_name='photos',
+            name='living_room_photos',
+            field=models.ImageField(null=True, storage=core.storage.get_blob_storage, upload_to=core.models.logo_image_file_path),
+        ),
+        migrations.AlterField(
+            model_name='photos',
+            name='plumbing_photos',
+            field=models.ImageField(null=True, storage=core.storage.get_blob_storage, upload_to=core.models.logo_image_file_path),
+        ),
+        migrations.AlterField(
+            model_name='photos',
+            name='roof_photos',
+            field=models.ImageField(null=True, storage=core.storage.get_blob_storage, upload_to=core.models.logo_image_file_path),
+        ),
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('size', models.BigIntegerField()),
+                ('refcount', models.PositiveIntegerField(default=0)),
+                ('last_seen', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('refcount', 0)), fields=['last_seen'], name='blob_unreferenced_idx')],
+            },
+        ),
+    ]
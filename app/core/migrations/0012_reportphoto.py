@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:46
+
+import core.models
+import core.storage
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_blob_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportPhoto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('section', models.CharField(choices=[('grounds', 'Grounds'), ('roof', 'Roof'), ('exterior', 'Exterior'), ('garage', 'Garage'), ('kitchen', 'Kitchen'), ('laundry', 'Laundry'), ('bathroom', 'Bathroom'), ('bedrooms', 'Bedrooms'), ('interior', 'Interior'), ('basement', 'Basement'), ('crawl', 'Crawl Space'), ('plumbing', 'Plumbing'), ('heating', 'Heating'), ('living_room', 'Living Room'), ('dining_room', 'Dining Room')], max_length=20)),
+                ('ordinal', models.PositiveSmallIntegerField(default=0)),
+                ('image', models.ImageField(storage=core.storage.get_blob_storage, upload_to=core.models.logo_image_file_path)),
+                ('caption', models.CharField(blank=True, max_length=255)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('report', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='report_photos', to='core.inspectionreport')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['report', 'section', 'ordinal'], name='report_photo_section_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:46
+
+from collections import Counter
+
+from django.db import migrations
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+
+PHOTO_FIELDS = [
+    'grounds_photos', 'roof_photos', 'exterior_photos', 'garage_photos',
+    'kitchen_photos', 'laundry_photos', 'bathroom_photos',
+    'bedrooms_photos', 'interior_photos', 'basement_photos',
+    'crawl_photos', 'plumbing_photos', 'heating_photos',
+    'living_room_photos', 'dining_room_photos',
+]
+
+
+def count_blobs(Blob, names, sign):
+    """Add or remove blob references made by copied photos."""
+    by_count = {}
+    for name, count in Counter(names).items():
+        by_count.setdefault(count, []).append(name)
+    for count, group in by_count.items():
+        Blob.objects.filter(name__in=group).update(
+            refcount=Greatest(F('refcount') + sign * count, 0))
+
+
+def copy_photos(apps, schema_editor):
+    """Copy each image of the wide Photos rows to a ReportPhoto row.
+
+    A report's photos come from the Photos row it references and from
+    every Photos row of its report details, in the order they were made.
+    """
+    InspectionReport = apps.get_model('core', 'InspectionReport')
+    Photos = apps.get_model('core', 'Photos')
+    ReportPhoto = apps.get_model('core', 'ReportPhoto')
+    Blob = apps.get_model('core', 'Blob')
+
+    rows = []
+    reports = InspectionReport.objects.filter(
+        Q(photos__isnull=False) | Q(report_details__photos__isnull=False)
+    ).distinct().order_by('pk')
+    for report in reports.iterator():
+        ordinals = Counter()
+        photos_rows = Photos.objects.filter(
+            Q(pk=report.photos_id)
+            | Q(report_uuid_id=report.report_details_id,
+                report_uuid__isnull=False)
+        ).order_by('pk')
+        for photos in photos_rows:
+            for field in PHOTO_FIELDS:
+                name = getattr(photos, field).name
+                if not name:
+                    continue
+                section = field[:-len('_photos')]
+                rows.append(ReportPhoto(
+                    report_id=report.pk,
+                    section=section,
+                    ordinal=ordinals[section],
+                    image=name,
+                ))
+                ordinals[section] += 1
+
+        if len(rows) >= 1000:
+            ReportPhoto.objects.bulk_create(rows)
+            count_blobs(Blob, [row.image.name for row in rows], 1)
+            rows = []
+
+    ReportPhoto.objects.bulk_create(rows)
+    count_blobs(Blob, [row.image.name for row in rows], 1)
+
+
+def remove_photos(apps, schema_editor):
+    """Remove copied photos, releasing their blob references."""
+    ReportPhoto = apps.get_model('core', 'ReportPhoto')
+    Blob = apps.get_model('core', 'Blob')
+
+    count_blobs(Blob, ReportPhoto.objects.values_list('image', flat=True), -1)
+    ReportPhoto.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_reportphoto'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_photos, remove_photos),
+    ]
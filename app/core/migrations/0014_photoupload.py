@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_copy_photos_to_reportphoto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PhotoUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('section', models.CharField(choices=[('grounds', 'Grounds'), ('roof', 'Roof'), ('exterior', 'Exterior'), ('garage', 'Garage'), ('kitchen', 'Kitchen'), ('laundry', 'Laundry'), ('bathroom', 'Bathroom'), ('bedrooms', 'Bedrooms'), ('interior', 'Interior'), ('basement', 'Basement'), ('crawl', 'Crawl Space'), ('plumbing', 'Plumbing'), ('heating', 'Heating'), ('living_room', 'Living Room'), ('dining_room', 'Dining Room')], max_length=20)),
+                ('caption', models.CharField(blank=True, max_length=255)),
+                ('filename', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField()),
+                ('offset', models.PositiveBigIntegerField(default=0)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.inspectionreport')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
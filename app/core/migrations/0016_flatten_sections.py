@@ -0,0 +1,282 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:10
+
+import core.models
+from django.db import migrations, models
+
+
+# Sub-class tables folded into their parent table, with their kind.
+CHILDREN = [
+    {'parent': 'core_exterior', 'child': 'core_exterioracunit',
+     'ptr': 'exterior_ptr_id', 'kind': 'exterioracunit',
+     'column': 'exterior_ac'},
+    {'parent': 'core_plumbing', 'child': 'core_waterheater',
+     'ptr': 'plumbing_ptr_id', 'kind': 'waterheater',
+     'column': 'water_heater'},
+    {'parent': 'core_heatingsystem', 'child': 'core_furnace',
+     'ptr': 'heatingsystem_ptr_id', 'kind': 'furnace',
+     'column': 'furnace_unit'},
+    {'parent': 'core_heatingsystem', 'child': 'core_boiler',
+     'ptr': 'heatingsystem_ptr_id', 'kind': 'boiler',
+     'column': 'boiler_unit'},
+    {'parent': 'core_electricalcoolingsystems', 'child': 'core_mainpanel',
+     'ptr': 'electricalcoolingsystems_ptr_id', 'kind': 'mainpanel',
+     'column': 'main_panel'},
+    {'parent': 'core_electricalcoolingsystems', 'child': 'core_subpanel',
+     'ptr': 'electricalcoolingsystems_ptr_id', 'kind': 'subpanel',
+     'column': 'sub_panel'},
+    {'parent': 'core_electricalcoolingsystems',
+     'child': 'core_evaporatorcoil',
+     'ptr': 'electricalcoolingsystems_ptr_id', 'kind': 'evaporatorcoil',
+     'column': 'evap_coil'},
+]
+
+# Columns added to the parent tables, with the kind of existing rows.
+COLUMNS = {
+    'core_exterior': ['exterior_ac'],
+    'core_plumbing': ['water_heater'],
+    'core_heatingsystem': ['furnace_unit', 'boiler_unit'],
+    'core_electricalcoolingsystems': ['main_panel', 'sub_panel', 'evap_coil'],
+}
+KINDS = {
+    'core_exterior': ('exterior', 20),
+    'core_plumbing': ('plumbing', 20),
+    'core_heatingsystem': ('heatingsystem', 20),
+    'core_electricalcoolingsystems': ('electricalcoolingsystems', 30),
+}
+
+ADD_COLUMNS_SQL = [
+    'ALTER TABLE {} {}'.format(table, ', '.join(
+        [f'ADD COLUMN {column} text NULL' for column in columns]
+        + [f"ADD COLUMN kind varchar({KINDS[table][1]}) NOT NULL "
+           f"DEFAULT '{KINDS[table][0]}'"]
+    ))
+    for table, columns in COLUMNS.items()
+]
+
+DROP_DEFAULTS_SQL = [
+    f'ALTER TABLE {table} ALTER COLUMN kind DROP DEFAULT'
+    for table in COLUMNS
+]
+
+DROP_COLUMNS_SQL = [
+    'ALTER TABLE {} {}'.format(table, ', '.join(
+        f'DROP COLUMN {column}' for column in [*columns, 'kind']))
+    for table, columns in COLUMNS.items()
+]
+
+# A parent row can only take one kind, so the migration stops before
+# changing anything if a row has more than one sub-class row.
+CHECK_SQL = """
+DO $$
+DECLARE
+    shared text;
+BEGIN
+    SELECT string_agg(id::text, ', ' ORDER BY id) INTO shared FROM (
+        SELECT id FROM ({children}) child GROUP BY id HAVING count(*) > 1
+    ) shared_parents;
+    IF shared IS NOT NULL THEN
+        RAISE EXCEPTION '{parent} rows % have more than one sub-class row; '
+            'delete all but one of them before migrating.', shared;
+    END IF;
+END $$
+"""
+
+CHECK_PARENTS_SQL = [
+    CHECK_SQL.format(parent=parent, children=' UNION ALL '.join(
+        f"SELECT {child['ptr']} AS id FROM {child['child']}"
+        for child in CHILDREN if child['parent'] == parent))
+    for parent in COLUMNS
+    if sum(child['parent'] == parent for child in CHILDREN) > 1
+]
+
+COPY_SQL = """
+UPDATE {parent} SET {column} = child.{column}, kind = '{kind}'
+FROM {child} child WHERE child.{ptr} = {parent}.id
+"""
+
+REVERSE_SQL = """
+INSERT INTO {child} ({ptr}, {column})
+SELECT id, {column} FROM {parent} WHERE kind = '{kind}'
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_requestprofile'),
+    ]
+
+    operations = [
+        # The columns are added and filled while the sub-class models
+        # still exist, which the migration state cannot represent, so
+        # they are added to the state once those models are deleted.
+        migrations.RunSQL(
+            sql=[
+                *CHECK_PARENTS_SQL,
+                *ADD_COLUMNS_SQL,
+                *[COPY_SQL.format(**child) for child in CHILDREN],
+                *DROP_DEFAULTS_SQL,
+            ],
+            reverse_sql=[
+                *[REVERSE_SQL.format(**child) for child in CHILDREN],
+                *DROP_COLUMNS_SQL,
+            ],
+        ),
+        migrations.DeleteModel(
+            name='Boiler',
+        ),
+        migrations.DeleteModel(
+            name='EvaporatorCoil',
+        ),
+        migrations.DeleteModel(
+            name='ExteriorACUnit',
+        ),
+        migrations.DeleteModel(
+            name='Furnace',
+        ),
+        migrations.DeleteModel(
+            name='MainPanel',
+        ),
+        migrations.DeleteModel(
+            name='SubPanel',
+        ),
+        migrations.DeleteModel(
+            name='WaterHeater',
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddField(
+                    model_name='electricalcoolingsystems',
+                    name='evap_coil',
+                    field=models.TextField(null=True),
+                ),
+                migrations.AddField(
+                    model_name='electricalcoolingsystems',
+                    name='kind',
+                    field=models.CharField(choices=[('electricalcoolingsystems', 'Electrical and cooling systems'), ('mainpanel', 'Main panel'), ('subpanel', 'Sub-panel'), ('evaporatorcoil', 'Evaporator coil')], default='electricalcoolingsystems', max_length=30),
+                ),
+                migrations.AddField(
+                    model_name='electricalcoolingsystems',
+                    name='main_panel',
+                    field=models.TextField(null=True),
+                ),
+                migrations.AddField(
+                    model_name='electricalcoolingsystems',
+                    name='sub_panel',
+                    field=models.TextField(null=True),
+                ),
+                migrations.AddField(
+                    model_name='exterior',
+                    name='exterior_ac',
+                    field=models.TextField(null=True),
+                ),
+                migrations.AddField(
+                    model_name='exterior',
+                    name='kind',
+                    field=models.CharField(choices=[('exterior', 'Exterior'), ('exterioracunit', 'AC unit')], default='exterior', max_length=20),
+                ),
+                migrations.AddField(
+                    model_name='heatingsystem',
+                    name='boiler_unit',
+                    field=models.TextField(null=True),
+                ),
+                migrations.AddField(
+                    model_name='heatingsystem',
+                    name='furnace_unit',
+                    field=models.TextField(null=True),
+                ),
+                migrations.AddField(
+                    model_name='heatingsystem',
+                    name='kind',
+                    field=models.CharField(choices=[('heatingsystem', 'Heating system'), ('furnace', 'Furnace'), ('boiler', 'Boiler')], default='heatingsystem', max_length=20),
+                ),
+                migrations.AddField(
+                    model_name='plumbing',
+                    name='kind',
+                    field=models.CharField(choices=[('plumbing', 'Plumbing'), ('waterheater', 'Water heater')], default='plumbing', max_length=20),
+                ),
+                migrations.AddField(
+                    model_name='plumbing',
+                    name='water_heater',
+                    field=models.TextField(null=True),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Boiler',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=(core.models.SectionKindMixin, 'core.heatingsystem'),
+        ),
+        migrations.CreateModel(
+            name='EvaporatorCoil',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=(core.models.SectionKindMixin, 'core.electricalcoolingsystems'),
+        ),
+        migrations.CreateModel(
+            name='ExteriorACUnit',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=(core.models.SectionKindMixin, 'core.exterior'),
+        ),
+        migrations.CreateModel(
+            name='Furnace',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=(core.models.SectionKindMixin, 'core.heatingsystem'),
+        ),
+        migrations.CreateModel(
+            name='MainPanel',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=(core.models.SectionKindMixin, 'core.electricalcoolingsystems'),
+        ),
+        migrations.CreateModel(
+            name='SubPanel',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=(core.models.SectionKindMixin, 'core.electricalcoolingsystems'),
+        ),
+        migrations.CreateModel(
+            name='WaterHeater',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=(core.models.SectionKindMixin, 'core.plumbing'),
+        ),
+    ]
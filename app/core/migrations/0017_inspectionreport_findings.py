@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:18
+
+import django.contrib.postgres.indexes
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_flatten_sections'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inspectionreport',
+            name='findings',
+            field=models.JSONField(editable=False, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='inspectionreport',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['findings'], name='report_findings_idx', opclasses=['jsonb_path_ops']),
+        ),
+    ]
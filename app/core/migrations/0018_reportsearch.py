@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:27
+
+from django.conf import settings
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_inspectionreport_findings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportSearch',
+            fields=[
+                ('report', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search', serialize=False, to='core.inspectionreport')),
+                ('vector', django.contrib.postgres.search.SearchVectorField()),
+                ('text', models.TextField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['vector'], name='report_search_vector_idx')],
+            },
+        ),
+    ]
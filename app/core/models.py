@@ -5,17 +5,23 @@ import uuid
 import os
 
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin,
 )
 
+from core.storage import get_blob_storage, get_profile_storage
+
 
 # def recipe_image_file_path(instance, filename):
 #     """Generate file path for new recipe image."""
-#     ext = os.path.splittext(filename)[1]
+#     ext = os.path.splitext(filename)[1]
 #     filename = f'{uuid.uuid4()}{ext}'
 
 #     return os.path.join('uploads', 'recipe', filename)
@@ -23,7 +29,7 @@ from django.contrib.auth.models import (
 
 def logo_image_file_path(instance, filename):
     """Generate file path for new recipe image."""
-    ext = os.path.splittext(filename)[1]
+    ext = os.path.splitext(filename)[1]
     filename = f'{uuid.uuid4()}{ext}'
 
     return os.path.join('uploads', 'logo', filename)
@@ -31,7 +37,7 @@ def logo_image_file_path(instance, filename):
 
 def signature_image_file_path(instance, filename):
     """Generate file path for new recipe image."""
-    ext = os.path.splittext(filename)[1]
+    ext = os.path.splitext(filename)[1]
     filename = f'{uuid.uuid4()}{ext}'
 
     return os.path.join('uploads', 'signature', filename)
@@ -82,6 +88,29 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
 
 
+class SectionKindManager(models.Manager):
+    """Manager of a section proxy, returning the rows of its kind."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(kind=self.model.section_kind)
+
+
+class SectionKindMixin:
+    """Proxy of a section table for the rows of one kind.
+
+    Sub-sections share their parent section's table, told apart by its
+    `kind` column, so reading or writing them touches a single table.
+    """
+    section_kind = None
+
+    def __init__(self, *args, **kwargs):
+        # Rows loaded from the database pass their values positionally,
+        # kind included.
+        if not args:
+            kwargs.setdefault('kind', self.section_kind)
+        super().__init__(*args, **kwargs)
+
+
 class ReportDetails(models.Model):
     """Report object."""
     report_uuid = models.UUIDField(
@@ -140,7 +169,11 @@ class Summary(models.Model):
 
 
 class Photos(models.Model):
-    """Photos Model"""
+    """Legacy photos of a report, one column per section.
+
+    Read-only: photos are stored as ReportPhoto rows, into which these
+    were copied. The rows are kept so their files are still served.
+    """
     report_uuid = models.ForeignKey(
         ReportDetails,
         on_delete=models.CASCADE,
@@ -148,63 +181,78 @@ class Photos(models.Model):
     )
     grounds_photos = models.ImageField(
         null=True,
-        upload_to=logo_image_file_path
+        upload_to=logo_image_file_path,
+        storage=get_blob_storage,
     )
     roof_photos = models.ImageField(
         null=True,
-        upload_to=logo_image_file_path
+        upload_to=logo_image_file_path,
+        storage=get_blob_storage,
     )
     exterior_photos = models.ImageField(
         null=True,
-        upload_to=logo_image_file_path
+        upload_to=logo_image_file_path,
+        storage=get_blob_storage,
     )
     garage_photos = models.ImageField(
         null=True,
-        upload_to=logo_image_file_path
+        upload_to=logo_image_file_path,
+        storage=get_blob_storage,
     )
     kitchen_photos = models.ImageField(
         null=True,
-        upload_to=logo_image_file_path
+        upload_to=logo_image_file_path,
+        storage=get_blob_storage,
     )
     laundry_photos = models.ImageField(
         null=True,
-        upload_to=logo_image_file_path
+        upload_to=logo_image_file_path,
+        storage=get_blob_storage,
     )
     bathroom_photos = models.ImageField(
         null=True,
-        upload_to=logo_image_file_path
+        upload_to=logo_image_file_path,
+        storage=get_blob_storage,
     )
     bedrooms_photos = models.ImageField(
         null=True,
-        upload_to=logo_image_file_path
+        upload_to=logo_image_file_path,
+        storage=get_blob_storage,
     )
     interior_photos = models.ImageField(
         null=True,
-        upload_to=logo_image_file_path
+        upload_to=logo_image_file_path,
+        storage=get_blob_storage,
     )
     basement_photos = models.ImageField(
         null=True,
-        upload_to=logo_image_file_path
+        upload_to=logo_image_file_path,
+        storage=get_blob_storage,
     )
     crawl_photos = models.ImageField(
         null=True,
-        upload_to=logo_image_file_path
+        upload_to=logo_image_file_path,
+        storage=get_blob_storage,
     )
     plumbing_photos = models.ImageField(
         null=True,
-        upload_to=logo_image_file_path
+        upload_to=logo_image_file_path,
+        storage=get_blob_storage,
     )
     heating_photos = models.ImageField(
         null=True,
-        upload_to=logo_image_file_path
+        upload_to=logo_image_file_path,
+        storage=get_blob_storage,
     )
     living_room_photos = models.ImageField(
         null=True,
-        upload_to=logo_image_file_path
+        upload_to=logo_image_file_path,
+        storage=get_blob_storage,
     )
     dining_room_photos = models.ImageField(
         null=True,
-        upload_to=logo_image_file_path
+        upload_to=logo_image_file_path,
+        storage=get_blob_storage,
     )
 
 
@@ -282,11 +330,22 @@ class Exterior(models.Model):
     service_entry = models.TextField(null=True)
     wall_construction = models.TextField(null=True)
     exterior_doors = models.TextField(null=True)
+    exterior_ac = models.TextField(null=True)
+    kind = models.CharField(
+        max_length=20,
+        choices=[('exterior', 'Exterior'), ('exterioracunit', 'AC unit')],
+        default='exterior',
+    )
 
 
-class ExteriorACUnit(Exterior):
+class ExteriorACUnit(SectionKindMixin, Exterior):
     """AC Sub-Class"""
-    exterior_ac = models.TextField(null=True)
+    section_kind = 'exterioracunit'
+
+    objects = SectionKindManager()
+
+    class Meta:
+        proxy = True
 
 
 class GarageCarport(models.Model):
@@ -420,11 +479,22 @@ class Plumbing(models.Model):
     fuel_shutoff = models.TextField(null=True)
     well_pump = models.TextField(null=True)
     sanitary_pump = models.TextField(null=True)
+    water_heater = models.TextField(null=True)
+    kind = models.CharField(
+        max_length=20,
+        choices=[('plumbing', 'Plumbing'), ('waterheater', 'Water heater')],
+        default='plumbing',
+    )
 
 
-class WaterHeater(Plumbing):
+class WaterHeater(SectionKindMixin, Plumbing):
     """Water Heater Sub-Class"""
-    water_heater = models.TextField(null=True)
+    section_kind = 'waterheater'
+
+    objects = SectionKindManager()
+
+    class Meta:
+        proxy = True
 
 
 class HeatingSystem(models.Model):
@@ -435,16 +505,37 @@ class HeatingSystem(models.Model):
         null=True
     )
     other_systems = models.TextField(null=True)
+    furnace_unit = models.TextField(null=True)
+    boiler_unit = models.TextField(null=True)
+    kind = models.CharField(
+        max_length=20,
+        choices=[
+            ('heatingsystem', 'Heating system'),
+            ('furnace', 'Furnace'),
+            ('boiler', 'Boiler'),
+        ],
+        default='heatingsystem',
+    )
 
 
-class Furnace(HeatingSystem):
+class Furnace(SectionKindMixin, HeatingSystem):
     """Furnace Model Sub-Class"""
-    furnace_unit = models.TextField(null=True)
+    section_kind = 'furnace'
+
+    objects = SectionKindManager()
 
+    class Meta:
+        proxy = True
 
-class Boiler(HeatingSystem):
+
+class Boiler(SectionKindMixin, HeatingSystem):
     """Boiler Model Sub-Class"""
-    boiler_unit = models.TextField(null=True)
+    section_kind = 'boiler'
+
+    objects = SectionKindManager()
+
+    class Meta:
+        proxy = True
 
 
 class ElectricalCoolingSystems(models.Model):
@@ -454,21 +545,49 @@ class ElectricalCoolingSystems(models.Model):
         on_delete=models.CASCADE,
         null=True
     )
+    main_panel = models.TextField(null=True)
+    sub_panel = models.TextField(null=True)
+    evap_coil = models.TextField(null=True)
+    kind = models.CharField(
+        max_length=30,
+        choices=[
+            ('electricalcoolingsystems', 'Electrical and cooling systems'),
+            ('mainpanel', 'Main panel'),
+            ('subpanel', 'Sub-panel'),
+            ('evaporatorcoil', 'Evaporator coil'),
+        ],
+        default='electricalcoolingsystems',
+    )
 
 
-class MainPanel(ElectricalCoolingSystems):
+class MainPanel(SectionKindMixin, ElectricalCoolingSystems):
     """Main Panel Sub-Class"""
-    main_panel = models.TextField(null=True)
+    section_kind = 'mainpanel'
+
+    objects = SectionKindManager()
 
+    class Meta:
+        proxy = True
 
-class SubPanel(ElectricalCoolingSystems):
+
+class SubPanel(SectionKindMixin, ElectricalCoolingSystems):
     """Sub-Panel Sub-Class"""
-    sub_panel = models.TextField(null=True)
+    section_kind = 'subpanel'
+
+    objects = SectionKindManager()
 
+    class Meta:
+        proxy = True
 
-class EvaporatorCoil(ElectricalCoolingSystems):
+
+class EvaporatorCoil(SectionKindMixin, ElectricalCoolingSystems):
     """Evaporator Coil Sub-Class"""
-    evap_coil = models.TextField(null=True)
+    section_kind = 'evaporatorcoil'
+
+    objects = SectionKindManager()
+
+    class Meta:
+        proxy = True
 
 
 class LivingRoom(models.Model):
@@ -592,8 +711,274 @@ class InspectionReport(models.Model):
         on_delete=models.CASCADE,
         null=True
     )
+    # Every section as rendered by its serializer, for reports stored in
+    # the document layout; null while the sections are stored in tables.
+    findings = models.JSONField(
+        null=True, editable=False, encoder=DjangoJSONEncoder)
+    version = models.PositiveIntegerField(default=1, editable=False)
+    modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-id'], name='report_user_id_idx'),
+            GinIndex(
+                fields=['findings'],
+                name='report_findings_idx',
+                opclasses=['jsonb_path_ops'],
+            ),
+        ]
 
     def create(self, report_details, **validated_data):
         """Helper function to create inspection report"""
         report_details(**validated_data)
         return InspectionReport
+
+    def _report_sections(self, related_name):
+        """Return section rows stored against the report details."""
+        if self.report_details_id is None or self.findings is not None:
+            return []
+        return list(getattr(self.report_details, related_name).all())
+
+    def _report_subsections(self, related_name, kind):
+        """Return the rows of one kind of a section table."""
+        return [
+            section for section in self._report_sections(related_name)
+            if section.kind == kind
+        ]
+
+    @property
+    def interior(self):
+        """Interior section of the report."""
+        sections = self._report_sections('interior_set')
+        return sections[0] if sections else None
+
+    @property
+    def bedrooms(self):
+        """Bedroom sections of the report."""
+        return self._report_sections('bedrooms_set')
+
+    @property
+    def living_rooms(self):
+        """Living room sections of the report."""
+        return self._report_sections('livingroom_set')
+
+    @property
+    def dining_rooms(self):
+        """Dining room sections of the report."""
+        return self._report_sections('diningroom_set')
+
+    @property
+    def waterheater(self):
+        """Water heater sub-class of the plumbing section."""
+        plumbing = self.plumbing
+        if plumbing is not None and plumbing.kind == 'waterheater':
+            return plumbing
+        return None
+
+    @property
+    def boiler(self):
+        """Boiler sub-class of the heating system section."""
+        heatingsystem = self.heatingsystem
+        if heatingsystem is not None and heatingsystem.kind == 'boiler':
+            return heatingsystem
+        return None
+
+    @property
+    def furnaces(self):
+        """Furnace sections of the report."""
+        return self._report_subsections('heatingsystem_set', 'furnace')
+
+    @property
+    def main_panels(self):
+        """Main panel sections of the report."""
+        return self._report_subsections(
+            'electricalcoolingsystems_set', 'mainpanel')
+
+    @property
+    def sub_panels(self):
+        """Sub-panel sections of the report."""
+        return self._report_subsections(
+            'electricalcoolingsystems_set', 'subpanel')
+
+    @property
+    def evap_coils(self):
+        """Evaporator coil sections of the report."""
+        return self._report_subsections(
+            'electricalcoolingsystems_set', 'evaporatorcoil')
+
+
+class ReportPhoto(models.Model):
+    """Photo of a report section, one row per image."""
+    SECTION_CHOICES = [
+        ('grounds', 'Grounds'),
+        ('roof', 'Roof'),
+        ('exterior', 'Exterior'),
+        ('garage', 'Garage'),
+        ('kitchen', 'Kitchen'),
+        ('laundry', 'Laundry'),
+        ('bathroom', 'Bathroom'),
+        ('bedrooms', 'Bedrooms'),
+        ('interior', 'Interior'),
+        ('basement', 'Basement'),
+        ('crawl', 'Crawl Space'),
+        ('plumbing', 'Plumbing'),
+        ('heating', 'Heating'),
+        ('living_room', 'Living Room'),
+        ('dining_room', 'Dining Room'),
+    ]
+
+    report = models.ForeignKey(
+        InspectionReport,
+        on_delete=models.CASCADE,
+        related_name='report_photos',
+        db_index=False,
+    )
+    section = models.CharField(max_length=20, choices=SECTION_CHOICES)
+    ordinal = models.PositiveSmallIntegerField(default=0)
+    image = models.ImageField(
+        upload_to=logo_image_file_path,
+        storage=get_blob_storage,
+    )
+    caption = models.CharField(max_length=255, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['report', 'section', 'ordinal'],
+                name='report_photo_section_idx',
+            ),
+        ]
+
+
+class PhotoUpload(models.Model):
+    """Resumable upload of a report photo, written to disk in chunks."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    report = models.ForeignKey(
+        InspectionReport,
+        on_delete=models.CASCADE,
+    )
+    section = models.CharField(
+        max_length=20,
+        choices=ReportPhoto.SECTION_CHOICES,
+    )
+    caption = models.CharField(max_length=255, blank=True)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+
+class ReportSnapshot(models.Model):
+    """Rendered JSON document of a report at a given version."""
+    report = models.OneToOneField(
+        InspectionReport,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='snapshot',
+    )
+    version = models.PositiveIntegerField()
+    content = models.BinaryField()
+
+
+class ReportSearch(models.Model):
+    """Full-text search vector and text of a report's findings."""
+    report = models.OneToOneField(
+        InspectionReport,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search',
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    vector = SearchVectorField()
+    # Labelled text the vector is built from, for highlighting matches.
+    text = models.TextField()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['vector'], name='report_search_vector_idx'),
+        ]
+
+
+class PhotoVariant(models.Model):
+    """Derivative image of an uploaded photo, queued until it is built."""
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (PROCESSING, 'Processing'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    source = models.CharField(max_length=255)
+    variant = models.CharField(max_length=20)
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    image = models.ImageField(null=True, upload_to='variants')
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['source', 'variant'],
+                name='photo_variant_source_variant',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['status', 'id'],
+                name='photo_variant_status_idx',
+                condition=models.Q(status__in=['pending', 'processing']),
+            ),
+        ]
+
+
+class Blob(models.Model):
+    """Stored upload shared by every file field holding its content."""
+    name = models.CharField(max_length=255, primary_key=True)
+    size = models.BigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+    last_seen = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['last_seen'],
+                name='blob_unreferenced_idx',
+                condition=models.Q(refcount=0),
+            ),
+        ]
+
+
+class RequestProfile(models.Model):
+    """cProfile statistics of a request profiled by a staff user."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        on_delete=models.SET_NULL,
+    )
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=255)
+    view = models.CharField(max_length=255, blank=True)
+    status = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    queries = models.PositiveIntegerField()
+    stats = models.FileField(storage=get_profile_storage, upload_to='%Y/%m')
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created']
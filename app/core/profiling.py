@@ -0,0 +1,152 @@
+"""
+Opt-in profiling of requests made by staff users.
+"""
+import cProfile
+import io
+import marshal
+import pstats
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.base import ContentFile
+from django.db import connections
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+
+from core.models import RequestProfile
+
+
+# 'download' returns the .prof file for snakeviz or pstats, 'text' the
+# slowest functions, and 'store' the normal response while the profile
+# is kept for the admin.
+MODES = ('download', 'text', 'store')
+
+TEXT_LIMIT = 60
+
+
+def requested_mode(request):
+    """Return the profile mode asked for by a request, if any."""
+    mode = request.headers.get('X-Profile') or request.GET.get('profile')
+    return mode if mode in MODES else None
+
+
+def request_user(request):
+    """Return the user a request authenticates as, if any.
+
+    API views authenticate inside the view, so the credentials are
+    checked here with the authentication classes of the view the
+    request resolves to.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user
+    try:
+        view = getattr(resolve(request.path_info).func, 'cls', None)
+    except Resolver404:
+        return None
+    if view is None:
+        return None
+
+    api_request = Request(request)
+    for authentication in view.authentication_classes:
+        try:
+            result = authentication().authenticate(api_request)
+        except APIException:
+            return None
+        if result is not None:
+            return result[0]
+
+    return None
+
+
+def stats_text(stats, limit=TEXT_LIMIT):
+    """Return the functions with the most cumulative time as text."""
+    out = io.StringIO()
+    stats.stream = out
+    stats.sort_stats('cumulative').print_stats(limit)
+    return out.getvalue()
+
+
+def load_stats(profile):
+    """Return the pstats of a stored profile."""
+    stats = pstats.Stats()
+    with profile.stats.open('rb') as f:
+        stats.stats = marshal.load(f)
+    stats.get_top_level_stats()
+    return stats
+
+
+class ProfilerMiddleware:
+    """Run staff requests asking for it under cProfile.
+
+    Everything after this middleware is profiled, including DRF
+    authentication, the viewset action, the nested serializers and
+    rendering. Requests from other users are served as usual. Unless
+    REQUEST_PROFILER is set the middleware removes itself.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILER', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = requested_mode(request)
+        if mode is None:
+            return self.get_response(request)
+        user = request_user(request)
+        if user is None or not user.is_staff:
+            return self.get_response(request)
+
+        queries = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count_query))
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        duration = time.perf_counter() - start
+
+        stats = pstats.Stats(profiler)
+        if mode == 'text':
+            return HttpResponse(
+                stats_text(stats), content_type='text/plain; charset=utf-8')
+
+        content = marshal.dumps(stats.stats)
+        filename = '{}.prof'.format(timezone.now().strftime('%Y%m%d%H%M%S%f'))
+        if mode == 'download':
+            response = HttpResponse(
+                content, content_type='application/octet-stream')
+            response.headers['Content-Disposition'] = \
+                f'attachment; filename="{filename}"'
+            return response
+
+        match = request.resolver_match
+        profile = RequestProfile(
+            user=user,
+            method=request.method,
+            path=request.get_full_path()[:255],
+            view=match.view_name if match else '',
+            status=response.status_code,
+            duration_ms=round(duration * 1000, 1),
+            queries=queries,
+        )
+        profile.stats.save(filename, ContentFile(content), save=False)
+        profile.save()
+        response.headers['X-Profile-Id'] = str(profile.pk)
+        return response
@@ -0,0 +1,139 @@
+"""
+Signal handlers keeping report versions, photo variants, blob
+references and profile files current.
+"""
+from collections import Counter
+
+from django.apps import apps
+from django.db.models import F, Q
+from django.db.models.signals import (
+    post_init,
+    pre_save,
+    post_save,
+    post_delete,
+)
+from django.utils import timezone
+
+from core import models
+from core.blobs import blob_fields, blob_names, update_refcounts
+from core.derivatives import enqueue_variants, photo_sources
+
+
+SECTION_MODELS = [
+    models.Overview, models.Summary, models.Photos,
+    models.ReceiptInvoice, models.Grounds, models.Roof,
+    models.Exterior, models.ExteriorACUnit, models.GarageCarport,
+    models.Kitchen, models.Laundry, models.Bathroom, models.Bedrooms,
+    models.Interior, models.Basement, models.CrawlSpace,
+    models.Plumbing, models.WaterHeater, models.HeatingSystem,
+    models.Furnace, models.Boiler, models.ElectricalCoolingSystems,
+    models.MainPanel, models.SubPanel, models.EvaporatorCoil,
+    models.LivingRoom, models.DiningRoom,
+]
+
+
+def section_reports(section):
+    """Return the reports a section row belongs to."""
+    match = Q(pk__in=[])
+    if section.report_uuid_id is not None:
+        match |= Q(report_details_id=section.report_uuid_id)
+    for field in models.InspectionReport._meta.fields:
+        if field.related_model and isinstance(section, field.related_model) \
+                and field.related_model is not models.ReportDetails:
+            match |= Q(**{field.attname: section.pk})
+
+    return models.InspectionReport.objects.filter(match)
+
+
+def touch_reports(reports):
+    """Bump the version of the given reports."""
+    return reports.update(version=F('version') + 1, modified=timezone.now())
+
+
+def touch_section_reports(sender, instance, raw=False, **kwargs):
+    """Bump the version of reports containing a saved section."""
+    if raw:
+        return
+    touch_reports(section_reports(instance))
+
+
+def touch_details_reports(sender, instance, raw=False, **kwargs):
+    """Bump the version of reports using saved report details."""
+    if raw:
+        return
+    touch_reports(
+        models.InspectionReport.objects.filter(report_details=instance))
+
+
+def touch_photo_report(sender, instance, raw=False, **kwargs):
+    """Bump the version of the report a photo belongs to."""
+    if raw:
+        return
+    touch_reports(
+        models.InspectionReport.objects.filter(pk=instance.report_id))
+
+
+def bump_report_version(sender, instance, **kwargs):
+    """Increment the version of a report being updated."""
+    if not instance._state.adding:
+        instance.version = F('version') + 1
+
+
+def refresh_report_version(sender, instance, created, **kwargs):
+    """Load the incremented version back onto the report."""
+    if not created:
+        instance.refresh_from_db(fields=['version'])
+
+
+def queue_photo_variants(sender, instance, raw=False, **kwargs):
+    """Queue the derivative images of saved photos."""
+    if raw:
+        return
+    enqueue_variants(photo_sources(instance))
+
+
+def remember_blobs(sender, instance, **kwargs):
+    """Keep the blob names an instance was loaded with."""
+    instance._blob_names = blob_names(instance)
+
+
+def count_blob_references(sender, instance, **kwargs):
+    """Count the blobs a saved instance started and stopped using."""
+    names = blob_names(instance)
+    previous = getattr(instance, '_blob_names', [])
+    update_refcounts(
+        added=(Counter(names) - Counter(previous)).elements(),
+        removed=(Counter(previous) - Counter(names)).elements(),
+    )
+    instance._blob_names = names
+
+
+def release_blob_references(sender, instance, **kwargs):
+    """Drop the blob references of a deleted instance."""
+    update_refcounts(removed=getattr(instance, '_blob_names', []))
+
+
+def delete_profile_stats(sender, instance, **kwargs):
+    """Remove the file of a deleted request profile."""
+    instance.stats.delete(save=False)
+
+
+def connect():
+    """Connect the report version and photo signal handlers."""
+    for model in SECTION_MODELS:
+        post_save.connect(touch_section_reports, sender=model)
+        post_delete.connect(touch_section_reports, sender=model)
+    post_save.connect(touch_details_reports, sender=models.ReportDetails)
+    pre_save.connect(bump_report_version, sender=models.InspectionReport)
+    post_save.connect(refresh_report_version,
+                      sender=models.InspectionReport)
+    post_save.connect(touch_photo_report, sender=models.ReportPhoto)
+    post_delete.connect(touch_photo_report, sender=models.ReportPhoto)
+    post_delete.connect(delete_profile_stats, sender=models.RequestProfile)
+    for model in [models.Photos, models.ReportPhoto]:
+        post_save.connect(queue_photo_variants, sender=model)
+    for model in apps.get_app_config('core').get_models():
+        if blob_fields(model):
+            post_init.connect(remember_blobs, sender=model)
+            post_save.connect(count_blob_references, sender=model)
+            post_delete.connect(release_blob_references, sender=model)
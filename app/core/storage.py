@@ -0,0 +1,109 @@
+"""
+Content-addressed storage for uploaded media.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.move import file_move_safe
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+
+class BlobStorage(FileSystemStorage):
+    """File system storage keeping one copy of each distinct upload.
+
+    Uploads are hashed while they are written to a temporary file and
+    stored under their SHA-256 digest, so saving content that is already
+    stored only records the upload. A `Blob` row per file counts the
+    model fields referencing it.
+    """
+    location_prefix = 'blobs'
+
+    @cached_property
+    def base_url(self):
+        """Serve blobs through the authenticated media view by default."""
+        if self._base_url is not None and not self._base_url.endswith('/'):
+            self._base_url += '/'
+        return self._value_or_setting(
+            self._base_url, settings.PROTECTED_MEDIA_URL)
+
+    def blob_name(self, digest, ext):
+        """Return the storage name of content with a digest."""
+        return os.path.join(
+            self.location_prefix, digest[:2], digest[2:4],
+            f'{digest}{ext.lower()}')
+
+    def get_available_name(self, name, max_length=None):
+        """Return the name unchanged, equal names mean equal content."""
+        return name
+
+    def _save(self, name, content):
+        from core.models import Blob
+
+        tmp_dir = self.path(os.path.join(self.location_prefix, 'tmp'))
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False) as tmp:
+            for chunk in content.chunks():
+                digest.update(chunk)
+                size += len(chunk)
+                tmp.write(chunk)
+
+        name = self.blob_name(digest.hexdigest(), os.path.splitext(name)[1])
+        try:
+            Blob.objects.bulk_create(
+                [Blob(name=name, size=size, last_seen=timezone.now())],
+                update_conflicts=True,
+                unique_fields=['name'],
+                update_fields=['last_seen'],
+            )
+            if self.exists(name):
+                os.remove(tmp.name)
+            else:
+                os.makedirs(os.path.dirname(self.path(name)), exist_ok=True)
+                file_move_safe(tmp.name, self.path(name),
+                               allow_overwrite=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(self.path(name), self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(tmp.name):
+                os.remove(tmp.name)
+            raise
+
+        return name
+
+
+blob_storage = BlobStorage()
+
+
+def get_blob_storage():
+    """Return the storage used for uploaded photos."""
+    return blob_storage
+
+
+class ProfileStorage(FileSystemStorage):
+    """File system storage under REQUEST_PROFILE_DIR.
+
+    Profiles are kept outside MEDIA_ROOT so they are only downloaded
+    through the admin.
+    """
+
+    @property
+    def base_location(self):
+        return settings.REQUEST_PROFILE_DIR
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+
+profile_storage = ProfileStorage()
+
+
+def get_profile_storage():
+    """Return the storage request profiles are kept in."""
+    return profile_storage
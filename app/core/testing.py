@@ -0,0 +1,77 @@
+"""
+Query and wall-time budgets for tests.
+"""
+import time
+from contextlib import ContextDecorator
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver
+
+
+class budget(ContextDecorator):
+    """Fail when a block runs more queries or takes longer than allowed.
+
+    Use as a context manager around the requests being measured, or as
+    a decorator on a test method:
+
+        with budget(queries=2, ms=200):
+            res = self.client.get(url)
+
+    Streamed content has to be consumed inside the block to be counted.
+    Time budgets are multiplied by TEST_TIME_BUDGET_SCALE and are only
+    checked when it is set, since wall time depends on the machine.
+    """
+
+    def __init__(self, queries=None, ms=None, using=DEFAULT_DB_ALIAS):
+        self.max_queries = queries
+        self.max_ms = ms
+        self.using = using
+
+    def __enter__(self):
+        self.captured = CaptureQueriesContext(connections[self.using])
+        self.captured.__enter__()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.elapsed_ms = (time.perf_counter() - self.started) * 1000
+        self.captured.__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return False
+
+        self.queries = len(self.captured)
+        if self.max_queries is not None and self.queries > self.max_queries:
+            statements = '\n'.join(
+                f'{number}. {query["sql"]}'
+                for number, query in enumerate(
+                    self.captured.captured_queries, start=1)
+            )
+            raise AssertionError(
+                f'{self.queries} queries run, the budget is '
+                f'{self.max_queries}:\n{statements}')
+
+        scale = getattr(settings, 'TEST_TIME_BUDGET_SCALE', 0)
+        if self.max_ms is not None and scale \
+                and self.elapsed_ms > self.max_ms * scale:
+            raise AssertionError(
+                f'Took {self.elapsed_ms:.1f}ms, the budget is '
+                f'{self.max_ms * scale:.0f}ms.')
+
+        return False
+
+
+def route_names(urlconf):
+    """Return the names of the routes in a URLconf."""
+    names = set()
+
+    def walk(patterns):
+        for pattern in patterns:
+            if hasattr(pattern, 'url_patterns'):
+                walk(pattern.url_patterns)
+            elif pattern.name:
+                names.add(pattern.name)
+
+    walk(get_resolver(urlconf).url_patterns)
+    return names
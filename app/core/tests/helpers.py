@@ -0,0 +1,35 @@
+"""
+Helpers for tests.
+"""
+import io
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import override_settings
+
+from PIL import Image
+
+
+def jpeg(color='red', size=(64, 48)):
+    """Return the bytes of a JPEG image."""
+    content = io.BytesIO()
+    Image.new('RGB', size, color).save(content, 'JPEG')
+    return content.getvalue()
+
+
+def save_image(name='photo.jpg', size=(2000, 1500)):
+    """Store a JPEG image and return its storage name."""
+    return default_storage.save(name, ContentFile(jpeg(size=size)))
+
+
+class TemporaryMediaMixin:
+    """Store the media files of each test in a temporary directory."""
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=self.media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        super().setUp()
@@ -0,0 +1,60 @@
+"""
+Tests for query and time budgets.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from core.testing import budget
+
+
+class BudgetTests(TestCase):
+    """Test the budget context manager and decorator."""
+
+    def test_within_budget(self):
+        """Test queries and time within the budget are counted."""
+        with budget(queries=1, ms=1000) as spent:
+            get_user_model().objects.count()
+
+        self.assertEqual(spent.queries, 1)
+        self.assertLess(spent.elapsed_ms, 1000)
+
+    def test_query_budget_exceeded(self):
+        """Test running more queries fails, listing the statements."""
+        with self.assertRaisesRegex(AssertionError, '2 queries run') as cm:
+            with budget(queries=1):
+                get_user_model().objects.count()
+                get_user_model().objects.exists()
+
+        self.assertIn('1. SELECT COUNT(*)', str(cm.exception))
+
+    @override_settings(TEST_TIME_BUDGET_SCALE=1)
+    def test_time_budget_exceeded(self):
+        """Test taking longer than the scaled budget fails."""
+        with self.assertRaisesRegex(AssertionError, 'the budget is 1ms'):
+            with budget(ms=1):
+                time.sleep(0.01)
+
+    def test_time_budget_opt_in(self):
+        """Test time budgets are not checked unless a scale is set."""
+        for scale in [0, None]:
+            with override_settings(TEST_TIME_BUDGET_SCALE=scale):
+                with budget(ms=1):
+                    time.sleep(0.01)
+
+    def test_decorator(self):
+        """Test budgets can decorate a function."""
+        @budget(queries=0)
+        def count():
+            return get_user_model().objects.count()
+
+        with self.assertRaises(AssertionError):
+            count()
+
+    def test_errors_pass_through(self):
+        """Test errors raised in the block are not replaced."""
+        with self.assertRaises(ValueError):
+            with budget(queries=0):
+                get_user_model().objects.count()
+                raise ValueError()
@@ -0,0 +1,73 @@
+"""
+Tests for photo derivatives.
+"""
+import io
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase
+
+from PIL import Image
+
+from core.derivatives import build_variants, enqueue_variants
+from core.models import Photos, PhotoVariant
+from core.tests.helpers import TemporaryMediaMixin, save_image
+
+
+class DerivativeTests(TemporaryMediaMixin, TestCase):
+    """Test building photo variants."""
+
+    def test_saving_photos_queues_variants(self):
+        """Test saving photos queues every variant of each image."""
+        photos = Photos()
+        photos.roof_photos.name = save_image()
+        photos.save()
+
+        self.assertEqual(
+            set(PhotoVariant.objects.values_list('variant', 'status')),
+            {('thumbnail', 'pending'), ('medium', 'pending'),
+             ('webp', 'pending')},
+        )
+
+        photos.save()
+
+        self.assertEqual(PhotoVariant.objects.count(), 3)
+
+    def test_build_variants(self):
+        """Test queued variants are resized in their format."""
+        enqueue_variants([save_image()])
+
+        self.assertEqual(build_variants(workers=0), 3)
+
+        variants = {v.variant: v for v in PhotoVariant.objects.all()}
+        self.assertTrue(all(
+            v.status == PhotoVariant.DONE for v in variants.values()))
+        with Image.open(variants['thumbnail'].image) as image:
+            self.assertEqual(image.size, (320, 240))
+            self.assertEqual(image.format, 'JPEG')
+        with Image.open(variants['webp'].image) as image:
+            self.assertEqual(image.size, (1280, 960))
+            self.assertEqual(image.format, 'WEBP')
+        self.assertEqual(build_variants(workers=0), 0)
+
+    def test_build_variants_in_process_pool(self):
+        """Test variants are built by worker processes."""
+        enqueue_variants([save_image()])
+
+        call_command('build_photo_variants', workers=1,
+                     stdout=io.StringIO())
+
+        self.assertFalse(PhotoVariant.objects.exclude(
+            status=PhotoVariant.DONE).exists())
+
+    def test_unreadable_source_fails(self):
+        """Test variants of a missing or broken file are marked failed."""
+        broken = default_storage.save('broken.jpg', ContentFile(b'nope'))
+        enqueue_variants(['missing.jpg', broken])
+
+        for _ in range(3):
+            build_variants(workers=0)
+
+        self.assertFalse(PhotoVariant.objects.exclude(
+            status=PhotoVariant.FAILED).exists())
@@ -0,0 +1,91 @@
+"""
+Tests for request instrumentation.
+"""
+import json
+
+from django.test import override_settings
+
+from rest_framework.authtoken.models import Token
+
+from report.tests.helpers import EXPORT_URL, REPORT_URL, ReportTestCase
+
+
+def slow_records(logs):
+    """Return the slow request records among captured request logs."""
+    return [
+        record for record in logs.records
+        if record.name == 'core.requests.slow'
+    ]
+
+
+@override_settings(REQUEST_METRICS=True, REQUEST_METRICS_SLOW_MS=10000)
+class RequestMetricsTests(ReportTestCase):
+    """Test the request metrics middleware."""
+
+    def test_server_timing_and_log(self):
+        """Test query count and timings are sent and logged."""
+        with self.assertLogs('core.requests', 'INFO') as logs:
+            res = self.client.get(REPORT_URL, {'include': 'roof'})
+
+        timing = res['Server-Timing']
+        self.assertIn('desc="1 queries"', timing)
+        for name in ['db;', 'serialize;', 'render;', 'total;']:
+            self.assertIn(name, timing)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], REPORT_URL)
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['queries'], 1)
+        self.assertEqual(record['response_bytes'], len(res.content))
+        self.assertGreater(record['serialize_ms'], 0)
+
+    def test_streamed_response_logged_when_sent(self):
+        """Test streamed responses are logged with the bytes sent."""
+        with self.assertLogs('core.requests', 'INFO') as logs:
+            res = self.client.get(EXPORT_URL)
+            self.assertEqual(logs.records, [])
+            content = b''.join(res.streaming_content)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['response_bytes'], len(content))
+        self.assertGreater(record['queries'], 1)
+
+    @override_settings(REQUEST_METRICS_SLOW_MS=0,
+                       REQUEST_METRICS_SLOW_STATEMENTS=2)
+    def test_slow_request_logs_statements(self):
+        """Test slow requests log their slowest statements."""
+        with self.assertLogs('core.requests', 'INFO') as logs:
+            self.client.get(REPORT_URL, {'fields': 'id,roof,bedrooms'})
+
+        record = json.loads(slow_records(logs)[0].getMessage())
+        self.assertEqual(len(record['statements']), 2)
+        self.assertGreaterEqual(record['statements'][0]['ms'],
+                                record['statements'][1]['ms'])
+        self.assertIn('SELECT', record['statements'][0]['sql'])
+
+    @override_settings(REQUEST_METRICS_SLOW_MS=0,
+                       REQUEST_METRICS_SLOW_STATEMENTS=50)
+    def test_slow_request_params_not_logged(self):
+        """Test statement parameters, such as token keys, are left out."""
+        token = Token.objects.create(user=self.user)
+        self.client.force_authenticate(None)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        with self.assertLogs('core.requests', 'INFO') as logs:
+            self.client.get(REPORT_URL)
+
+        message = slow_records(logs)[0].getMessage()
+        self.assertNotIn(token.key, message)
+        self.assertNotIn('params', json.loads(message)['statements'][0])
+
+        with override_settings(REQUEST_METRICS_LOG_PARAMS=True), \
+                self.assertLogs('core.requests', 'INFO') as logs:
+            self.client.get(REPORT_URL)
+
+        self.assertIn(token.key, slow_records(logs)[0].getMessage())
+
+    @override_settings(REQUEST_METRICS=False)
+    def test_disabled(self):
+        """Test nothing is added when metrics are disabled."""
+        res = self.client.get(REPORT_URL)
+
+        self.assertNotIn('Server-Timing', res)
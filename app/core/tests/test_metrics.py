@@ -0,0 +1,194 @@
+"""
+Tests for multi-process metrics.
+"""
+import multiprocessing
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import metrics
+from report.tests.helpers import REPORT_URL, create_inspection_report
+from user.tests.helpers import TOKEN_URL
+
+
+METRICS_URL = reverse('metrics')
+
+
+def increment_in_child():
+    metrics.CACHE_REQUESTS.inc(cache='token', result='hit')
+
+
+class MetricsTestCase(TestCase):
+    """Write metrics to a temporary directory."""
+
+    def setUp(self):
+        self.metrics_dir = tempfile.mkdtemp()
+        settings = override_settings(METRICS_DIR=self.metrics_dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(shutil.rmtree, self.metrics_dir)
+        self.addCleanup(metrics.reset_store)
+        metrics.reset_store()
+
+
+class MetricStoreTests(MetricsTestCase):
+    """Test the metric files."""
+
+    def test_file_grows_and_is_read_back(self):
+        """Test values survive the file growing past its initial size."""
+        store = metrics.get_store()
+        for i in range(2000):
+            store.add(f'key-{i}', i)
+        store.add('key-1', 1)
+
+        values = metrics.MmapedDict.read_file(store._file.name)
+
+        self.assertEqual(len(values), 2000)
+        self.assertEqual(values['key-1'], 2)
+        self.assertEqual(values['key-1999'], 1999)
+
+    def test_processes_are_summed(self):
+        """Test samples written by other processes are added together."""
+        metrics.CACHE_REQUESTS.inc(cache='token', result='hit')
+        child = multiprocessing.get_context('fork').Process(
+            target=increment_in_child)
+        child.start()
+        child.join()
+
+        self.assertEqual(child.exitcode, 0)
+        key = metrics.sample_key(
+            'cache_requests', '_total', {'cache': 'token', 'result': 'hit'})
+        self.assertEqual(metrics.collect()[key], 2)
+
+    def test_histogram_buckets(self):
+        """Test observations are counted in every bucket they fit."""
+        histogram = metrics.Histogram(
+            'test_histogram', 'Test histogram.', buckets=(1, 5, float('inf')))
+        self.addCleanup(metrics.REGISTRY.remove, histogram)
+        histogram.observe(3)
+        histogram.observe(7)
+
+        text = metrics.exposition()
+
+        self.assertIn('test_histogram_bucket{le="1.0"} 0.0', text)
+        self.assertIn('test_histogram_bucket{le="5.0"} 1.0', text)
+        self.assertIn('test_histogram_bucket{le="+Inf"} 2.0', text)
+        self.assertIn('test_histogram_count 2.0', text)
+        self.assertIn('test_histogram_sum 10.0', text)
+
+    def test_histogram_bound_inclusive(self):
+        """Test an observation equal to a bound is counted in its bucket."""
+        histogram = metrics.Histogram(
+            'test_histogram', 'Test histogram.', buckets=(1, 5, float('inf')))
+        self.addCleanup(metrics.REGISTRY.remove, histogram)
+        histogram.observe(5)
+
+        text = metrics.exposition()
+
+        self.assertIn('test_histogram_bucket{le="1.0"} 0.0', text)
+        self.assertIn('test_histogram_bucket{le="5.0"} 1.0', text)
+
+    def test_metric_requires_sample_keys(self):
+        """Test metrics must say how their samples are stored."""
+        with self.assertRaises(TypeError):
+            metrics.Metric('test_metric', 'Test metric.')
+
+    def test_sample_keys_built_once(self):
+        """Test the keys of a label set are serialized once."""
+        histogram = metrics.Histogram(
+            'test_histogram', 'Test histogram.', ['route'],
+            buckets=(1, 5, float('inf')))
+        self.addCleanup(metrics.REGISTRY.remove, histogram)
+        histogram.observe(3, route='a')
+
+        with mock.patch('core.metrics.sample_key') as sample_key:
+            histogram.observe(4, route='a')
+        self.assertFalse(sample_key.called)
+
+        histogram.observe(2, route='b')
+        text = metrics.exposition()
+        self.assertIn('test_histogram_count{route="a"} 2.0', text)
+        self.assertIn('test_histogram_bucket{le="5.0",route="b"} 1.0', text)
+
+
+class MetricsEndpointTests(MetricsTestCase):
+    """Test metrics collected from requests."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        create_inspection_report(self.user)
+
+    @override_settings(TOKEN_CACHE_ALIAS='default')
+    def test_request_and_auth_metrics(self):
+        """Test latency, queries and failures are exposed by route."""
+        self.client.post(TOKEN_URL, {
+            'email': 'user@example.com',
+            'password': 'wrong',
+        })
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+        self.client.get(REPORT_URL)
+        self.client.credentials()
+        self.client.force_authenticate(self.user)
+        self.client.get(REPORT_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        text = res.content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', text)
+        self.assertIn(
+            'http_request_duration_seconds_count{method="GET",'
+            'route="report:report-list",status="200"} 1.0', text)
+        self.assertIn(
+            'http_request_duration_seconds_count{method="POST",'
+            'route="user:token",status="400"} 1.0', text)
+        self.assertIn(
+            'http_request_db_queries_count{route="report:report-list"} 2.0',
+            text)
+        self.assertIn('db_query_duration_seconds_count', text)
+        self.assertIn('auth_failures_total{reason="credentials"} 1.0', text)
+        self.assertIn('auth_failures_total{reason="token"} 1.0', text)
+        self.assertIn(
+            'cache_requests_total{cache="token",result="miss"} 1.0', text)
+
+    def test_unknown_method_labelled_other(self):
+        """Test made up request methods share one series."""
+        self.client.force_authenticate(self.user)
+        self.client.generic('BREW', REPORT_URL)
+        self.client.generic('SPAM', REPORT_URL)
+
+        text = self.client.get(METRICS_URL).content.decode()
+
+        self.assertIn(
+            'http_request_duration_seconds_count{method="other",'
+            'route="report:report-list",status="405"} 2.0', text)
+        self.assertNotIn('BREW', text)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_scrape_token(self):
+        """Test a configured token is required to scrape."""
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, 401)
+
+        res = self.client.get(
+            METRICS_URL, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(res.status_code, 200)
+
+    @override_settings(METRICS_DIR=None)
+    def test_disabled(self):
+        """Test the endpoint is not found when metrics are disabled."""
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, 404)
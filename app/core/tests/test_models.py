@@ -3,6 +3,8 @@ Tests for models.
 """
 
 # from decimal import Decimal
+from unittest.mock import patch
+
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -72,6 +74,102 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(report), report.title)
 
+    def test_section_save_bumps_report_version(self):
+        """Test saving a report section increments the report version."""
+        user = get_user_model().objects.create_user(
+            'test@example.com',
+            'testpass123',
+        )
+        details = models.ReportDetails.objects.create(
+            user=user,
+            title='Sample Title',
+            r_id='Sample report details',
+            date=datetime.date.today(),
+            customer_fname='fname.',
+            customer_lname='lname',
+        )
+        roof = models.Roof.objects.create(report_uuid=details)
+        report = models.InspectionReport.objects.create(
+            user=user, report_details=details, roof=roof)
+
+        roof.flashing = 'Loose'
+        roof.save()
+        models.Bedrooms.objects.create(report_uuid=details, bedroom='Ok')
+        report.refresh_from_db()
+
+        self.assertEqual(report.version, 3)
+
+        report.save()
+
+        self.assertEqual(report.version, 4)
+
+    def test_sub_sections_share_section_table(self):
+        """Test sub-section proxies are stored as rows of one kind."""
+        user = get_user_model().objects.create_user(
+            'test@example.com',
+            'testpass123',
+        )
+        details = models.ReportDetails.objects.create(
+            user=user,
+            title='Sample Title',
+            r_id='Sample report details',
+            date=datetime.date.today(),
+            customer_fname='fname.',
+            customer_lname='lname',
+        )
+        models.ElectricalCoolingSystems.objects.create(report_uuid=details)
+        models.MainPanel.objects.create(report_uuid=details, main_panel='200A')
+        models.SubPanel.objects.create(report_uuid=details, sub_panel='60A')
+
+        self.assertEqual(
+            sorted(models.ElectricalCoolingSystems.objects.values_list(
+                'kind', flat=True)),
+            ['electricalcoolingsystems', 'mainpanel', 'subpanel'],
+        )
+        self.assertEqual(
+            [p.sub_panel for p in models.SubPanel.objects.all()], ['60A'])
+        self.assertEqual(models.MainPanel.objects.get().kind, 'mainpanel')
+        self.assertFalse(models.EvaporatorCoil.objects.exists())
+
+    def test_report_sub_section_properties(self):
+        """Test report properties return the sections of their kind."""
+        user = get_user_model().objects.create_user(
+            'test@example.com',
+            'testpass123',
+        )
+        details = models.ReportDetails.objects.create(
+            user=user,
+            title='Sample Title',
+            r_id='Sample report details',
+            date=datetime.date.today(),
+            customer_fname='fname.',
+            customer_lname='lname',
+        )
+        plumbing = models.WaterHeater.objects.create(
+            report_uuid=details, water_heater='Gas')
+        heating = models.HeatingSystem.objects.create(report_uuid=details)
+        models.Furnace.objects.create(report_uuid=details, furnace_unit='Gas')
+        report = models.InspectionReport.objects.create(
+            user=user, report_details=details, plumbing=plumbing,
+            heatingsystem=heating)
+
+        self.assertEqual(report.waterheater.water_heater, 'Gas')
+        self.assertIsNone(report.boiler)
+        self.assertEqual(
+            [f.furnace_unit for f in report.furnaces], ['Gas'])
+
+    @patch('core.models.uuid.uuid4')
+    def test_image_file_name_uuid(self, mock_uuid):
+        """Test generating logo and signature image paths."""
+        uuid = 'test-uuid'
+        mock_uuid.return_value = uuid
+
+        logo_path = models.logo_image_file_path(None, 'example.jpg')
+        signature_path = models.signature_image_file_path(None, 'sig.png')
+
+        self.assertEqual(logo_path, f'uploads/logo/{uuid}.jpg')
+        self.assertEqual(signature_path, f'uploads/signature/{uuid}.png')
+
     # @patch('core.models.uuid.uuid4')
     # def test_recipe_file_name_uuid(self, mock_uuid):
     #     """Test generating image path."""
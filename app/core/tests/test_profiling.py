@@ -0,0 +1,127 @@
+"""
+Tests for request profiling.
+"""
+import marshal
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import RequestProfile
+from report.tests.helpers import create_inspection_report, detail_url
+
+
+@override_settings(REQUEST_PROFILER=True)
+class ProfilerTests(TestCase):
+    """Test the profiler middleware."""
+
+    def setUp(self):
+        profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, profile_dir)
+        settings = override_settings(REQUEST_PROFILE_DIR=profile_dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.staff = get_user_model().objects.create_user(
+            'staff@example.com',
+            'testpass123',
+            is_staff=True,
+        )
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.report = create_inspection_report(self.staff)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token {}'.format(
+            Token.objects.create(user=self.staff).key))
+
+    def test_text(self):
+        """Test the slowest functions are returned as text."""
+        res = self.client.get(detail_url(self.report.id), {'profile': 'text'})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        self.assertContains(res, 'cumulative')
+        self.assertContains(res, 'to_representation')
+
+    def test_download(self):
+        """Test the profile is returned as a .prof file."""
+        res = self.client.get(
+            detail_url(self.report.id), HTTP_X_PROFILE='download')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('attachment', res['Content-Disposition'])
+        self.assertIsInstance(marshal.loads(res.content), dict)
+
+    def test_store(self):
+        """Test a stored profile is listed in the admin."""
+        res = self.client.get(detail_url(self.report.id), {'profile': 'store'})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()['id'], self.report.id)
+        profile = RequestProfile.objects.get(pk=res['X-Profile-Id'])
+        self.assertEqual(profile.user, self.staff)
+        self.assertEqual(profile.view, 'report:report-detail')
+        self.assertGreater(profile.queries, 0)
+
+        admin = Client()
+        admin.force_login(get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='testpass123',
+        ))
+        res = admin.get(reverse('admin:core_requestprofile_changelist'))
+        self.assertContains(res, profile.path)
+        res = admin.get(
+            reverse('admin:core_requestprofile_change', args=[profile.pk]))
+        self.assertContains(res, 'to_representation')
+        res = admin.get(
+            reverse('admin:core_requestprofile_download', args=[profile.pk]))
+        self.assertIsInstance(
+            marshal.loads(b''.join(res.streaming_content)), dict)
+
+    def test_download_requires_view_permission(self):
+        """Test staff need permission to view profiles to download them."""
+        res = self.client.get(detail_url(self.report.id), {'profile': 'store'})
+        url = reverse('admin:core_requestprofile_download',
+                      args=[res['X-Profile-Id']])
+        admin = Client()
+        admin.force_login(self.staff)
+
+        res = admin.get(url)
+        self.assertEqual(res.status_code, 403)
+
+        self.staff.user_permissions.add(
+            Permission.objects.get(codename='view_requestprofile'))
+        admin.force_login(get_user_model().objects.get(pk=self.staff.pk))
+        res = admin.get(url)
+        self.assertEqual(res.status_code, 200)
+        self.assertIsInstance(
+            marshal.loads(b''.join(res.streaming_content)), dict)
+
+    def test_not_staff(self):
+        """Test requests from other users are not profiled."""
+        report = create_inspection_report(self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token {}'.format(
+            Token.objects.create(user=self.user).key))
+
+        res = client.get(detail_url(report.id), {'profile': 'store'})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertNotIn('X-Profile-Id', res)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    @override_settings(REQUEST_PROFILER=False)
+    def test_disabled(self):
+        """Test nothing is profiled unless the profiler is enabled."""
+        res = self.client.get(detail_url(self.report.id), {'profile': 'text'})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()['id'], self.report.id)
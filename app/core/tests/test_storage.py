@@ -0,0 +1,97 @@
+"""
+Tests for content-addressed blob storage.
+"""
+import hashlib
+import os
+from datetime import timedelta
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.blobs import collect_garbage
+from core.derivatives import build_variants
+from core.models import Blob, Photos, PhotoVariant
+from core.storage import blob_storage
+from core.tests.helpers import TemporaryMediaMixin
+
+
+class BlobStorageTests(TemporaryMediaMixin, TestCase):
+    """Test storing and collecting blobs."""
+
+    def upload(self, content=b'photo', name='IMG_0001.JPG'):
+        """Save an upload on new photos and return them."""
+        photos = Photos()
+        photos.roof_photos.save(name, ContentFile(content))
+        return photos
+
+    def test_upload_stored_under_digest(self):
+        """Test uploads are named after the digest of their content."""
+        photos = self.upload()
+
+        digest = hashlib.sha256(b'photo').hexdigest()
+        self.assertEqual(photos.roof_photos.name,
+                         f'blobs/{digest[:2]}/{digest[2:4]}/{digest}.jpg')
+        with photos.roof_photos.open() as stored:
+            self.assertEqual(stored.read(), b'photo')
+
+    def test_same_content_stored_once(self):
+        """Test uploading the same content again reuses the blob."""
+        first = self.upload(name='a.jpg')
+        second = self.upload(name='b.jpg')
+        second.kitchen_photos.save('c.jpg', ContentFile(b'photo'))
+
+        self.assertEqual(first.roof_photos.name, second.roof_photos.name)
+        blob = Blob.objects.get()
+        self.assertEqual(blob.refcount, 3)
+        self.assertEqual(blob.size, 5)
+        blob_dir = os.path.dirname(blob_storage.path(blob.name))
+        self.assertEqual(len(os.listdir(blob_dir)), 1)
+        self.assertEqual(
+            os.listdir(blob_storage.path('blobs/tmp')), [])
+
+    def test_references_released(self):
+        """Test replacing and deleting files releases their blobs."""
+        photos = self.upload(b'old')
+        old_name = photos.roof_photos.name
+
+        photos = Photos.objects.get(pk=photos.pk)
+        photos.roof_photos.save('new.jpg', ContentFile(b'new'))
+
+        self.assertEqual(Blob.objects.get(name=old_name).refcount, 0)
+        self.assertEqual(
+            Blob.objects.get(name=photos.roof_photos.name).refcount, 1)
+
+        Photos.objects.filter(pk=photos.pk).delete()
+
+        self.assertFalse(Blob.objects.exclude(refcount=0).exists())
+
+    def test_collect_garbage(self):
+        """Test unreferenced blobs and their variants are collected."""
+        kept = self.upload(b'kept')
+        dropped = self.upload(b'dropped')
+        dropped_name = dropped.roof_photos.name
+        build_variants(workers=0)
+        dropped.delete()
+
+        self.assertEqual(collect_garbage(grace=timedelta(hours=1)), 0)
+
+        out = StringIO()
+        call_command('collect_blobs', grace=0, batch_size=1, stdout=out)
+
+        self.assertIn('Deleted 1 blobs.', out.getvalue())
+        self.assertEqual(
+            list(Blob.objects.values_list('name', flat=True)),
+            [kept.roof_photos.name])
+        self.assertFalse(blob_storage.exists(dropped_name))
+        self.assertTrue(blob_storage.exists(kept.roof_photos.name))
+        self.assertFalse(
+            PhotoVariant.objects.filter(source=dropped_name).exists())
+
+    def test_variants_shared_between_photos(self):
+        """Test photos with the same content share their variants."""
+        self.upload()
+        self.upload(name='copy.jpg')
+
+        self.assertEqual(PhotoVariant.objects.count(), 3)
@@ -0,0 +1,25 @@
+"""
+Views for the core app.
+"""
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+
+from core.metrics import exposition, metrics_dir
+
+
+@require_GET
+def metrics(request):
+    """Return the metrics of every process for a Prometheus scrape."""
+    if not metrics_dir():
+        raise Http404()
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token and not constant_time_compare(
+            request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+
+    return HttpResponse(
+        exposition(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
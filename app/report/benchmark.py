@@ -0,0 +1,200 @@
+"""
+HTTP load benchmark of the report and user APIs.
+"""
+import json
+import math
+import random
+import re
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.urls import reverse
+
+from report.seeding import fake_report_payload
+
+
+SCENARIOS = ['token', 'list', 'detail', 'create', 'patch']
+
+QUERIES_RE = re.compile(r'(?:^|,)\s*db;[^,]*desc="(\d+) queries"')
+
+
+class BenchmarkError(Exception):
+    """Raised when the server cannot be benchmarked."""
+
+
+def parse_queries(server_timing):
+    """Return the query count in a Server-Timing header, if sent.
+
+    The server sends it when REQUEST_METRICS is set.
+    """
+    match = QUERIES_RE.search(server_timing or '')
+    return int(match.group(1)) if match else None
+
+
+def percentile(values, percent):
+    """Return the nearest-rank percentile of sorted values."""
+    if not values:
+        return None
+    rank = max(math.ceil(percent / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+class ApiClient:
+    """Minimal JSON client for a running API server."""
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.token = None
+
+    def request(self, method, path, data=None, auth=True):
+        """Send a request, returning (status, seconds, queries, body)."""
+        headers = {'Accept': 'application/json'}
+        body = None
+        if data is not None:
+            body = json.dumps(data).encode()
+            headers['Content-Type'] = 'application/json'
+        if auth and self.token:
+            headers['Authorization'] = f'Token {self.token}'
+
+        request = Request(self.base_url + path, data=body, headers=headers,
+                          method=method)
+        start = time.perf_counter()
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                content = response.read()
+                status = response.status
+                timing = response.headers.get('Server-Timing')
+        except HTTPError as exc:
+            content = exc.read()
+            status = exc.code
+            timing = exc.headers.get('Server-Timing')
+        seconds = time.perf_counter() - start
+
+        return status, seconds, parse_queries(timing), content
+
+    def login(self, email, password):
+        """Obtain a token for the requests that follow."""
+        status, _, _, content = self.request(
+            'POST', reverse('user:token'),
+            {'email': email, 'password': password}, auth=False)
+        if status != 200:
+            raise BenchmarkError(
+                f'Could not log in as {email}: HTTP {status}.')
+        self.token = json.loads(content)['token']
+
+    def report_ids(self):
+        """Return the ids of the first page of the user's reports."""
+        status, _, _, content = self.request(
+            'GET', reverse('report:report-list'))
+        if status != 200:
+            raise BenchmarkError(f'Could not list reports: HTTP {status}.')
+        ids = [report['id'] for report in json.loads(content)['results']]
+        if not ids:
+            raise BenchmarkError(
+                'The user has no reports, run seed_reports first.')
+        return ids
+
+
+def scenario_requests(name, client, email, password, report_ids, seed):
+    """Return a callable sending one request of a scenario."""
+    ids = cycle(report_ids)
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def next_id():
+        with lock:
+            return next(ids)
+
+    def payload():
+        with lock:
+            return fake_report_payload(rng)
+
+    if name == 'token':
+        return lambda: client.request(
+            'POST', reverse('user:token'),
+            {'email': email, 'password': password}, auth=False)
+    if name == 'list':
+        return lambda: client.request('GET', reverse('report:report-list'))
+    if name == 'detail':
+        return lambda: client.request(
+            'GET', reverse('report:report-detail', args=[next_id()]))
+    if name == 'create':
+        return lambda: client.request(
+            'POST', reverse('report:report-list'), payload())
+    if name == 'patch':
+        return lambda: client.request(
+            'PATCH', reverse('report:report-detail', args=[next_id()]),
+            {'roof': payload()['roof']})
+
+    raise ValueError(f'Unknown scenario {name}.')
+
+
+def summarize(results, wall):
+    """Return the statistics of a scenario's (status, seconds, queries)."""
+    latencies = sorted(seconds * 1000 for _, seconds, _ in results)
+    queries = [count for _, _, count in results if count is not None]
+
+    def ms(value):
+        return round(value, 2) if value is not None else None
+
+    return {
+        'requests': len(results),
+        'errors': sum(1 for status, _, _ in results if status >= 400),
+        'throughput_rps': round(len(results) / wall, 2) if wall else None,
+        'latency_ms': {
+            'mean': ms(statistics.fmean(latencies) if latencies else None),
+            'p50': ms(percentile(latencies, 50)),
+            'p95': ms(percentile(latencies, 95)),
+            'p99': ms(percentile(latencies, 99)),
+            'max': ms(latencies[-1] if latencies else None),
+        },
+        'queries_per_request': (
+            round(statistics.fmean(queries), 2) if queries else None),
+    }
+
+
+def run_scenario(send, count, concurrency):
+    """Send `count` requests from `concurrency` threads and summarize."""
+    def timed(_):
+        status, seconds, queries, _ = send()
+        return status, seconds, queries
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(timed, range(count)))
+
+    return summarize(results, time.perf_counter() - start)
+
+
+def run_benchmark(base_url, email, password, scenarios=SCENARIOS,
+                  count=200, concurrency=8, warmup=10, seed=0):
+    """Benchmark scenarios against a running server, returning results.
+
+    Each scenario is warmed up with `warmup` unrecorded requests. The
+    result is plain JSON so runs against different versions can be
+    diffed.
+    """
+    client = ApiClient(base_url)
+    client.login(email, password)
+    report_ids = client.report_ids()
+
+    results = {}
+    for name in scenarios:
+        send = scenario_requests(
+            name, client, email, password, report_ids, seed)
+        for _ in range(warmup):
+            send()
+        results[name] = run_scenario(send, count, concurrency)
+
+    return {
+        'base_url': base_url,
+        'concurrency': concurrency,
+        'requests_per_scenario': count,
+        'scenarios': results,
+    }
@@ -0,0 +1,158 @@
+"""
+Bulk creation of inspection reports.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+
+from core.models import (
+    ReportDetails, Overview, Summary,
+    ReceiptInvoice, Grounds, Roof,
+    GarageCarport, Exterior, Kitchen,
+    Laundry, Basement, CrawlSpace,
+    Bathroom, Bedrooms, Interior, Plumbing,
+    WaterHeater, ElectricalCoolingSystems, MainPanel,
+    SubPanel, EvaporatorCoil, Boiler, Furnace,
+    HeatingSystem, DiningRoom, LivingRoom,
+    InspectionReport,
+)
+from report import layouts
+
+
+# Sections referenced by a foreign key on the report.
+REPORT_SECTIONS = {
+    'overview': Overview,
+    'summary': Summary,
+    'receipt_invoice': ReceiptInvoice,
+    'grounds': Grounds,
+    'roof': Roof,
+    'exterior': Exterior,
+    'garage': GarageCarport,
+    'kitchen': Kitchen,
+    'laundry': Laundry,
+    'bathroom': Bathroom,
+    'basement': Basement,
+    'crawlspace': CrawlSpace,
+    'electrical_cooling': ElectricalCoolingSystems,
+}
+
+# Sections referenced by a foreign key on the report, stored as the
+# sub-class kind of row when the sub-class data is present.
+SUBCLASS_SECTIONS = {
+    'plumbing': ('waterheater', Plumbing, WaterHeater),
+    'heatingsystem': ('boiler', HeatingSystem, Boiler),
+}
+
+# Sections stored against the report details only.
+DETAIL_SECTIONS = {
+    'bedrooms': Bedrooms,
+    'furnaces': Furnace,
+    'main_panels': MainPanel,
+    'sub_panels': SubPanel,
+    'evap_coils': EvaporatorCoil,
+    'living_rooms': LivingRoom,
+    'dining_rooms': DiningRoom,
+}
+
+
+def build_sections(details, data):
+    """Pop validated sections from report data into unsaved rows.
+
+    Returns the rows the report references by field name, and every
+    row.
+    """
+    sections = []
+
+    def add_section(model, values):
+        section = model(report_uuid=details, **values)
+        sections.append(section)
+        return section
+
+    related = {}
+    for name, model in REPORT_SECTIONS.items():
+        values = data.pop(name, None)
+        if values is not None:
+            related[name] = add_section(model, values)
+
+    for name, (subname, model, submodel) in SUBCLASS_SECTIONS.items():
+        values = data.pop(name, None)
+        subvalues = data.pop(subname, None)
+        if subvalues is not None:
+            related[name] = add_section(
+                submodel, {**(values or {}), **subvalues})
+        elif values is not None:
+            related[name] = add_section(model, values)
+
+    interior = data.pop('interior', None)
+    if interior is not None:
+        add_section(Interior, interior)
+
+    for name, model in DETAIL_SECTIONS.items():
+        for values in data.pop(name, None) or []:
+            add_section(model, values)
+
+    return related, sections
+
+
+def build_report(validated_data, section_fields=None):
+    """Return an unsaved report, its details and its section rows.
+
+    When the serializer's `section_fields` are given the sections are
+    kept in the report's findings document instead of rows.
+    """
+    data = dict(validated_data)
+    details = ReportDetails(user=data['user'], **data.pop('report_details'))
+    if section_fields is not None:
+        findings = layouts.findings_document(section_fields, details, data)
+        report = InspectionReport(
+            **data, report_details=details, findings=findings)
+        return report, details, []
+
+    related, sections = build_sections(details, data)
+    report = InspectionReport(**data, report_details=details, **related)
+
+    return report, details, sections
+
+
+def bulk_insert(objs):
+    """Insert model instances with one INSERT per table.
+
+    Sub-section proxies are inserted along with the other rows of their
+    section's table.
+    """
+    tables = defaultdict(list)
+    for obj in objs:
+        tables[type(obj)._meta.concrete_model].append(obj)
+
+    for model, rows in tables.items():
+        model.objects.bulk_create(rows)
+
+
+def create_reports(validated_reports, layout=None):
+    """Create reports with all their sections in one transaction.
+
+    The number of INSERTs depends on the section tables involved, not
+    on the number of reports or of rows per section. In the document
+    layout only the report details and report rows are inserted. The
+    search rows of the reports are inserted with them.
+    """
+    # The serializers create reports through this module.
+    from report.search import built_report_search
+    from report.serializers import InspectionReportSerializer
+
+    serializer = InspectionReportSerializer()
+    section_fields = None
+    if (layout or layouts.default_layout()) == layouts.DOCUMENT:
+        section_fields = serializer.section_fields()
+
+    built = [build_report(data, section_fields) for data in validated_reports]
+    with transaction.atomic():
+        bulk_insert([details for _, details, _ in built])
+        bulk_insert([row for _, _, sections in built for row in sections])
+        bulk_insert([report for report, _, _ in built])
+        bulk_insert([
+            built_report_search(serializer, report, data)
+            for (report, _, _), data in zip(built, validated_reports)
+        ])
+
+    return [report for report, _, _ in built]
@@ -0,0 +1,121 @@
+"""
+Conversion of reports between the table and document layouts.
+"""
+from django.db import transaction
+from django.db.models import F
+from rest_framework.exceptions import ValidationError
+
+from core.models import InspectionReport, Interior
+from report import bulk
+from report.layouts import DOCUMENT, TABLES
+from report.planner import plan_report_queryset
+from report.serializers import InspectionReportSerializer
+
+
+# Foreign keys of the report to its section rows.
+SECTION_FOREIGN_KEYS = [*bulk.REPORT_SECTIONS, *bulk.SUBCLASS_SECTIONS]
+
+# Tables holding section rows, all keyed by the report details.
+SECTION_TABLES = sorted({
+    model._meta.concrete_model
+    for model in [
+        *bulk.REPORT_SECTIONS.values(),
+        *[model for _, model, _ in bulk.SUBCLASS_SECTIONS.values()],
+        Interior,
+        *bulk.DETAIL_SECTIONS.values(),
+    ]
+}, key=lambda model: model._meta.db_table)
+
+
+def save_converted(reports):
+    """Save the layout of converted reports, bumping their version once."""
+    for report in reports:
+        report.version = F('version') + 1
+    InspectionReport.objects.bulk_update(
+        reports, ['findings', 'version', *SECTION_FOREIGN_KEYS])
+
+
+def to_document(reports):
+    """Move the sections of reports from their tables into documents.
+
+    Returns the reports converted, which is all of them.
+    """
+    fields = InspectionReportSerializer().section_fields()
+    serializer = InspectionReportSerializer(fields=list(fields))
+    for report in reports:
+        report.findings = serializer.to_representation(report)
+        for name in SECTION_FOREIGN_KEYS:
+            setattr(report, name, None)
+
+    save_converted(reports)
+    # The rows are deleted without signals, which would bump the version
+    # of the reports once per row.
+    details = [report.report_details_id for report in reports]
+    for model in SECTION_TABLES:
+        rows = model.objects.filter(report_uuid__in=details)
+        rows._raw_delete(rows.db)
+
+    return reports
+
+
+def to_tables(reports):
+    """Move the sections of reports from their documents into tables.
+
+    Sections are validated by their serializers again, and reports
+    with invalid sections are left in the document layout. Returns the
+    reports converted.
+    """
+    fields = InspectionReportSerializer().section_fields()
+    converted = []
+    rows = []
+    for report in reports:
+        try:
+            data = {
+                field.source: field.run_validation(report.findings[name])
+                for name, field in fields.items()
+                if report.findings.get(name) is not None
+            }
+        except ValidationError:
+            continue
+        related, sections = bulk.build_sections(report.report_details, data)
+        converted.append((report, related))
+        rows.extend(sections)
+
+    bulk.bulk_insert(rows)
+    for report, related in converted:
+        for name, section in related.items():
+            setattr(report, name, section)
+        report.findings = None
+    reports = [report for report, _ in converted]
+    save_converted(reports)
+
+    return reports
+
+
+def convert_reports(layout, batch_size=100):
+    """Store the sections of every report in a layout.
+
+    Reports are converted `batch_size` at a time, each batch locked and
+    moved in its own transaction, so reports can be used meanwhile.
+    Returns the number of reports converted and of reports skipped.
+    """
+    source = TABLES if layout == DOCUMENT else DOCUMENT
+    convert = to_document if layout == DOCUMENT else to_tables
+    pending = InspectionReport.objects.filter(
+        findings__isnull=layout == DOCUMENT).order_by('pk')
+
+    converted = skipped = 0
+    last = 0
+    while True:
+        with transaction.atomic():
+            batch = list(plan_report_queryset(
+                pending.filter(pk__gt=last), layout=source,
+            ).select_for_update(of=['self'])[:batch_size])
+            if not batch:
+                break
+            count = len(convert(batch))
+        converted += count
+        skipped += len(batch) - count
+        last = batch[-1].pk
+
+    return converted, skipped
@@ -0,0 +1,164 @@
+"""
+HTML and PDF documents of inspection reports.
+"""
+import hashlib
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.template.loader import get_template
+
+from core.metrics import count_cache
+from core.models import InspectionReport
+from report.planner import plan_report_queryset
+from report.serializers import InspectionReportSerializer
+
+# PDF output needs WeasyPrint, which is optional.
+try:
+    import weasyprint
+except ImportError:
+    weasyprint = None
+
+
+# Bump when section.html changes so cached fragments are not reused.
+FRAGMENT_VERSION = 1
+
+HIDDEN_FIELDS = {'id', 'report_uuid', 'user'}
+
+
+def document_formats():
+    """Return the document formats that can be rendered here."""
+    return ['html', 'pdf'] if weasyprint is not None else ['html']
+
+
+def fragment_cache():
+    """Return the cache holding rendered section fragments."""
+    alias = getattr(settings, 'REPORT_FRAGMENT_CACHE_ALIAS', 'default')
+    return caches[alias]
+
+
+def section_tables(data):
+    """Return the labelled, non-empty values of a section's rows."""
+    rows = data if isinstance(data, list) else [data]
+    tables = []
+    for row in rows:
+        table = [
+            (field.replace('_', ' ').capitalize(), value)
+            for field, value in row.items()
+            if field not in HIDDEN_FIELDS and value not in (None, '')
+        ]
+        if table:
+            tables.append(table)
+
+    return tables
+
+
+def fragment_key(name, data):
+    """Return the cache key of a section fragment.
+
+    Sections have no version column of their own, so the key carries a
+    digest of the section's data: it changes exactly when a value shown
+    in the fragment does.
+    """
+    digest = hashlib.sha1(json.dumps(
+        data, cls=DjangoJSONEncoder, sort_keys=True).encode()).hexdigest()
+    return f'report-fragment:{FRAGMENT_VERSION}:{name}:{digest}'
+
+
+def render_section(name, data):
+    """Render the HTML fragment of one section."""
+    return get_template('report/section.html').render({
+        'name': name,
+        'label': name.replace('_', ' ').title(),
+        'tables': section_tables(data),
+    })
+
+
+def render_html(report, serializer=None):
+    """Render the HTML document of a report.
+
+    Fragments of sections whose data did not change are read from the
+    cache in one round trip, so an edit re-renders only its section.
+    Reports rendered together can share one `serializer`.
+    """
+    if serializer is None:
+        serializer = InspectionReportSerializer()
+    data = serializer.to_representation(report)
+    sections = {
+        name: value for name, value in data.items()
+        if isinstance(value, (dict, list)) and value
+        and name != 'report_details'
+    }
+    keys = {name: fragment_key(name, value)
+            for name, value in sections.items()}
+    cache = fragment_cache()
+    cached = cache.get_many(keys.values())
+
+    fragments = []
+    missing = {}
+    for name, value in sections.items():
+        fragment = cached.get(keys[name])
+        if fragment is None:
+            fragment = render_section(name, value)
+            missing[keys[name]] = fragment
+        fragments.append(fragment)
+    count_cache('fragment', hits=len(fragments) - len(missing),
+                misses=len(missing))
+    if missing:
+        cache.set_many(missing)
+
+    return get_template('report/document.html').render({
+        'details': data.get('report_details') or {},
+        'fragments': fragments,
+    })
+
+
+def render_document(report, document_format='html', serializer=None):
+    """Render a report document as bytes in the given format."""
+    html = render_html(report, serializer)
+    if document_format == 'pdf':
+        return weasyprint.HTML(string=html).write_pdf()
+    return html.encode()
+
+
+def render_batch(report_ids, document_format='html'):
+    """Render the documents of reports, returning them by report id."""
+    reports = plan_report_queryset(
+        InspectionReport.objects.filter(pk__in=report_ids).order_by('pk'))
+    serializer = InspectionReportSerializer()
+    return {
+        report.pk: render_document(report, document_format, serializer)
+        for report in reports
+    }
+
+
+def render_documents(report_ids, document_format='html', workers=None,
+                     batch_size=20):
+    """Yield (report id, document) for reports, rendered in batches.
+
+    Batches are rendered across a pool of `workers` forked processes,
+    or in this process when `workers` is 0. Connections are closed
+    before forking so each worker opens its own.
+    """
+    report_ids = list(report_ids)
+    batches = [
+        report_ids[i:i + batch_size]
+        for i in range(0, len(report_ids), batch_size)
+    ]
+    if workers == 0:
+        for batch in batches:
+            yield from render_batch(batch, document_format).items()
+        return
+
+    connections.close_all()
+    with ProcessPoolExecutor(
+        workers, mp_context=multiprocessing.get_context('fork'),
+    ) as pool:
+        for documents in pool.map(render_batch, batches,
+                                  repeat(document_format)):
+            yield from documents.items()
@@ -0,0 +1,96 @@
+"""
+Streaming export of reports to NDJSON and CSV.
+"""
+import csv
+
+from rest_framework import serializers as drf_serializers
+from rest_framework.renderers import JSONRenderer
+
+from report.planner import plan_report_queryset
+from report.serializers import InspectionReportSerializer
+
+
+EXPORT_FORMATS = ['ndjson', 'csv']
+
+
+class Echo:
+    """File-like object returning what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def export_reports(queryset, chunk_size=500):
+    """Yield the representation of every report in the queryset.
+
+    Reports are read through a server-side cursor `chunk_size` rows at a
+    time, with the sections of each chunk prefetched together, and
+    rendered by one serializer.
+    """
+    serializer = InspectionReportSerializer()
+    reports = plan_report_queryset(queryset.order_by('pk')).iterator(
+        chunk_size=chunk_size)
+    for report in reports:
+        yield serializer.to_representation(report)
+
+
+def ndjson_lines(records):
+    """Yield each record as a line of JSON."""
+    renderer = JSONRenderer()
+    for record in records:
+        yield renderer.render(record).decode() + '\n'
+
+
+def csv_columns():
+    """Return the flattened CSV columns of a report."""
+    columns = []
+    for name, field in InspectionReportSerializer().fields.items():
+        if isinstance(field, drf_serializers.ListSerializer):
+            field = field.child
+        if isinstance(field, drf_serializers.Serializer):
+            columns.extend(f'{name}.{child}' for child in field.fields)
+        else:
+            columns.append(name)
+
+    return columns
+
+
+def flatten(record):
+    """Flatten a report into `section.field` keys.
+
+    Values of sections with many rows are joined with newlines.
+    """
+    flat = {}
+    for name, value in record.items():
+        if isinstance(value, dict):
+            for child, child_value in value.items():
+                flat[f'{name}.{child}'] = child_value
+        elif isinstance(value, list):
+            for row in value:
+                for child, child_value in row.items():
+                    if child_value is None:
+                        continue
+                    key = f'{name}.{child}'
+                    flat[key] = '\n'.join(
+                        filter(None, [flat.get(key), str(child_value)]))
+        else:
+            flat[name] = value
+
+    return flat
+
+
+def csv_lines(records):
+    """Yield the CSV header and a flattened row for each record."""
+    columns = csv_columns()
+    writer = csv.DictWriter(Echo(), fieldnames=columns, extrasaction='ignore')
+    yield writer.writerow(dict(zip(columns, columns)))
+    for record in records:
+        yield writer.writerow(flatten(record))
+
+
+def export_lines(queryset, export_format='ndjson', chunk_size=500):
+    """Yield the lines of an export in the given format."""
+    records = export_reports(queryset, chunk_size)
+    if export_format == 'csv':
+        return csv_lines(records)
+    return ndjson_lines(records)
@@ -0,0 +1,85 @@
+"""
+Import of reports from newline-delimited JSON.
+"""
+import json
+import logging
+
+from django.db import DatabaseError
+
+from report.bulk import create_reports
+from report.serializers import InspectionReportSerializer
+
+
+logger = logging.getLogger(__name__)
+
+# Database errors are logged, not returned, as they can quote stored data.
+SAVE_ERROR = 'The report could not be saved.'
+
+
+def _create_chunk(chunk):
+    """Create a chunk of validated reports, yielding a result per line.
+
+    A chunk the database rejects is created again one report at a time,
+    so only the lines failing on their own are reported.
+    """
+    try:
+        reports = create_reports([data for _, data in chunk])
+    except DatabaseError:
+        if len(chunk) > 1:
+            for line in chunk:
+                yield from _create_chunk([line])
+            return
+        number = chunk[0][0]
+        logger.exception('Importing line %d failed.', number)
+        yield {'line': number, 'status': 'error',
+               'errors': {'non_field_errors': [SAVE_ERROR]}}
+        return
+
+    for (number, _), report in zip(chunk, reports):
+        yield {'line': number, 'status': 'created', 'id': report.id}
+
+
+def import_reports(lines, user, chunk_size=100):
+    """Create reports from NDJSON lines, yielding a result per line.
+
+    Lines are read one at a time and valid records are inserted every
+    `chunk_size` lines in their own transaction, so memory use does not
+    depend on the size of the input.
+    """
+    chunk = []
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield {'line': number, 'status': 'error',
+                   'errors': {'non_field_errors': [str(exc)]}}
+            continue
+
+        serializer = InspectionReportSerializer(data=record)
+        if not serializer.is_valid():
+            yield {'line': number, 'status': 'error',
+                   'errors': serializer.errors}
+            continue
+
+        chunk.append((number, {**serializer.validated_data, 'user': user}))
+        if len(chunk) >= chunk_size:
+            yield from _create_chunk(chunk)
+            chunk = []
+
+    if chunk:
+        yield from _create_chunk(chunk)
+
+
+def with_summary(results):
+    """Pass results through, followed by the created and failed counts."""
+    summary = {'created': 0, 'failed': 0}
+    for result in results:
+        if result['status'] == 'created':
+            summary['created'] += 1
+        else:
+            summary['failed'] += 1
+        yield result
+
+    yield {'summary': summary}
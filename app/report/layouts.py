@@ -0,0 +1,39 @@
+"""
+Layouts storing the sections of inspection reports.
+"""
+from django.conf import settings
+from rest_framework import serializers
+
+
+# 'tables' stores each section in its own table, 'document' stores every
+# section of a report in the findings JSONB column of the report row.
+TABLES = 'tables'
+DOCUMENT = 'document'
+LAYOUTS = [TABLES, DOCUMENT]
+
+
+def default_layout():
+    """Return the layout new reports are stored in."""
+    return getattr(settings, 'REPORT_SECTION_LAYOUT', TABLES)
+
+
+def findings_document(section_fields, details, data):
+    """Pop validated sections from report data into a findings document.
+
+    Each section is rendered by its serializer from unsaved rows, as it
+    would be once stored in its table.
+    """
+    findings = {}
+    for name, field in section_fields.items():
+        values = data.pop(field.source, None)
+        if isinstance(field, serializers.ListSerializer):
+            model = field.child.Meta.model
+            findings[name] = field.to_representation([
+                model(report_uuid=details, **row) for row in values or []])
+        elif values is not None:
+            findings[name] = field.to_representation(
+                field.Meta.model(report_uuid=details, **values))
+        else:
+            findings[name] = None
+
+    return findings
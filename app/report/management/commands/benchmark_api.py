@@ -0,0 +1,92 @@
+"""
+Django command to benchmark the API of a running server.
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from report.benchmark import SCENARIOS, BenchmarkError, run_benchmark
+from report.seeding import seed_user_email
+
+
+class Command(BaseCommand):
+    """Django command to load test the report and user endpoints.
+
+    Query counts are read from the Server-Timing header, so start the
+    server with REQUEST_METRICS=1 to record them.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url',
+            default='http://127.0.0.1:8000',
+            help='URL of the server to benchmark.',
+        )
+        parser.add_argument(
+            '--email',
+            default=seed_user_email(0),
+            help='User to authenticate as, one created by seed_reports.',
+        )
+        parser.add_argument(
+            '--password',
+            default='benchmark123',
+            help='Password of the user.',
+        )
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=SCENARIOS,
+            dest='scenarios',
+            help='Scenario to run, may be repeated; all by default.',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Requests sent per scenario.',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=8,
+            help='Requests in flight at once.',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=10,
+            help='Unrecorded requests sent before each scenario.',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed for created and patched data.',
+        )
+        parser.add_argument(
+            '--output',
+            help='File to write the JSON results to; stdout by default.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            results = run_benchmark(
+                options['base_url'],
+                options['email'],
+                options['password'],
+                scenarios=options['scenarios'] or SCENARIOS,
+                count=options['requests'],
+                concurrency=options['concurrency'],
+                warmup=options['warmup'],
+                seed=options['seed'],
+            )
+        except (BenchmarkError, OSError) as exc:
+            raise CommandError(str(exc))
+
+        output = json.dumps(results, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        else:
+            self.stdout.write(output)
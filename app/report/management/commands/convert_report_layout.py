@@ -0,0 +1,36 @@
+"""
+Django command to move report sections between storage layouts.
+"""
+from django.core.management.base import BaseCommand
+
+from report.conversion import convert_reports
+from report.layouts import LAYOUTS
+
+
+class Command(BaseCommand):
+    """Django command to store every report's sections in a layout."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'layout',
+            choices=LAYOUTS,
+            help='Store sections in tables or in one document per report.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Number of reports converted per transaction.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        converted, skipped = convert_reports(
+            options['layout'], options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Converted {converted} reports to the {options["layout"]} '
+            f'layout.'))
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f'Skipped {skipped} reports with invalid sections.'))
@@ -0,0 +1,27 @@
+"""
+Django command to discard abandoned photo uploads.
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from report.uploads import expire_uploads
+
+
+class Command(BaseCommand):
+    """Django command to remove uploads not resumed in time."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age',
+            type=int,
+            default=24 * 3600,
+            help='Seconds since the last chunk before an upload expires.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        expired = expire_uploads(timedelta(seconds=options['max_age']))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Discarded {expired} uploads.'))
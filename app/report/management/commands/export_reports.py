@@ -0,0 +1,55 @@
+"""
+Django command to export reports to NDJSON or CSV.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import InspectionReport
+from report.exports import EXPORT_FORMATS, export_lines
+
+
+class Command(BaseCommand):
+    """Django command to export reports with all sections."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='File to write the export to, or - for stdout.',
+        )
+        parser.add_argument(
+            '--user',
+            help='Email of the user to export; every user by default.',
+        )
+        parser.add_argument(
+            '--format',
+            choices=EXPORT_FORMATS,
+            default='ndjson',
+            help='Export as NDJSON or flattened CSV.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of reports read per database round trip.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        queryset = InspectionReport.objects.all()
+        if options['user']:
+            try:
+                user = get_user_model().objects.get(email=options['user'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(
+                    f'User {options["user"]} does not exist.')
+            queryset = queryset.filter(user=user)
+
+        lines = export_lines(
+            queryset, options['format'], options['chunk_size'])
+        if options['path'] == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+        else:
+            with open(options['path'], 'w', encoding='utf-8',
+                      newline='') as output:
+                output.writelines(lines)
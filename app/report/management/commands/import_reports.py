@@ -0,0 +1,56 @@
+"""
+Django command to import reports from newline-delimited JSON.
+"""
+import json
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from report.imports import import_reports, with_summary
+
+
+class Command(BaseCommand):
+    """Django command to import reports for a user."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='NDJSON file to import, or - to read from stdin.',
+        )
+        parser.add_argument(
+            '--user',
+            required=True,
+            help='Email of the user the reports belong to.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=100,
+            help='Number of reports inserted per transaction.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'User {options["user"]} does not exist.')
+
+        if options['path'] == '-':
+            self._import(sys.stdin, user, options['chunk_size'])
+        else:
+            with open(options['path'], encoding='utf-8') as lines:
+                self._import(lines, user, options['chunk_size'])
+
+    def _import(self, lines, user, chunk_size):
+        """Import the lines, reporting failures and the final summary."""
+        results = with_summary(import_reports(lines, user, chunk_size))
+        for result in results:
+            if 'summary' in result:
+                summary = result['summary']
+                self.stdout.write(self.style.SUCCESS(
+                    f'Created {summary["created"]} reports, '
+                    f'{summary["failed"]} failed.'))
+            elif result['status'] != 'created':
+                self.stderr.write(json.dumps(result))
@@ -0,0 +1,40 @@
+"""
+Django command to rebuild the search rows of reports.
+"""
+from django.core.management.base import BaseCommand
+
+from core.models import InspectionReport
+from report.search import reindex_reports
+
+
+class Command(BaseCommand):
+    """Django command to index every report for full-text search."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--missing',
+            action='store_true',
+            help='Index only reports without a search row.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Number of reports indexed per query batch.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        queryset = InspectionReport.objects.order_by('pk')
+        if options['missing']:
+            queryset = queryset.filter(search__isnull=True)
+
+        batch_size = options['batch_size']
+        ids = list(queryset.values_list('pk', flat=True))
+        count = 0
+        for start in range(0, len(ids), batch_size):
+            count += reindex_reports(InspectionReport.objects.filter(
+                pk__in=ids[start:start + batch_size]))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {count} reports for search.'))
@@ -0,0 +1,73 @@
+"""
+Django command to render report documents in batches.
+"""
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import InspectionReport
+from report.documents import document_formats, render_documents
+
+
+class Command(BaseCommand):
+    """Django command to render HTML or PDF documents of reports."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output_dir',
+            help='Directory to write report-<id>.<format> files to.',
+        )
+        parser.add_argument(
+            '--user',
+            help='Email of the user to render; every user by default.',
+        )
+        parser.add_argument(
+            '--format',
+            choices=['html', 'pdf'],
+            default='html',
+            help='Render as HTML or PDF.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Rendering processes, 0 to render in this process.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=20,
+            help='Number of reports loaded and rendered per task.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if options['format'] not in document_formats():
+            raise CommandError(
+                f'Rendering {options["format"]} needs WeasyPrint.')
+
+        queryset = InspectionReport.objects.all()
+        if options['user']:
+            try:
+                user = get_user_model().objects.get(email=options['user'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(
+                    f'User {options["user"]} does not exist.')
+            queryset = queryset.filter(user=user)
+
+        os.makedirs(options['output_dir'], exist_ok=True)
+        report_ids = queryset.order_by('pk').values_list('pk', flat=True)
+        rendered = 0
+        for report_id, content in render_documents(
+                report_ids, options['format'], options['workers'],
+                options['batch_size']):
+            path = os.path.join(
+                options['output_dir'],
+                f'report-{report_id}.{options["format"]}')
+            with open(path, 'wb') as output:
+                output.write(content)
+            rendered += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {rendered} reports.'))
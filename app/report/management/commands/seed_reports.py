@@ -0,0 +1,62 @@
+"""
+Django command to create synthetic users and reports.
+"""
+from django.core.management.base import BaseCommand
+
+from report.seeding import seed_reports, seed_user_email
+
+
+class Command(BaseCommand):
+    """Django command to seed the database for load testing."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=10,
+            help='Number of users to create.',
+        )
+        parser.add_argument(
+            '--reports',
+            type=int,
+            default=100,
+            help='Number of fully populated reports per user.',
+        )
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=2,
+            help='Rows in each section holding many rows, e.g. bedrooms.',
+        )
+        parser.add_argument(
+            '--password',
+            default='benchmark123',
+            help='Password of every created user.',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=None,
+            help='Random seed, for repeatable data.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Number of reports inserted per transaction.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        users, reports = seed_reports(
+            options['users'],
+            options['reports'],
+            options['password'],
+            rows=options['rows'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {users} users and {reports} reports. '
+            f'Users log in as {seed_user_email("<n>")}.'))
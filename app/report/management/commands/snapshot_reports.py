@@ -0,0 +1,48 @@
+"""
+Django command to warm or rebuild rendered report snapshots.
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from core.models import InspectionReport
+from report.planner import plan_report_queryset
+from report.snapshots import save_snapshots
+
+
+class Command(BaseCommand):
+    """Django command to render report snapshots in bulk."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Re-render every report, not only stale ones.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=100,
+            help='Number of reports rendered per query batch.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        queryset = InspectionReport.objects.order_by('pk')
+        if not options['rebuild']:
+            queryset = queryset.exclude(snapshot__version=F('version'))
+
+        chunk_size = options['chunk_size']
+        chunk = []
+        count = 0
+        reports = plan_report_queryset(queryset).iterator(
+            chunk_size=chunk_size)
+        for report in reports:
+            chunk.append(report)
+            if len(chunk) == chunk_size:
+                count += len(save_snapshots(chunk))
+                chunk = []
+        if chunk:
+            count += len(save_snapshots(chunk))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {count} report snapshots.'))
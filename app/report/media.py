@@ -0,0 +1,151 @@
+"""
+Authenticated serving of report media.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from core.models import Photos, PhotoVariant, ReportPhoto
+from core.storage import blob_storage
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+COPY_BUFFER_SIZE = 64 * 1024
+
+PHOTO_FIELDS = [
+    field.name for field in Photos._meta.concrete_fields
+    if field.get_internal_type() == 'FileField'
+]
+
+
+def is_safe_name(name):
+    """Return whether a media name stays inside the media root."""
+    return bool(name) and os.path.normpath(name) == name \
+        and not name.startswith(('/', '..'))
+
+
+def user_can_access(user, name):
+    """Return whether one of the user's reports holds a media file.
+
+    Variants are allowed when the photo they were built from is.
+    """
+    sources = Q(image=name) | Q(image__in=PhotoVariant.objects.filter(
+        image=name).values('source'))
+    if ReportPhoto.objects.filter(sources, report__user=user).exists():
+        return True
+
+    names = [name, *PhotoVariant.objects.filter(
+        image=name).values_list('source', flat=True)]
+    legacy = Q()
+    for field in PHOTO_FIELDS:
+        legacy |= Q(**{f'{field}__in': names})
+    return Photos.objects.filter(legacy).filter(
+        Q(report_uuid__user=user) | Q(inspectionreport__user=user)
+    ).exists()
+
+
+def parse_range(header, size):
+    """Return the (start, end) of a single byte range, or None.
+
+    Returns False when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        return False
+
+    return start, end
+
+
+def read_range(path, start, length):
+    """Yield `length` bytes of a file from `start`."""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(COPY_BUFFER_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def serve(request, name):
+    """Return a response for a media file.
+
+    Conditional requests are answered here. The bytes are sent by the
+    front server when MEDIA_SENDFILE is set, which then also handles
+    Range requests, otherwise they are streamed with Range support.
+    """
+    path = blob_storage.path(name)
+    stat = os.stat(path)
+    etag = quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+
+    if response is None:
+        content_type = mimetypes.guess_type(name)[0] \
+            or 'application/octet-stream'
+        sendfile = getattr(settings, 'MEDIA_SENDFILE', None)
+        if sendfile == 'nginx':
+            response = HttpResponse(content_type=content_type)
+            response.headers['X-Accel-Redirect'] = \
+                settings.MEDIA_ACCEL_PREFIX + quote(name)
+        elif sendfile == 'sendfile':
+            response = HttpResponse(content_type=content_type)
+            response.headers['X-Sendfile'] = path
+        else:
+            response = stream_file(request, path, stat.st_size, etag,
+                                   content_type)
+
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(last_modified)
+    response.headers['Accept-Ranges'] = 'bytes'
+    if name.startswith(blob_storage.location_prefix + '/'):
+        response.headers['Cache-Control'] = \
+            'private, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = 'private, no-cache'
+
+    return response
+
+
+def stream_file(request, path, size, etag, content_type):
+    """Stream a file or the byte range requested of it."""
+    byte_range = None
+    if 'Range' in request.headers and \
+            request.headers.get('If-Range', etag) == etag:
+        byte_range = parse_range(request.headers['Range'], size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response.headers['Content-Range'] = f'bytes */{size}'
+        return response
+
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1
+    response = StreamingHttpResponse(
+        read_range(path, start, length) if request.method != 'HEAD' else [],
+        content_type=content_type,
+        status=206 if byte_range else 200,
+    )
+    response.headers['Content-Length'] = str(length)
+    if byte_range:
+        response.headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    return response
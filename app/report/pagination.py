@@ -0,0 +1,29 @@
+"""
+Pagination for report API.
+"""
+from rest_framework.pagination import (
+    CursorPagination,
+    LimitOffsetPagination,
+)
+
+
+class ReportCursorPagination(CursorPagination):
+    """Keyset pagination over a user's reports, newest first.
+
+    Pages are fetched with `id < cursor` against the (user, -id) index,
+    so every page costs the same as the first.
+    """
+    ordering = '-id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class ReportSearchPagination(LimitOffsetPagination):
+    """Pages of search results, best match first.
+
+    Results are ordered by rank rather than id, so they are paged by
+    offset.
+    """
+    default_limit = 20
+    max_limit = 100
@@ -0,0 +1,80 @@
+"""
+Query planning for the report API.
+"""
+from report.layouts import DOCUMENT, default_layout
+
+
+# Related objects joined into the report query for each serializer field.
+SECTION_JOINS = {
+    'report_details': ['report_details'],
+    'overview': ['overview'],
+    'summary': ['summary'],
+    'receipt_invoice': ['receipt_invoice'],
+    'grounds': ['grounds'],
+    'roof': ['roof'],
+    'exterior': ['exterior'],
+    'garage': ['garage'],
+    'kitchen': ['kitchen'],
+    'laundry': ['laundry'],
+    'bathroom': ['bathroom'],
+    'bedrooms': ['report_details'],
+    'interior': ['report_details'],
+    'basement': ['basement'],
+    'crawlspace': ['crawlspace'],
+    'plumbing': ['plumbing'],
+    'waterheater': ['plumbing'],
+    'heatingsystem': ['heatingsystem'],
+    'furnace': ['report_details'],
+    'boiler': ['heatingsystem'],
+    'electricalcoolingsystems': ['electrical_cooling'],
+    'main_panel': ['report_details'],
+    'sub_panel': ['report_details'],
+    'evap_coil': ['report_details'],
+    'living_room': ['report_details'],
+    'dining_room': ['report_details'],
+    'title': ['report_details'],
+    'r_id': ['report_details'],
+    'date': ['report_details'],
+    'customer_fname': ['report_details'],
+    'customer_lname': ['report_details'],
+}
+
+# Sections stored against the report details, loaded one query per lookup.
+# Sub-sections share their section's table, so one lookup loads them all.
+SECTION_PREFETCHES = {
+    'bedrooms': ['report_details__bedrooms_set'],
+    'interior': ['report_details__interior_set'],
+    'furnace': ['report_details__heatingsystem_set'],
+    'main_panel': ['report_details__electricalcoolingsystems_set'],
+    'sub_panel': ['report_details__electricalcoolingsystems_set'],
+    'evap_coil': ['report_details__electricalcoolingsystems_set'],
+    'living_room': ['report_details__livingroom_set'],
+    'dining_room': ['report_details__diningroom_set'],
+}
+
+
+def plan_report_queryset(queryset, sections=None, layout=None):
+    """Load report sections in a fixed number of queries.
+
+    Single sections are joined into the report query and sections
+    stored against the report details are prefetched in bulk, so the
+    query count does not grow with the number of reports. Passing the
+    serializer fields in `sections` skips the work for everything else.
+
+    In the document layout the sections are read with the report row,
+    so only the report details are joined. Reports still stored in
+    tables then load their sections one query at a time.
+    """
+    if sections is None:
+        sections = SECTION_JOINS
+    joins = set()
+    prefetches = set()
+    for section in sections:
+        joins.update(SECTION_JOINS.get(section, []))
+        prefetches.update(SECTION_PREFETCHES.get(section, []))
+    if (layout or default_layout()) == DOCUMENT:
+        joins &= {'report_details'}
+        prefetches = set()
+
+    return queryset.select_related(*sorted(joins)).prefetch_related(
+        *sorted(prefetches))
@@ -0,0 +1,195 @@
+"""
+Full-text search over the findings of inspection reports.
+"""
+import threading
+from collections import defaultdict
+
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db import transaction
+from django.db.models import F, Value
+from rest_framework import serializers
+
+from core.models import InspectionReport, ReportSearch
+from report.layouts import findings_document
+from report.planner import plan_report_queryset
+from report.serializers import InspectionReportSerializer
+
+
+CONFIG = 'english'
+
+# Findings of these sections rank above those of the rest, which have
+# weight C.
+WEIGHTS = {'summary': 'A', 'report_details': 'B'}
+
+_pending = threading.local()
+
+
+def searchable_fields(serializer):
+    """Return the report details and section fields of a serializer."""
+    return {
+        'report_details': serializer.fields['report_details'],
+        **serializer.section_fields(),
+    }
+
+
+def search_entries(fields, data):
+    """Yield (weight, label, text) for the text values of a report.
+
+    `data` is the report as rendered by the serializer, so reports in
+    either layout are indexed alike.
+    """
+    for name, field in fields.items():
+        value = data.get(name)
+        if isinstance(field, serializers.ListSerializer):
+            field, rows = field.child, value or []
+        else:
+            rows = [value] if value else []
+        section = name.replace('_', ' ').title()
+        for row in rows:
+            for key, child in field.fields.items():
+                text = row.get(key)
+                if isinstance(child, serializers.CharField) and text:
+                    yield (WEIGHTS.get(name, 'C'),
+                           f'{section} / {key.replace("_", " ")}', text)
+
+
+def build_search(fields, report, data):
+    """Return the unsaved search row of a rendered report."""
+    texts = defaultdict(list)
+    lines = []
+    for weight, label, text in search_entries(fields, data):
+        texts[weight].append(text)
+        lines.append(f'{label}: {text}')
+
+    vector = SearchVector(
+        Value(' '.join(texts['A'])), config=CONFIG, weight='A')
+    for weight in 'BC':
+        vector += SearchVector(
+            Value(' '.join(texts[weight])), config=CONFIG, weight=weight)
+
+    return ReportSearch(
+        report=report, user_id=report.user_id, vector=vector,
+        text='\n'.join(lines))
+
+
+def built_report_search(serializer, report, validated_data):
+    """Return the search row of a report built from validated data."""
+    fields = searchable_fields(serializer)
+    findings = report.findings
+    if findings is None:
+        findings = findings_document(
+            serializer.section_fields(), report.report_details,
+            dict(validated_data))
+    details = fields['report_details'].to_representation(
+        report.report_details)
+
+    return build_search(fields, report, {
+        **findings, 'report_details': details})
+
+
+def save_search(rows):
+    """Insert or replace search rows in a single upsert."""
+    ReportSearch.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['report'],
+        update_fields=['user', 'vector', 'text'],
+    )
+
+
+def reindex_reports(queryset, reports=()):
+    """Rebuild the search rows of reports from their current sections.
+
+    Loaded `reports` are indexed along with those of the queryset.
+    Returns the number of reports indexed.
+    """
+    fields = searchable_fields(InspectionReportSerializer())
+    serializer = InspectionReportSerializer(fields=list(fields))
+    rows = [
+        build_search(fields, report, serializer.to_representation(report))
+        for report in [
+            *reports, *plan_report_queryset(queryset, list(fields))]
+    ]
+    save_search(rows)
+
+    return len(rows)
+
+
+class ReindexBatch:
+    """Report details to reindex the reports of on commit."""
+
+    def __init__(self):
+        self.details_ids = set()
+        self.reports = {}
+
+    def flush(self):
+        """Reindex the reports of the batch."""
+        if getattr(_pending, 'batch', None) is self:
+            _pending.batch = None
+        reindex_reports(
+            InspectionReport.objects.filter(
+                report_details_id__in=self.details_ids,
+            ).exclude(pk__in=list(self.reports)),
+            self.reports.values())
+
+
+def scheduled_batch():
+    """Return the batch reindexed when the transaction commits, if any."""
+    batch = getattr(_pending, 'batch', None)
+    # The callback of a rolled back batch is dropped by the transaction,
+    # and the batch with it.
+    if batch is not None and any(
+            callback[1] == batch.flush
+            for callback in transaction.get_connection().run_on_commit):
+        return batch
+    return None
+
+
+def reindex_on_commit(details_ids):
+    """Reindex the reports of report details when the transaction commits.
+
+    A report changed several times in one transaction, such as by a
+    PATCH touching several sections, is reindexed once. Outside of a
+    transaction the reports are reindexed straight away.
+    """
+    batch = scheduled_batch()
+    scheduled = batch is not None
+    if not scheduled:
+        batch = _pending.batch = ReindexBatch()
+    batch.details_ids.update(details_ids)
+    if not scheduled:
+        transaction.on_commit(batch.flush)
+
+
+def reindex_as_loaded(report):
+    """Reindex a report on commit from the given instance, if it changed.
+
+    The instance must hold every change made to the report in the
+    transaction; the report is then not read back to be indexed.
+    """
+    batch = scheduled_batch()
+    if batch is not None and report.report_details_id in batch.details_ids:
+        batch.reports[report.pk] = report
+
+
+def search_reports(queryset, text):
+    """Return the search rows matching a web search, best first.
+
+    `text` takes the syntax of web search engines: quoted phrases, OR
+    and -excluded words. Each row is annotated with its `rank` and a
+    `headline` of the matching findings, with matches in <mark> tags.
+    """
+    query = SearchQuery(text, config=CONFIG, search_type='websearch')
+    return queryset.filter(vector=query).annotate(
+        rank=SearchRank(F('vector'), query),
+        headline=SearchHeadline(
+            'text', query, config=CONFIG,
+            start_sel='<mark>', stop_sel='</mark>',
+            max_fragments=3, fragment_delimiter=' … ',
+        ),
+    ).select_related('report__report_details').order_by('-rank', '-report')
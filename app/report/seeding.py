@@ -0,0 +1,139 @@
+"""
+Synthetic users and reports for load testing.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import IntegerField, Max, Value
+from django.db.models.functions import Cast, Replace
+from django.utils import timezone
+from rest_framework import serializers
+
+from report.bulk import create_reports
+from report.serializers import InspectionReportSerializer
+
+
+WORDS = [
+    'cracked', 'loose', 'missing', 'damaged', 'serviceable', 'worn',
+    'stained', 'corroded', 'leaking', 'ok', 'replaced', 'original',
+    'vinyl', 'copper', 'gas', 'electric', 'granite', 'hatch', 'moisture',
+    'insulated', 'monitor', 'repair', 'upgrade', 'north', 'south',
+]
+
+
+def fake_value(field, rng):
+    """Return a random valid value for a serializer field."""
+    if isinstance(field, serializers.ChoiceField):
+        return rng.choice(list(field.choices))
+    if isinstance(field, serializers.BooleanField):
+        return rng.random() < 0.5
+    if isinstance(field, serializers.IntegerField):
+        # Counts are stored in signed columns, whose bounds are far
+        # beyond any sensible value, so values are kept within 0 to 5.
+        low = max(field.min_value or 0, 0)
+        high = 5 if field.max_value is None else min(field.max_value, 5)
+        return rng.randint(low, max(low, high))
+    if isinstance(field, serializers.DecimalField):
+        places = field.decimal_places
+        digits = min(field.max_digits - places, 4)
+        return str(Decimal(rng.randrange(10 ** (digits + places)))
+                   .scaleb(-places))
+    if isinstance(field, serializers.DateTimeField):
+        return (timezone.now() - timedelta(
+            days=rng.randrange(3650))).isoformat()
+    if isinstance(field, serializers.CharField):
+        text = ' '.join(rng.choices(WORDS, k=rng.randint(1, 4)))
+        return text[:field.max_length] if field.max_length else text
+
+    return None
+
+
+def fake_section(serializer, rng):
+    """Return a section with a value for every writable field."""
+    section = {}
+    for name, field in serializer.fields.items():
+        if field.read_only:
+            continue
+        value = fake_value(field, rng)
+        if value is not None:
+            section[name] = value
+
+    return section
+
+
+def fake_report_payload(rng, rows=2):
+    """Return an API payload populating every section of a report.
+
+    Sections with many rows get `rows` rows each.
+    """
+    payload = {}
+    for name, field in InspectionReportSerializer().fields.items():
+        if field.read_only:
+            continue
+        if isinstance(field, serializers.ListSerializer):
+            payload[name] = [
+                fake_section(field.child, rng) for _ in range(rows)]
+        elif isinstance(field, serializers.Serializer):
+            payload[name] = fake_section(field, rng)
+
+    return payload
+
+
+def seed_user_email(number):
+    """Return the email of a seeded user."""
+    return f'seed-{number}@example.com'
+
+
+def next_seed_number():
+    """Return the number after that of the last seeded user."""
+    number = Cast(
+        Replace(Replace('email', Value('seed-')), Value('@example.com')),
+        IntegerField())
+    last = get_user_model().objects.filter(
+        email__regex=r'^seed-[0-9]{1,9}@example\.com$',
+    ).aggregate(last=Max(number))['last']
+
+    return 0 if last is None else last + 1
+
+
+def seed_reports(users, reports_per_user, password, rows=2, seed=None,
+                 batch_size=100):
+    """Create users with fully populated reports, returning the counts.
+
+    Users are numbered on from the last one seeded before. The password is
+    hashed once for every user, and reports are validated by the report
+    serializer and inserted in batches through report.bulk.
+    """
+    rng = random.Random(seed)
+    encoded = make_password(password)
+    start = next_seed_number()
+    with transaction.atomic():
+        created_users = get_user_model().objects.bulk_create([
+            get_user_model()(
+                email=seed_user_email(number),
+                fname='Seed',
+                lname=str(number),
+                password=encoded,
+            )
+            for number in range(start, start + users)
+        ])
+
+    batch = []
+    created_reports = 0
+    for user in created_users:
+        for _ in range(reports_per_user):
+            serializer = InspectionReportSerializer(
+                data=fake_report_payload(rng, rows))
+            serializer.is_valid(raise_exception=True)
+            batch.append({**serializer.validated_data, 'user': user})
+            if len(batch) >= batch_size:
+                created_reports += len(create_reports(batch))
+                batch = []
+    if batch:
+        created_reports += len(create_reports(batch))
+
+    return len(created_users), created_reports
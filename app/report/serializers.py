@@ -1,6 +1,12 @@
 """
 Serializers for reports API.
 """
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+
 from rest_framework import serializers
 
 
@@ -13,10 +19,137 @@ from core.models import (
     WaterHeater, ElectricalCoolingSystems, MainPanel,
     SubPanel, EvaporatorCoil, Boiler, Furnace,
     HeatingSystem, DiningRoom, LivingRoom,
-    InspectionReport, models
+    InspectionReport, ReportPhoto, PhotoUpload, ReportSearch,
 )
-
-import uuid
+from core.instrumentation import TimedRepresentationMixin
+from report import bulk, layouts
+
+
+def save_changed_fields(instance, validated_data, extra_fields=()):
+    """Save only the fields whose values differ from the stored row.
+
+    Returns the changed field names; nothing is written when the list
+    is empty.
+    """
+    changed = [
+        name for name, value in validated_data.items()
+        if getattr(instance, name) != value
+    ]
+    if changed:
+        for name in changed:
+            setattr(instance, name, validated_data[name])
+        instance.save(update_fields=changed + list(extra_fields))
+
+    return changed
+
+
+def ordered_section(serializer, data):
+    """Return stored section data in the order of its serializer's fields.
+
+    JSONB does not keep key order, and fields added since the data was
+    stored are returned as null.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        return [ordered_section(serializer.child, row) for row in data or []]
+    if data is None:
+        return None
+    return {name: data.get(name) for name in serializer.fields}
+
+
+def merge_section(serializer, data, validated_data):
+    """Return stored section data with validated values merged in."""
+    return {
+        **data,
+        **{
+            name: None if value is None
+            else serializer.fields[name].to_representation(value)
+            for name, value in validated_data.items()
+        },
+    }
+
+
+def add_section(report, field, values):
+    """Store a section the report was saved without.
+
+    Returns the report columns referencing the new row. A sub-class
+    section of a stored parent section turns that row into its kind.
+    """
+    for name, (subname, _, submodel) in bulk.SUBCLASS_SECTIONS.items():
+        parent = getattr(report, name)
+        if field.source == subname and parent is not None:
+            save_changed_fields(
+                parent, {**values, 'kind': submodel._meta.model_name})
+            return {}
+
+    related, sections = bulk.build_sections(
+        report.report_details, {field.source: values})
+    for section in sections:
+        section.save()
+    return related
+
+
+def replace_sections(report, sections):
+    """Replace the stored rows of sections with many rows.
+
+    `sections` maps section fields to their validated rows. Sections
+    whose rows are unchanged are skipped; the others have their rows
+    deleted and inserted again with one DELETE and one INSERT per
+    table. Neither sends signals, so the report is reindexed here and
+    its version left to the caller to bump. Returns the fields replaced.
+    """
+    # The search module serializes reports with this module.
+    from report.search import reindex_on_commit
+
+    replaced = [
+        field for field, rows in sections.items()
+        if not same_rows(getattr(report, field.source), rows)
+    ]
+    if not replaced:
+        return replaced
+
+    details = report.report_details
+    tables = defaultdict(list)
+    for field in replaced:
+        model = bulk.DETAIL_SECTIONS[field.source]
+        tables[model._meta.concrete_model].append(model)
+    for table, models in tables.items():
+        stored = table.objects.filter(report_uuid=details)
+        kinds = [model.section_kind for model in models if model is not table]
+        if kinds:
+            stored = stored.filter(kind__in=kinds)
+        stored._raw_delete(stored.db)
+    _, rows = bulk.build_sections(details, {
+        field.source: sections[field] for field in replaced})
+    bulk.bulk_insert(rows)
+    reindex_on_commit([details.pk])
+
+    # Load the new rows in place of those prefetched with the report.
+    names = [f'{table._meta.model_name}_set' for table in tables]
+    cache = getattr(details, '_prefetched_objects_cache', {})
+    for name in names:
+        cache.pop(name, None)
+    prefetch_related_objects([details], *names)
+
+    return replaced
+
+
+def same_rows(stored, rows):
+    """Return whether stored section rows hold the validated rows."""
+    return len(stored) == len(rows) and all(
+        getattr(section, name) == value
+        for section, values in zip(stored, rows)
+        for name, value in values.items()
+    )
+
+
+class SparseFieldsMixin:
+    """Restrict a serializer to the requested top-level fields."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
 
 class ReportDetailsSerializer(serializers.ModelSerializer):
@@ -164,7 +297,7 @@ class BathroomSerializer(serializers.ModelSerializer):
     class Meta:
         model = Bathroom
         fields = ['report_uuid', 'bathroom']
-        read_only_field = ['report_uuid']
+        read_only_fields = ['report_uuid']
 
 
 class BedroomSerializer(serializers.ModelSerializer):
@@ -311,7 +444,9 @@ class DiningRoomSerializer(serializers.ModelSerializer):
         read_only_fields = ['report_uuid']
 
 
-class InspectionReportSerializer(serializers.ModelSerializer):
+class InspectionReportSerializer(TimedRepresentationMixin,
+                                 SparseFieldsMixin,
+                                 serializers.ModelSerializer):
     """Serializer for report details model."""
     report_details = ReportDetailsSerializer(
         many=False, required=True)
@@ -333,31 +468,193 @@ class InspectionReportSerializer(serializers.ModelSerializer):
     plumbing = PlumbingSerializer(many=False, required=True)
     waterheater = WaterHeaterSerializer(many=False, required=True)
     heatingsystem = HeatingSystemSerializer(many=False, required=True)
-    furnace = FurnaceSerializer(many=True, required=True)
+    furnace = FurnaceSerializer(
+        many=True, required=True, source='furnaces')
     boiler = BoilerSerializer(many=False, required=True)
     electricalcoolingsystems = ElectricalCoolingSystemsSerializer(
-        many=False, required=True)
-    main_panel = MainPanelSerializer(many=True, required=True)
-    sub_panel = SubPanelSerializer(many=True, required=True)
-    evap_coil = EvaporatorCoilSerializer(many=True, required=True)
-    living_room = LivingRoomSerializer(many=True, required=True)
-    dining_room = DiningRoomSerializer(many=True, required=True)
+        many=False, required=True, source='electrical_cooling')
+    main_panel = MainPanelSerializer(
+        many=True, required=True, source='main_panels')
+    sub_panel = SubPanelSerializer(
+        many=True, required=True, source='sub_panels')
+    evap_coil = EvaporatorCoilSerializer(
+        many=True, required=True, source='evap_coils')
+    living_room = LivingRoomSerializer(
+        many=True, required=True, source='living_rooms')
+    dining_room = DiningRoomSerializer(
+        many=True, required=True, source='dining_rooms')
 
     class Meta:
         model = InspectionReport
-        fields = '__all__'
-        read_only_fields = ['report_uuid']
+        exclude = ['findings']
+        read_only_fields = ['report_uuid', 'user', 'electrical_cooling']
+
+    def section_fields(self):
+        """Return the section fields, which a findings document holds."""
+        return {
+            name: field for name, field in self.fields.items()
+            if isinstance(field, serializers.BaseSerializer)
+            and name != 'report_details'
+        }
+
+    def to_representation(self, instance):
+        """Render a report, reading sections from its findings document.
+
+        Reports in the document layout have no section rows, so their
+        sections render empty and are replaced by the stored data.
+        """
+        data = super().to_representation(instance)
+        if instance.findings is not None:
+            for name, field in self.section_fields().items():
+                data[name] = ordered_section(
+                    field, instance.findings.get(name))
+
+        return data
 
     def create(self, validated_data):
-        """Create a report."""
-        models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-        report = InspectionReport.objects.create(**validated_data)
-
-        return report
+        """Create a report and all of its sections."""
+        return bulk.create_reports([validated_data])[0]
 
     def update(self, instance, validated_data):
-        """Update report."""
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
+        """Update report, writing only the changed columns.
+
+        Single sections are diffed and saved in place, or merged into the
+        findings document of the report, and created when the report has
+        none; sections with many rows are replaced as a whole. The changes
+        are committed together, so the report is reindexed for search
+        once, from the updated instance.
+        """
+        # The search module serializes reports with this module.
+        from report.search import reindex_as_loaded
+
+        with transaction.atomic():
+            instance = self._update(instance, validated_data)
+            reindex_as_loaded(instance)
+
+        return instance
+
+    def _update(self, instance, validated_data):
+        """Save the changed sections and columns of a report."""
+        report_data = {}
+        many = {}
+        findings = instance.findings
+        stored = self.section_fields() if findings is not None else {}
+        for name, field in self.fields.items():
+            if field.read_only or field.source not in validated_data:
+                continue
+            value = validated_data[field.source]
+            if isinstance(field, serializers.ListSerializer):
+                if name in stored:
+                    findings = {**findings, **layouts.findings_document(
+                        {name: field}, instance.report_details,
+                        {field.source: value})}
+                else:
+                    many[field] = value
+            elif name in stored:
+                data = findings.get(name)
+                if data is None:
+                    data = layouts.findings_document(
+                        {name: field}, instance.report_details,
+                        {field.source: value})[name]
+                findings = {
+                    **findings, name: merge_section(field, data, value)}
+            elif isinstance(field, serializers.Serializer):
+                section = getattr(instance, field.source)
+                if section is not None:
+                    save_changed_fields(section, value)
+                else:
+                    report_data.update(add_section(instance, field, value))
+            else:
+                report_data[field.source] = value
+        replaced = replace_sections(instance, many)
+        if findings is not instance.findings:
+            report_data['findings'] = findings
+        changed = save_changed_fields(
+            instance, report_data, extra_fields=['version', 'modified'])
+        if replaced and not changed:
+            # Inserted rows send no signals to bump the version.
+            instance.save(update_fields=['version', 'modified'])
+
         return instance
+
+
+# Sections with a single row, which the section endpoint serves.
+SECTION_NAMES = [
+    name for name, field in InspectionReportSerializer._declared_fields.items()
+    if isinstance(field, serializers.ModelSerializer)
+]
+
+
+class InspectionReportListSerializer(InspectionReportSerializer):
+    """Serializer for listing reports."""
+    title = serializers.CharField(
+        source='report_details.title', read_only=True)
+    r_id = serializers.CharField(
+        source='report_details.r_id', read_only=True)
+    date = serializers.DateTimeField(
+        source='report_details.date', read_only=True)
+    customer_fname = serializers.CharField(
+        source='report_details.customer_fname', read_only=True)
+    customer_lname = serializers.CharField(
+        source='report_details.customer_lname', read_only=True)
+
+    default_fields = ['id', 'title', 'r_id', 'date',
+                      'customer_fname', 'customer_lname']
+
+
+class ReportSearchSerializer(serializers.ModelSerializer):
+    """Serializer for reports matching a search."""
+    id = serializers.IntegerField(source='report_id', read_only=True)
+    title = serializers.CharField(
+        source='report.report_details.title', read_only=True)
+    r_id = serializers.CharField(
+        source='report.report_details.r_id', read_only=True)
+    date = serializers.DateTimeField(
+        source='report.report_details.date', read_only=True)
+    customer_fname = serializers.CharField(
+        source='report.report_details.customer_fname', read_only=True)
+    customer_lname = serializers.CharField(
+        source='report.report_details.customer_lname', read_only=True)
+    rank = serializers.FloatField(read_only=True)
+    headline = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = ReportSearch
+        fields = ['id', 'title', 'r_id', 'date', 'customer_fname',
+                  'customer_lname', 'rank', 'headline']
+
+
+class ReportPhotoSerializer(TimedRepresentationMixin,
+                            serializers.ModelSerializer):
+    """Serializer for report photos."""
+
+    class Meta:
+        model = ReportPhoto
+        fields = ['id', 'section', 'ordinal', 'image', 'caption', 'created']
+        read_only_fields = ['id', 'ordinal', 'created']
+
+
+class PhotoUploadSerializer(TimedRepresentationMixin,
+                            serializers.ModelSerializer):
+    """Serializer for resumable photo uploads."""
+
+    class Meta:
+        model = PhotoUpload
+        fields = ['id', 'report', 'section', 'caption', 'filename', 'size',
+                  'offset']
+        read_only_fields = ['id', 'offset']
+
+    def validate_report(self, report):
+        """Only allow uploads to reports of the requesting user."""
+        if report.user_id != self.context['request'].user.pk:
+            raise serializers.ValidationError(
+                f'Invalid pk "{report.pk}" - object does not exist.')
+        return report
+
+    def validate_size(self, size):
+        """Limit the size of uploaded photos."""
+        if size > settings.PHOTO_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'Ensure this value is less than or equal to '
+                f'{settings.PHOTO_UPLOAD_MAX_SIZE}.')
+        return size
@@ -0,0 +1,39 @@
+"""
+Signal handlers keeping the search rows of reports current.
+"""
+from django.db.models.signals import post_save, post_delete
+
+from core import models
+from core.signals import SECTION_MODELS
+from report.search import reindex_on_commit
+
+
+def reindex_section_report(sender, instance, raw=False, **kwargs):
+    """Reindex the reports of a saved or deleted section."""
+    if raw or instance.report_uuid_id is None:
+        return
+    reindex_on_commit([instance.report_uuid_id])
+
+
+def reindex_details_report(sender, instance, raw=False, **kwargs):
+    """Reindex the reports of saved report details."""
+    if raw:
+        return
+    reindex_on_commit([instance.pk])
+
+
+def reindex_report(sender, instance, raw=False, update_fields=None,
+                   **kwargs):
+    """Reindex a report saved with new findings."""
+    if raw or (update_fields is not None and 'findings' not in update_fields):
+        return
+    reindex_on_commit([instance.report_details_id])
+
+
+def connect():
+    """Connect the report search signal handlers."""
+    for model in SECTION_MODELS:
+        post_save.connect(reindex_section_report, sender=model)
+        post_delete.connect(reindex_section_report, sender=model)
+    post_save.connect(reindex_details_report, sender=models.ReportDetails)
+    post_save.connect(reindex_report, sender=models.InspectionReport)
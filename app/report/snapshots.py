@@ -0,0 +1,57 @@
+"""
+Rendered report snapshots.
+"""
+from rest_framework.renderers import JSONRenderer
+
+from core.metrics import count_cache
+from core.models import ReportSnapshot
+from report.serializers import InspectionReportSerializer
+
+
+def render_report(report, serializer=None):
+    """Render the full JSON document for a report.
+
+    Reports rendered together can share one `serializer`.
+    """
+    if serializer is None:
+        serializer = InspectionReportSerializer()
+    return JSONRenderer().render(serializer.to_representation(report))
+
+
+def load_snapshot(report_id, version):
+    """Return the stored document for a report version, if any."""
+    content = ReportSnapshot.objects.filter(
+        report_id=report_id, version=version,
+    ).values_list('content', flat=True).first()
+    if content is None:
+        count_cache('snapshot', misses=1)
+        return None
+
+    count_cache('snapshot', hits=1)
+    return bytes(content)
+
+
+def save_snapshots(reports):
+    """Render and store documents for reports in a single upsert.
+
+    Each document is stored against the version read with the report,
+    so a section saved while rendering leaves a stale version behind
+    rather than serving newer content under an old one.
+    """
+    serializer = InspectionReportSerializer()
+    snapshots = [
+        ReportSnapshot(
+            report_id=report.pk,
+            version=report.version,
+            content=render_report(report, serializer),
+        )
+        for report in reports
+    ]
+    ReportSnapshot.objects.bulk_create(
+        snapshots,
+        update_conflicts=True,
+        unique_fields=['report'],
+        update_fields=['version', 'content'],
+    )
+
+    return snapshots
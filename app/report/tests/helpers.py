@@ -0,0 +1,198 @@
+"""
+Helpers for report tests.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import models
+from core.models import InspectionReport, ReportDetails
+
+
+REPORT_URL = reverse('report:report-list')
+IMPORT_URL = reverse('report:report-import')
+EXPORT_URL = reverse('report:report-export')
+SEARCH_URL = reverse('report:report-search')
+UPLOADS_URL = reverse('report:upload-list')
+
+
+def detail_url(report_id):
+    """Create and return a report detail URL."""
+    return reverse('report:report-detail', args=[report_id])
+
+
+def section_url(report_id, section):
+    """Create and return a report section URL."""
+    return reverse('report:report-section', args=[report_id, section])
+
+
+def upload_url(upload_id):
+    """Create and return a photo upload URL."""
+    return reverse('report:upload-detail', args=[upload_id])
+
+
+def commit_url(upload_id):
+    """Create and return a photo upload commit URL."""
+    return reverse('report:upload-commit', args=[upload_id])
+
+
+def media_url(name):
+    """Create and return an authenticated media URL."""
+    return reverse('report:media', args=[name])
+
+
+def document_url(report_id):
+    """Create and return a report document URL."""
+    return reverse('report:report-document', args=[report_id])
+
+
+def photos_url(report_id):
+    """Create and return a report photos URL."""
+    return reverse('report:report-photos', args=[report_id])
+
+
+def photo_url(report_id, field):
+    """Create and return a report photo URL."""
+    return reverse('report:report-photo', args=[report_id, field])
+
+
+def report_payload(bedrooms=2):
+    """Return a payload for creating a report with every section."""
+    return {
+        'report_details': {
+            'title': 'Sample report title',
+            'r_id': 'Sample R_id',
+            'date': '2023-09-18T00:00:00Z',
+            'customer_fname': 'Samplefname',
+            'customer_lname': 'Samplelname',
+            'bedroom_count': bedrooms,
+            'bathroom_count': 1,
+            'garage_type': 'Detached',
+            'basement_type': True,
+        },
+        'overview': {
+            'scope': 'Full', 'state_of_occupancy': 'Vacant',
+            'weather': 'Sunny', 'recent_rain': 'No',
+            'ground_cover': 'Dry', 'approx_age': '30',
+        },
+        'summary': {'major_concerns': 'Knob and tube wiring'},
+        'receipt_invoice': {
+            'company': 'Inspectech', 'date': '2023-09-18T00:00:00Z',
+            'inspector_fname': 'Jane', 'inspector_lname': 'Doe',
+            'client_fname': 'John', 'client_lname': 'Doe',
+            'payment_type': 'Card', 'total_fee': '450.00',
+        },
+        'grounds': {'patio': 'Cracked'},
+        'roof': {'flashing': 'Loose'},
+        'exterior': {'siding': 'Vinyl'},
+        'garage': {'type': 'Detached'},
+        'kitchen': {'countertops': 'Granite'},
+        'laundry': {'laundry': 'Basement'},
+        'bathroom': {'bathroom': 'Full'},
+        'bedrooms': [{'bedroom': f'Bedroom {i}'} for i in range(bedrooms)],
+        'interior': {'attic': 'Insulated'},
+        'basement': {'foundation': 'Foundation crack'},
+        'crawlspace': {'access': 'Hatch'},
+        'plumbing': {'water_service': 'Copper'},
+        'waterheater': {'water_heater': 'Gas 40 gallon'},
+        'heatingsystem': {'other_systems': 'None'},
+        'furnace': [{'furnace_unit': 'Gas'}],
+        'boiler': {'boiler_unit': 'Hot water'},
+        'electricalcoolingsystems': {},
+        'main_panel': [{'main_panel': '200A'}],
+        'sub_panel': [{'sub_panel': '100A'}, {'sub_panel': '60A'}],
+        'evap_coil': [{'evap_coil': 'Clean'}],
+        'living_room': [{'living_room': 'Ok'}],
+        'dining_room': [{'dining_room': 'Ok'}],
+    }
+
+
+def create_inspection_report(user):
+    """Create and return a report with every section populated."""
+    details = ReportDetails.objects.create(
+        user=user,
+        title='Sample report title',
+        r_id='Sample R_id',
+        date='2023-09-18T00:00:00Z',
+        customer_fname='Samplefname',
+        customer_lname='Samplelname',
+        bedroom_count=2,
+        bathroom_count=1,
+        garage_type='Detached',
+        basement_type=True,
+    )
+    sections = {
+        'overview': models.Overview.objects.create(
+            report_uuid=details, scope='Full', state_of_occupancy='Vacant',
+            weather='Sunny', recent_rain='No', ground_cover='Dry',
+            approx_age='30'),
+        'summary': models.Summary.objects.create(
+            report_uuid=details, major_concerns='Knob and tube wiring'),
+        'receipt_invoice': models.ReceiptInvoice.objects.create(
+            report_uuid=details, company='Inspectech',
+            date='2023-09-18T00:00:00Z', inspector_fname='Jane',
+            inspector_lname='Doe', client_fname='John', client_lname='Doe',
+            payment_type='Card', total_fee='450.00'),
+        'grounds': models.Grounds.objects.create(
+            report_uuid=details, patio='Cracked'),
+        'roof': models.Roof.objects.create(
+            report_uuid=details, flashing='Loose'),
+        'exterior': models.Exterior.objects.create(
+            report_uuid=details, siding='Vinyl'),
+        'garage': models.GarageCarport.objects.create(
+            report_uuid=details, type='Detached'),
+        'kitchen': models.Kitchen.objects.create(
+            report_uuid=details, countertops='Granite'),
+        'laundry': models.Laundry.objects.create(
+            report_uuid=details, laundry='Basement'),
+        'bathroom': models.Bathroom.objects.create(
+            report_uuid=details, bathroom='Full'),
+        'basement': models.Basement.objects.create(
+            report_uuid=details, foundation='Foundation crack'),
+        'crawlspace': models.CrawlSpace.objects.create(
+            report_uuid=details, access='Hatch'),
+        'plumbing': models.WaterHeater.objects.create(
+            report_uuid=details, water_service='Copper',
+            water_heater='Gas 40 gallon'),
+        'heatingsystem': models.Boiler.objects.create(
+            report_uuid=details, other_systems='None',
+            boiler_unit='Hot water'),
+        'electrical_cooling': models.ElectricalCoolingSystems.objects.create(
+            report_uuid=details),
+    }
+    models.Interior.objects.create(report_uuid=details, attic='Insulated')
+    for bedroom in ['Primary', 'Guest']:
+        models.Bedrooms.objects.create(report_uuid=details, bedroom=bedroom)
+    models.Furnace.objects.create(report_uuid=details, furnace_unit='Gas')
+    models.MainPanel.objects.create(report_uuid=details, main_panel='200A')
+    models.SubPanel.objects.create(report_uuid=details, sub_panel='100A')
+    models.EvaporatorCoil.objects.create(
+        report_uuid=details, evap_coil='Clean')
+    models.LivingRoom.objects.create(report_uuid=details, living_room='Ok')
+    models.DiningRoom.objects.create(report_uuid=details, dining_room='Ok')
+
+    return InspectionReport.objects.create(
+        user=user, report_details=details, **sections)
+
+
+class AuthenticatedTestCase(TestCase):
+    """Test case with a user authenticated on the API client."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+
+class ReportTestCase(AuthenticatedTestCase):
+    """Test case with a report of the user with every section."""
+
+    def setUp(self):
+        super().setUp()
+        self.report = create_inspection_report(self.user)
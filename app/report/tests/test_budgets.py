@@ -0,0 +1,289 @@
+"""
+Query and time budgets of the report API.
+"""
+import json
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+
+from rest_framework import status
+
+from core.models import InspectionReport, PhotoUpload, ReportPhoto
+from core.testing import budget, route_names
+from core.tests.helpers import TemporaryMediaMixin, jpeg
+from report.search import reindex_reports
+from report.tests.helpers import (
+    EXPORT_URL,
+    IMPORT_URL,
+    REPORT_URL,
+    SEARCH_URL,
+    UPLOADS_URL,
+    ReportTestCase,
+    commit_url,
+    create_inspection_report,
+    detail_url,
+    document_url,
+    media_url,
+    photo_url,
+    photos_url,
+    report_payload,
+    section_url,
+    upload_url,
+)
+
+
+BUDGETED_ROUTES = {
+    'api-root', 'report-list', 'report-detail', 'report-section',
+    'report-document', 'report-photos', 'report-photo', 'report-import',
+    'report-export', 'report-search', 'upload-list', 'upload-detail',
+    'upload-commit', 'media',
+}
+
+
+class ReportBudgetTests(TemporaryMediaMixin, ReportTestCase):
+    """Test report endpoints stay within their query and time budgets.
+
+    Reports have every section populated, and several reports or rows
+    are used where an N+1 query would show. Writes run their on-commit
+    callbacks, so the search reindex they trigger is counted too.
+    """
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            super().setUp()
+
+    def add_photo(self, section='roof'):
+        """Store a report photo in a section."""
+        photo = ReportPhoto(report=self.report, section=section)
+        photo.image.save('photo.jpg', SimpleUploadedFile(
+            'photo.jpg', jpeg()), save=False)
+        photo.save()
+        return photo
+
+    def test_every_route_has_a_budget(self):
+        """Test the budgets below cover every report route."""
+        self.assertEqual(route_names('report.urls'), BUDGETED_ROUTES)
+
+    def test_api_root(self):
+        """Test the API root runs no queries."""
+        with budget(queries=0, ms=100):
+            res = self.client.get(reverse('report:api-root'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list(self):
+        """Test listing reports costs the same for any number."""
+        for _ in range(4):
+            create_inspection_report(self.user)
+
+        with budget(queries=1, ms=200):
+            res = self.client.get(REPORT_URL)
+
+        self.assertEqual(len(res.data['results']), 5)
+
+    def test_list_with_sections(self):
+        """Test included sections are loaded per page, not per report."""
+        for _ in range(4):
+            create_inspection_report(self.user)
+
+        with budget(queries=2, ms=300):
+            res = self.client.get(REPORT_URL, {'include': 'roof,bedrooms'})
+
+        self.assertEqual(len(res.data['results']), 5)
+
+    def test_create(self):
+        """Test creating a report inserts one row set per table.
+
+        Each of the 21 tables of a report gets one INSERT, and the search
+        row one more, in a savepoint. The report is read back with its
+        sections for the response in the 7 queries a retrieve takes.
+        """
+        with budget(queries=31, ms=500):
+            res = self.client.post(
+                REPORT_URL, report_payload(bedrooms=4), format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_retrieve(self):
+        """Test retrieving a full report, rendered and then stored.
+
+        Rendering reads the report with its single sections in one query
+        and each of the 6 tables of sections with many rows in one more,
+        after the version and snapshot lookups and before the snapshot
+        write. Stored snapshots are served from two queries.
+        """
+        with budget(queries=10, ms=300):
+            res = self.client.get(detail_url(self.report.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with budget(queries=2, ms=100):
+            res = self.client.get(detail_url(self.report.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_partial_update(self):
+        """Test patching a section of a report and reindexing it.
+
+        The report is read with its sections in 7 queries, the section
+        and version written in a savepoint, and the report indexed from
+        the updated instance: only other reports of its details are
+        looked up before the search row is written.
+        """
+        with budget(queries=13, ms=300), \
+                self.captureOnCommitCallbacks(execute=True):
+            res = self.client.patch(
+                detail_url(self.report.id),
+                {'roof': {'flashing': 'Sealed'}}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_update(self):
+        """Test replacing a report and reindexing it.
+
+        Two tables of sections with many rows differ from the stored
+        report, each replaced with one DELETE and one INSERT and loaded
+        again for the response. The report is indexed from the updated
+        instance, as when patching.
+        """
+        with budget(queries=19, ms=500), \
+                self.captureOnCommitCallbacks(execute=True):
+            res = self.client.put(
+                detail_url(self.report.id), report_payload(), format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_destroy(self):
+        """Test deleting a report and its sections."""
+        with budget(queries=12, ms=500), \
+                self.captureOnCommitCallbacks(execute=True):
+            res = self.client.delete(detail_url(self.report.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_section(self):
+        """Test retrieving, patching and reindexing a single section."""
+        with budget(queries=1, ms=100):
+            res = self.client.get(section_url(self.report.id, 'roof'))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with budget(queries=11, ms=200), \
+                self.captureOnCommitCallbacks(execute=True):
+            res = self.client.patch(
+                section_url(self.report.id, 'roof'),
+                {'flashing': 'Sealed'}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_document(self):
+        """Test rendering the report document."""
+        with budget(queries=7, ms=500):
+            res = self.client.get(document_url(self.report.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_photos(self):
+        """Test listing photos by section and adding one."""
+        for section in ['roof', 'roof', 'kitchen', 'grounds']:
+            self.add_photo(section)
+
+        with budget(queries=1, ms=200):
+            res = self.client.get(photos_url(self.report.id))
+        self.assertEqual(len(res.data['roof']), 2)
+
+        with budget(queries=8, ms=300):
+            res = self.client.post(photos_url(self.report.id), {
+                'section': 'roof',
+                'image': SimpleUploadedFile('new.jpg', jpeg('blue')),
+            }, format='multipart')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_photo(self):
+        """Test redirecting to the last photo of a section."""
+        self.add_photo()
+        self.add_photo()
+
+        with budget(queries=1, ms=100):
+            res = self.client.get(photo_url(self.report.id, 'roof'))
+
+        self.assertEqual(res.status_code, status.HTTP_302_FOUND)
+
+    def test_media(self):
+        """Test serving a report photo."""
+        photo = self.add_photo()
+
+        with budget(queries=1, ms=100):
+            res = self.client.get(media_url(photo.image.name))
+            b''.join(res.streaming_content)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_import(self):
+        """Test importing reports in a single chunk."""
+        body = '\n'.join(json.dumps(report_payload()) for _ in range(5))
+
+        with budget(queries=24, ms=1000):
+            res = self.client.post(
+                IMPORT_URL, body, content_type='application/x-ndjson')
+            b''.join(res.streaming_content)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_export(self):
+        """Test exporting reports costs the same for any number."""
+        for _ in range(4):
+            create_inspection_report(self.user)
+
+        with budget(queries=7, ms=500):
+            res = self.client.get(EXPORT_URL)
+            lines = b''.join(res.streaming_content).splitlines()
+
+        self.assertEqual(len(lines), 5)
+
+    def test_search(self):
+        """Test searching reports costs the same for any number."""
+        for _ in range(4):
+            create_inspection_report(self.user)
+        reindex_reports(InspectionReport.objects.all())
+
+        with budget(queries=2, ms=200):
+            res = self.client.get(SEARCH_URL, {'q': 'knob'})
+
+        self.assertEqual(len(res.data['results']), 5)
+
+    def test_uploads(self):
+        """Test starting, writing, checking and committing an upload."""
+        content = jpeg()
+        with budget(queries=2, ms=100):
+            res = self.client.post(UPLOADS_URL, {
+                'report': self.report.id,
+                'section': 'roof',
+                'filename': 'IMG_0001.JPG',
+                'size': len(content),
+            }, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        upload_id = res.data['id']
+
+        with budget(queries=2, ms=100):
+            res = self.client.patch(
+                upload_url(upload_id), content,
+                content_type='application/offset+octet-stream',
+                HTTP_UPLOAD_OFFSET='0',
+            )
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+        with budget(queries=1, ms=100):
+            res = self.client.head(upload_url(upload_id))
+        self.assertEqual(res['Upload-Offset'], str(len(content)))
+
+        with budget(queries=11, ms=300):
+            res = self.client.post(commit_url(upload_id))
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_discard_upload(self):
+        """Test discarding an upload."""
+        upload = PhotoUpload.objects.create(
+            user=self.user, report=self.report, section='roof',
+            filename='IMG_0001.JPG', size=10)
+
+        with budget(queries=2, ms=100):
+            res = self.client.delete(upload_url(upload.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
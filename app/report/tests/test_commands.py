@@ -0,0 +1,282 @@
+"""
+Test report management commands.
+"""
+import json
+import random
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import (
+    LiveServerTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.utils import timezone
+
+from core.models import InspectionReport, PhotoUpload, ReportSnapshot
+
+from report.seeding import fake_value
+from report.serializers import InspectionReportSerializer
+from report.snapshots import render_report
+from report.uploads import partial_path
+from report.tests.helpers import (
+    create_inspection_report,
+    report_payload,
+)
+
+
+class SnapshotReportsCommandTests(TestCase):
+    """Test the snapshot_reports command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+
+    def test_snapshot_reports_renders_missing(self):
+        """Test snapshots are rendered for reports without one."""
+        reports = [create_inspection_report(self.user) for _ in range(3)]
+
+        call_command('snapshot_reports', chunk_size=2, stdout=StringIO())
+
+        self.assertEqual(ReportSnapshot.objects.count(), 3)
+        snapshot = ReportSnapshot.objects.get(report=reports[0])
+        self.assertEqual(bytes(snapshot.content), render_report(reports[0]))
+
+    def test_snapshot_reports_refreshes_stale(self):
+        """Test stale snapshots are re-rendered and fresh ones skipped."""
+        stale = create_inspection_report(self.user)
+        fresh = create_inspection_report(self.user)
+        call_command('snapshot_reports', stdout=StringIO())
+        stale.roof.flashing = 'Repaired'
+        stale.roof.save()
+
+        with self.assertNumQueries(8):
+            call_command('snapshot_reports', stdout=StringIO())
+
+        stale.refresh_from_db()
+        snapshot = ReportSnapshot.objects.get(report=stale)
+        self.assertEqual(snapshot.version, stale.version)
+        self.assertIn(b'Repaired', bytes(snapshot.content))
+        self.assertEqual(
+            ReportSnapshot.objects.get(report=fresh).version, fresh.version)
+
+
+class ImportReportsCommandTests(TestCase):
+    """Test the import_reports command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+
+    def test_import_reports_from_file(self):
+        """Test reports are imported from an NDJSON file."""
+        stdout, stderr = StringIO(), StringIO()
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson') as f:
+            for _ in range(3):
+                f.write(json.dumps(report_payload()) + '\n')
+            f.write('{"title": "missing sections"}\n')
+            f.flush()
+
+            call_command('import_reports', f.name, user=self.user.email,
+                         chunk_size=2, stdout=stdout, stderr=stderr)
+
+        self.assertEqual(
+            InspectionReport.objects.filter(user=self.user).count(), 3)
+        self.assertIn('Created 3 reports, 1 failed.', stdout.getvalue())
+        self.assertEqual(json.loads(stderr.getvalue())['line'], 4)
+
+    def test_import_reports_unknown_user(self):
+        """Test importing for an unknown user raises an error."""
+        with self.assertRaises(CommandError):
+            call_command('import_reports', '-', user='nobody@example.com')
+
+
+class ExportReportsCommandTests(TestCase):
+    """Test the export_reports command."""
+
+    def test_export_reports_every_user(self):
+        """Test every user's reports are exported by default."""
+        for email in ['one@example.com', 'two@example.com']:
+            user = get_user_model().objects.create_user(email, 'pass1234')
+            create_inspection_report(user)
+        stdout = StringIO()
+
+        call_command('export_reports', '-', stdout=stdout)
+
+        records = [json.loads(line)
+                   for line in stdout.getvalue().splitlines()]
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]['roof']['flashing'], 'Loose')
+
+    def test_export_reports_csv_for_user(self):
+        """Test exporting one user's reports to a CSV file."""
+        user = get_user_model().objects.create_user(
+            'one@example.com', 'pass1234')
+        other = get_user_model().objects.create_user(
+            'two@example.com', 'pass1234')
+        create_inspection_report(user)
+        create_inspection_report(other)
+
+        with tempfile.NamedTemporaryFile('r', suffix='.csv') as f:
+            call_command('export_reports', f.name, user=user.email,
+                         format='csv')
+            lines = f.read().splitlines()
+
+        self.assertTrue(lines[0].startswith('id,'))
+        self.assertEqual(
+            len([line for line in lines if 'Sample report title' in line]),
+            1)
+
+
+class ExpirePhotoUploadsCommandTests(TestCase):
+    """Test the expire_photo_uploads command."""
+
+    def test_expire_photo_uploads(self):
+        """Test uploads not written to recently are discarded."""
+        user = get_user_model().objects.create_user(
+            'user@example.com', 'pass1234')
+        report = create_inspection_report(user)
+        stale, fresh = [
+            PhotoUpload.objects.create(
+                user=user, report=report, section='roof',
+                filename='a.jpg', size=10)
+            for _ in range(2)
+        ]
+        PhotoUpload.objects.filter(pk=stale.pk).update(
+            updated=timezone.now() - timedelta(days=2))
+
+        with tempfile.TemporaryDirectory() as media, \
+                override_settings(MEDIA_ROOT=media):
+            os.makedirs(os.path.dirname(partial_path(stale)))
+            open(partial_path(stale), 'wb').close()
+            stdout = StringIO()
+            call_command('expire_photo_uploads', stdout=stdout)
+
+            self.assertFalse(os.path.exists(partial_path(stale)))
+
+        self.assertIn('Discarded 1 uploads.', stdout.getvalue())
+        self.assertEqual(list(PhotoUpload.objects.all()), [fresh])
+
+
+class RenderReportsCommandTests(TransactionTestCase):
+    """Test the render_reports command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'pass1234')
+        self.reports = [create_inspection_report(self.user)
+                        for _ in range(3)]
+
+    def test_render_reports(self):
+        """Test reports are rendered to HTML files in worker processes."""
+        stdout = StringIO()
+        with tempfile.TemporaryDirectory() as output:
+            call_command('render_reports', output, workers=2, batch_size=2,
+                         stdout=stdout)
+
+            names = sorted(os.listdir(output))
+            with open(os.path.join(output, names[0])) as document:
+                html = document.read()
+
+        self.assertIn('Rendered 3 reports.', stdout.getvalue())
+        self.assertEqual(
+            names, sorted(f'report-{r.id}.html' for r in self.reports))
+        self.assertIn('<section id="roof">', html)
+
+    def test_render_reports_unknown_user(self):
+        """Test rendering for an unknown user fails."""
+        with self.assertRaises(CommandError):
+            call_command('render_reports', '/tmp', user='no@example.com',
+                         workers=0)
+
+
+class SeedReportsCommandTests(TestCase):
+    """Test the seed_reports command."""
+
+    def test_seed_reports(self):
+        """Test users are created with fully populated reports."""
+        call_command('seed_reports', users=2, reports=3, rows=2, seed=1,
+                     batch_size=4, stdout=StringIO())
+        call_command('seed_reports', users=1, reports=1, stdout=StringIO())
+
+        users = get_user_model().objects.filter(
+            email__startswith='seed-').order_by('email')
+        self.assertEqual(
+            [user.email for user in users],
+            ['seed-0@example.com', 'seed-1@example.com',
+             'seed-2@example.com'],
+        )
+        self.assertTrue(users[0].check_password('benchmark123'))
+        self.assertEqual(
+            InspectionReport.objects.filter(user=users[1]).count(), 3)
+        report = InspectionReport.objects.filter(user=users[0]).first()
+        self.assertEqual(report.report_details.bedrooms_set.count(), 2)
+        for section in ['overview', 'roof', 'plumbing', 'heatingsystem',
+                        'electrical_cooling']:
+            self.assertIsNotNone(getattr(report, section))
+
+    def test_seed_reports_after_deleted_user(self):
+        """Test numbering goes on from the last user, not the count."""
+        call_command('seed_reports', users=2, reports=0, stdout=StringIO())
+        get_user_model().objects.get(email='seed-0@example.com').delete()
+
+        call_command('seed_reports', users=1, reports=0, stdout=StringIO())
+
+        self.assertTrue(get_user_model().objects.filter(
+            email='seed-2@example.com').exists())
+
+    def test_fake_counts_not_negative(self):
+        """Test counts in signed columns are seeded from 0."""
+        field = InspectionReportSerializer().fields[
+            'report_details'].fields['bedroom_count']
+        rng = random.Random(1)
+
+        values = {fake_value(field, rng) for _ in range(200)}
+
+        self.assertEqual(values, set(range(6)))
+
+
+@override_settings(REQUEST_METRICS=True)
+class BenchmarkApiCommandTests(LiveServerTestCase):
+    """Test the benchmark_api command."""
+
+    def test_benchmark_api(self):
+        """Test latency percentiles and query counts are reported."""
+        call_command('seed_reports', users=1, reports=2, stdout=StringIO())
+        stdout = StringIO()
+
+        with self.assertLogs('core.requests', 'INFO'):
+            call_command('benchmark_api', base_url=self.live_server_url,
+                         requests=4, concurrency=2, warmup=1, stdout=stdout)
+
+        results = json.loads(stdout.getvalue())
+        self.assertEqual(
+            set(results['scenarios']),
+            {'token', 'list', 'detail', 'create', 'patch'},
+        )
+        for scenario in results['scenarios'].values():
+            self.assertEqual(scenario['requests'], 4)
+            self.assertEqual(scenario['errors'], 0)
+            self.assertGreater(scenario['throughput_rps'], 0)
+            self.assertLessEqual(scenario['latency_ms']['p50'],
+                                 scenario['latency_ms']['p99'])
+            self.assertGreater(scenario['queries_per_request'], 0)
+
+    def test_benchmark_without_reports(self):
+        """Test an error is raised when the user has no reports."""
+        call_command('seed_reports', users=1, reports=0, stdout=StringIO())
+
+        with self.assertLogs('core.requests', 'INFO'), \
+                self.assertRaises(CommandError):
+            call_command('benchmark_api', base_url=self.live_server_url,
+                         stdout=StringIO())
@@ -0,0 +1,254 @@
+"""
+Tests for the table and document layouts of report sections.
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+
+from rest_framework import status
+
+from core import models
+from core.models import InspectionReport
+from report.tests.helpers import (
+    REPORT_URL,
+    AuthenticatedTestCase,
+    create_inspection_report,
+    detail_url,
+    report_payload,
+    section_url,
+)
+
+
+def content(res, *ignored):
+    """Return the JSON of a response without the raw section row id."""
+    data = res.json()
+    for name in ['electrical_cooling', *ignored]:
+        data.pop(name)
+    return data
+
+
+@override_settings(REPORT_SECTION_LAYOUT='document')
+class DocumentLayoutApiTests(AuthenticatedTestCase):
+    """Test the report API with sections stored in findings documents."""
+
+    def create(self, payload=None):
+        """Create a report through the API and return its id."""
+        res = self.client.post(
+            REPORT_URL, payload or report_payload(), format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res.data['id']
+
+    def test_create_stores_sections_in_document(self):
+        """Test creating a report writes no section rows."""
+        report_id = self.create()
+
+        report = InspectionReport.objects.get(pk=report_id)
+        self.assertEqual(report.findings['roof']['flashing'], 'Loose')
+        self.assertEqual(
+            [row['sub_panel'] for row in report.findings['sub_panel']],
+            ['100A', '60A'])
+        self.assertIsNone(report.roof_id)
+        self.assertFalse(models.Roof.objects.exists())
+        self.assertFalse(models.ElectricalCoolingSystems.objects.exists())
+
+    def test_retrieve_matches_table_layout(self):
+        """Test a report renders the same in either layout."""
+        with override_settings(REPORT_SECTION_LAYOUT='tables'):
+            tables = content(self.client.get(detail_url(self.create())),
+                             'id', 'report_details', 'modified')
+        document = content(self.client.get(detail_url(self.create())),
+                           'id', 'report_details', 'modified')
+
+        for data in (tables, document):
+            for section in data.values():
+                rows = section if isinstance(section, list) else [section]
+                for row in rows:
+                    if isinstance(row, dict):
+                        row.pop('report_uuid')
+        self.assertEqual(document, tables)
+
+    def test_retrieve_reads_one_row(self):
+        """Test retrieving a report reads its sections with the report."""
+        report_id = self.create()
+
+        with self.assertNumQueries(4):
+            res = self.client.get(detail_url(report_id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['main_panel'][0]['main_panel'], '200A')
+
+    def test_list_include_sections_one_query(self):
+        """Test listing reports with sections runs a single query."""
+        for _ in range(3):
+            self.create()
+
+        with self.assertNumQueries(1):
+            res = self.client.get(REPORT_URL, {'include': 'roof,bedrooms'})
+
+        self.assertEqual(
+            [report['roof']['flashing'] for report in res.data['results']],
+            ['Loose'] * 3)
+        self.assertEqual(len(res.data['results'][0]['bedrooms']), 2)
+
+    def test_partial_update_merges_section(self):
+        """Test patching a report merges the sections it sends."""
+        report_id = self.create()
+
+        res = self.client.patch(
+            detail_url(report_id),
+            {'roof': {'valleys': 'Worn'}, 'report_details': {'title': 'New'}},
+            format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        report = InspectionReport.objects.get(pk=report_id)
+        self.assertEqual(report.findings['roof']['flashing'], 'Loose')
+        self.assertEqual(report.findings['roof']['valleys'], 'Worn')
+        self.assertEqual(report.report_details.title, 'New')
+
+    def test_partial_update_adds_missing_section(self):
+        """Test patching a section the report was created without adds it."""
+        payload = report_payload()
+        del payload['garage']
+        report_id = self.create(payload)
+
+        res = self.client.patch(
+            detail_url(report_id), {'garage': {'type': 'Carport'}},
+            format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['garage']['type'], 'Carport')
+        report = InspectionReport.objects.get(pk=report_id)
+        self.assertEqual(report.findings['garage']['type'], 'Carport')
+        self.assertEqual(report.findings['garage']['report_uuid'],
+                         str(report.report_details_id))
+        self.assertFalse(models.GarageCarport.objects.exists())
+
+    def test_partial_update_replaces_many_row_section(self):
+        """Test patching a section with many rows replaces the document's."""
+        report_id = self.create()
+
+        res = self.client.patch(
+            detail_url(report_id), {'bedrooms': [{'bedroom': 'Primary'}]},
+            format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        report = InspectionReport.objects.get(pk=report_id)
+        self.assertEqual(
+            [row['bedroom'] for row in report.findings['bedrooms']],
+            ['Primary'])
+        self.assertFalse(models.Bedrooms.objects.exists())
+
+    def test_section_patch_updates_document(self):
+        """Test patching a section writes only the report row."""
+        report_id = self.create()
+
+        with self.assertNumQueries(3):
+            res = self.client.patch(
+                section_url(report_id, 'receipt_invoice'),
+                {'total_fee': '99.5'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['total_fee'], '99.50')
+        self.assertEqual(res.data['company'], 'Inspectech')
+        res = self.client.get(section_url(report_id, 'receipt_invoice'))
+        self.assertEqual(res.data['total_fee'], '99.50')
+
+    def test_section_patch_validates(self):
+        """Test section values are validated by the section serializer."""
+        report_id = self.create()
+
+        res = self.client.patch(
+            section_url(report_id, 'receipt_invoice'),
+            {'total_fee': 'free'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        report = InspectionReport.objects.get(pk=report_id)
+        self.assertEqual(report.findings['receipt_invoice']['total_fee'],
+                         '450.00')
+        self.assertEqual(report.version, 1)
+
+    def test_report_details_section(self):
+        """Test report details are served and patched from their row."""
+        report_id = self.create()
+        url = section_url(report_id, 'report_details')
+
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], 'Sample report title')
+
+        res = self.client.patch(url, {'title': 'Lakeside'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], 'Lakeside')
+        report = InspectionReport.objects.get(pk=report_id)
+        self.assertEqual(report.report_details.title, 'Lakeside')
+        self.assertNotIn('report_details', report.findings)
+
+    def test_missing_section_not_found(self):
+        """Test a section left out of the document is not found."""
+        payload = report_payload()
+        del payload['garage']
+        report_id = self.create(payload)
+
+        res = self.client.get(section_url(report_id, 'garage'))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ConvertReportLayoutCommandTests(AuthenticatedTestCase):
+    """Test moving reports between the table and document layouts."""
+
+    def test_round_trip(self):
+        """Test converting both ways keeps every report's content."""
+        reports = [create_inspection_report(self.user) for _ in range(3)]
+        before = [content(self.client.get(detail_url(report.id)), 'version')
+                  for report in reports]
+
+        out = StringIO()
+        call_command('convert_report_layout', 'document', batch_size=2,
+                     stdout=out)
+
+        self.assertIn('Converted 3 reports', out.getvalue())
+        self.assertFalse(models.Roof.objects.exists())
+        self.assertFalse(models.Bedrooms.objects.exists())
+        self.assertEqual(
+            InspectionReport.objects.filter(findings__isnull=True).count(), 0)
+        with override_settings(REPORT_SECTION_LAYOUT='document'):
+            documents = [
+                content(self.client.get(detail_url(report.id)), 'version')
+                for report in reports]
+
+        call_command('convert_report_layout', 'tables', stdout=StringIO())
+
+        self.assertEqual(models.Roof.objects.count(), 3)
+        after = [content(self.client.get(detail_url(report.id)), 'version')
+                 for report in reports]
+        self.assertEqual(documents, before)
+        self.assertEqual(after, before)
+
+    def test_document_queries_use_gin_index(self):
+        """Test findings can be searched by containment."""
+        create_inspection_report(self.user)
+        call_command('convert_report_layout', 'document', stdout=StringIO())
+
+        matches = InspectionReport.objects.filter(
+            findings__contains={'roof': {'flashing': 'Loose'}})
+
+        self.assertEqual(matches.count(), 1)
+
+    def test_invalid_document_skipped(self):
+        """Test reports failing section validation stay in documents."""
+        report = create_inspection_report(self.user)
+        call_command('convert_report_layout', 'document', stdout=StringIO())
+        report.refresh_from_db()
+        report.findings['receipt_invoice']['total_fee'] = 'free'
+        report.save()
+
+        out = StringIO()
+        call_command('convert_report_layout', 'tables', stdout=out)
+
+        self.assertIn('Skipped 1 reports', out.getvalue())
+        report.refresh_from_db()
+        self.assertIsNotNone(report.findings)
+        self.assertFalse(models.Roof.objects.exists())
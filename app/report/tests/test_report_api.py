@@ -1,22 +1,66 @@
 # """
 # Tests for report API.
 # """
+import csv
+import io
+import json
+import importlib
+import os
+from unittest.mock import patch
 
+from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, connection
 from django.test import TestCase
-from django.urls import reverse
+from django.test.utils import CaptureQueriesContext
+from django.urls import NoReverseMatch, reverse
 
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 
+from core import models
 from core.models import ReportDetails
 from core.models import InspectionReport
+from core.models import ReportSnapshot
+from core.models import PhotoVariant
+from core.models import ReportPhoto
+from core.models import PhotoUpload
+from report.uploads import partial_path
+from report import bulk, documents
+from core.derivatives import build_variants
+from core.tests.helpers import TemporaryMediaMixin, jpeg, save_image
 
-from report.serializers import InspectionReportSerializer
+from report.serializers import (
+    InspectionReportSerializer,
+    InspectionReportListSerializer,
+)
+from report.tests.helpers import (
+    EXPORT_URL,
+    IMPORT_URL,
+    UPLOADS_URL,
+    ReportTestCase,
+    commit_url,
+    create_inspection_report,
+    document_url,
+    media_url,
+    photo_url,
+    photos_url,
+    report_payload,
+    section_url,
+    upload_url,
+)
 
 REPORT_URL = reverse('report:report-list')
 
 
+def detail_url(report_id):
+    """Create and return a report detail URL."""
+    return reverse('report:report-detail', args=[report_id])
+
+
 def create_report(user, **params):
     """Create and return a sample recipe."""
     defaults = {
@@ -67,10 +111,12 @@ class PrivateRecipeApiTests(TestCase):
 
         res = self.client.get(REPORT_URL)
 
-        report = InspectionReport.objects.all().order_by('-report_details_id')
-        serializer = InspectionReportSerializer(report, many=True)
+        report = InspectionReport.objects.all().order_by('-id')
+        serializer = InspectionReportListSerializer(
+            report, many=True,
+            fields=InspectionReportListSerializer.default_fields)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipe_list_limited_to_user(self):
         """Test list of reports is limited to company users."""
@@ -84,6 +130,1049 @@ class PrivateRecipeApiTests(TestCase):
         res = self.client.get(REPORT_URL)
 
         report = InspectionReport.objects.filter(user=self.user)
-        serializer = InspectionReportSerializer(report, many=True)
+        serializer = InspectionReportListSerializer(
+            report, many=True,
+            fields=InspectionReportListSerializer.default_fields)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], serializer.data)
+
+    def test_list_reports_fixed_query_count(self):
+        """Test listing full reports does not issue queries per report."""
+        fields = ','.join(InspectionReportSerializer().fields)
+        create_inspection_report(self.user)
+        with self.assertNumQueries(7):
+            self.client.get(REPORT_URL, {'fields': fields})
+
+        for _ in range(4):
+            create_inspection_report(self.user)
+        with self.assertNumQueries(7):
+            res = self.client.get(REPORT_URL, {'fields': fields})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 5)
+        self.assertEqual(len(res.data['results'][0]['bedrooms']), 2)
+
+    def test_list_reports_compact(self):
+        """Test listing reports returns only the report details summary."""
+        report = create_inspection_report(self.user)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(REPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [{
+            'id': report.id,
+            'title': 'Sample report title',
+            'r_id': 'Sample R_id',
+            'date': '2023-09-18T00:00:00Z',
+            'customer_fname': 'Samplefname',
+            'customer_lname': 'Samplelname',
+        }])
+
+    def test_list_reports_include_sections(self):
+        """Test sections can be added to the report list."""
+        create_inspection_report(self.user)
+
+        with self.assertNumQueries(2):
+            res = self.client.get(REPORT_URL, {'include': 'roof,bedrooms'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        result = res.data['results'][0]
+        self.assertIn('title', result)
+        self.assertEqual(result['roof']['flashing'], 'Loose')
+        self.assertEqual(len(result['bedrooms']), 2)
+        self.assertNotIn('summary', result)
+
+    def test_retrieve_report_sparse_fields(self):
+        """Test retrieving a report with only the requested fields."""
+        report = create_inspection_report(self.user)
+
+        with self.assertNumQueries(2):
+            res = self.client.get(
+                detail_url(report.id), {'fields': 'id,summary'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(res.data), {'id', 'summary'})
+        self.assertEqual(res.data['summary']['major_concerns'],
+                         'Knob and tube wiring')
+
+    def test_sparse_fields_include_id(self):
+        """Test the report id is returned with any requested fields."""
+        report = create_inspection_report(self.user)
+
+        res = self.client.get(detail_url(report.id), {'fields': 'roof'})
+        self.assertEqual(set(res.data), {'id', 'roof'})
+        res = self.client.get(REPORT_URL, {'fields': 'title'})
+        self.assertEqual(res.data['results'],
+                         [{'id': report.id, 'title': 'Sample report title'}])
+
+    def test_unknown_fields_rejected(self):
+        """Test unknown field names are listed in a bad request."""
+        report = create_inspection_report(self.user)
+
+        res = self.client.get(
+            detail_url(report.id), {'fields': 'roof,rooof,color'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['fields'], ['Unknown fields: rooof, color.'])
+
+        res = self.client.get(REPORT_URL, {'include': 'attic'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['include'], ['Unknown fields: attic.'])
+
+    def test_retrieve_report_detail_sections(self):
+        """Test report detail includes every section."""
+        report = create_inspection_report(self.user)
+
+        with self.assertNumQueries(10):
+            res = self.client.get(detail_url(report.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        serializer = InspectionReportSerializer(report)
+        data = res.json()
+        self.assertEqual(
+            data, json.loads(JSONRenderer().render(serializer.data)))
+        self.assertEqual(data['roof']['flashing'], 'Loose')
+        self.assertEqual(data['waterheater']['water_heater'],
+                         'Gas 40 gallon')
+        self.assertEqual(data['boiler']['boiler_unit'], 'Hot water')
+        self.assertEqual(data['interior']['attic'], 'Insulated')
+        self.assertEqual(len(data['bedrooms']), 2)
+        self.assertEqual(data['furnace'][0]['furnace_unit'], 'Gas')
+        self.assertEqual(data['main_panel'][0]['main_panel'], '200A')
+        self.assertEqual(data['sub_panel'][0]['sub_panel'], '100A')
+        self.assertEqual(data['evap_coil'][0]['evap_coil'], 'Clean')
+        self.assertEqual(len(data['living_room']), 1)
+        self.assertEqual(len(data['dining_room']), 1)
+
+    def test_retrieve_report_from_snapshot(self):
+        """Test repeat report detail reads are served from the snapshot."""
+        report = create_inspection_report(self.user)
+        first = self.client.get(detail_url(report.id))
+
+        with self.assertNumQueries(2):
+            res = self.client.get(detail_url(report.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, first.content)
+        snapshot = ReportSnapshot.objects.get(report=report)
+        self.assertEqual(snapshot.version, report.version)
+
+    def test_list_reports_cursor_pagination(self):
+        """Test reports are paginated newest first by cursor."""
+        reports = [create_inspection_report(self.user) for _ in range(3)]
+
+        res = self.client.get(REPORT_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in res.data['results']],
+                         [reports[2].id, reports[1].id])
+        self.assertIsNone(res.data['previous'])
+
+        with self.assertNumQueries(1):
+            res = self.client.get(res.data['next'])
+
+        self.assertEqual([r['id'] for r in res.data['results']],
+                         [reports[0].id])
+        self.assertIsNone(res.data['next'])
+
+    def test_retrieve_report_not_modified(self):
+        """Test a matching If-None-Match returns 304 from one query."""
+        report = create_inspection_report(self.user)
+        res = self.client.get(detail_url(report.id))
+        etag = res.headers['ETag']
+
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                detail_url(report.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.headers['ETag'], etag)
+
+    def test_fields_etags_differ(self):
+        """Test the ETag of one field set does not validate another."""
+        report = create_inspection_report(self.user)
+        full = self.client.get(detail_url(report.id)).headers['ETag']
+        roof = self.client.get(
+            detail_url(report.id), {'fields': 'roof'}).headers['ETag']
+
+        res = self.client.get(
+            detail_url(report.id), {'fields': 'roof'},
+            HTTP_IF_NONE_MATCH=full)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(detail_url(report.id), HTTP_IF_NONE_MATCH=roof)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(
+            detail_url(report.id), {'fields': 'roof,roof'},
+            HTTP_IF_NONE_MATCH=roof)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_retrieve_report_modified_since(self):
+        """Test If-Modified-Since returns 304 for an unchanged report."""
+        report = create_inspection_report(self.user)
+        res = self.client.get(detail_url(report.id))
+
+        res = self.client.get(
+            detail_url(report.id),
+            HTTP_IF_MODIFIED_SINCE=res.headers['Last-Modified'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_section_save_changes_etag(self):
+        """Test saving a section invalidates the report ETag."""
+        report = create_inspection_report(self.user)
+        res = self.client.get(detail_url(report.id))
+        etag = res.headers['ETag']
+
+        report.roof.flashing = 'Repaired'
+        report.roof.save()
+        res = self.client.get(
+            detail_url(report.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res.headers['ETag'], etag)
+        self.assertEqual(res.json()['roof']['flashing'], 'Repaired')
+
+    def test_create_report_with_sections(self):
+        """Test creating a report creates every section."""
+        payload = report_payload()
+
+        res = self.client.post(REPORT_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        report = InspectionReport.objects.get(id=res.data['id'])
+        self.assertEqual(report.user, self.user)
+        self.assertEqual(report.report_details.user, self.user)
+        self.assertEqual(report.roof.flashing, 'Loose')
+        self.assertEqual(report.waterheater.water_service, 'Copper')
+        self.assertEqual(report.waterheater.water_heater, 'Gas 40 gallon')
+        self.assertEqual(report.boiler.boiler_unit, 'Hot water')
+        self.assertEqual(report.interior.attic, 'Insulated')
+        self.assertEqual(len(report.bedrooms), 2)
+        self.assertEqual(
+            [p.sub_panel for p in report.sub_panels], ['100A', '60A'])
+        self.assertEqual(report.furnaces[0].furnace_unit, 'Gas')
+        self.assertEqual(report.main_panels[0].main_panel, '200A')
+        self.assertEqual(report.evap_coils[0].evap_coil, 'Clean')
+        self.assertEqual(report.living_rooms[0].living_room, 'Ok')
+        self.assertEqual(res.data['roof']['flashing'], 'Loose')
+        self.assertEqual(res.data['report_details']['title'],
+                         payload['report_details']['title'])
+
+    def test_create_report_batches_inserts(self):
+        """Test section rows are inserted with one query per table."""
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(REPORT_URL, report_payload(1), format='json')
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(REPORT_URL, report_payload(6), format='json')
+
+        inserts = [q for q in large.captured_queries
+                   if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(large.captured_queries),
+                         len(small.captured_queries))
+        self.assertEqual(len(inserts), 22)
+
+    def test_create_report_rolls_back_on_error(self):
+        """Test a failed section insert leaves no partial report."""
+        payload = report_payload()
+
+        with patch('report.bulk.Roof.objects.bulk_create',
+                   side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.client.post(REPORT_URL, payload, format='json')
+
+        self.assertFalse(ReportDetails.objects.exists())
+        self.assertFalse(models.Overview.objects.exists())
+
+    def test_import_reports_ndjson(self):
+        """Test importing reports from NDJSON returns a result per line."""
+        invalid = report_payload()
+        del invalid['report_details']
+        body = '\n'.join([
+            json.dumps(report_payload()),
+            'not json',
+            json.dumps(invalid),
+            '',
+            json.dumps(report_payload()),
+        ])
+
+        res = self.client.post(IMPORT_URL, body,
+                               content_type='application/x-ndjson')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        results = [json.loads(line)
+                   for line in b''.join(res.streaming_content).splitlines()]
+        by_line = {r['line']: r for r in results if 'line' in r}
+        self.assertEqual(by_line[1]['status'], 'created')
+        self.assertEqual(by_line[2]['status'], 'error')
+        self.assertIn('report_details', by_line[3]['errors'])
+        self.assertEqual(by_line[5]['status'], 'created')
+        self.assertEqual(results[-1],
+                         {'summary': {'created': 2, 'failed': 2}})
+        reports = InspectionReport.objects.filter(user=self.user)
+        self.assertEqual(
+            sorted(reports.values_list('id', flat=True)),
+            sorted([by_line[1]['id'], by_line[5]['id']]))
+
+    def test_import_reports_database_error(self):
+        """Test a report the database rejects fails only its own line."""
+        broken = report_payload()
+        broken['report_details']['title'] = 'Broken'
+        body = '\n'.join(json.dumps(payload) for payload in [
+            report_payload(), broken, report_payload()])
+
+        def create_reports(reports):
+            if any(data['report_details']['title'] == 'Broken'
+                   for data in reports):
+                raise DatabaseError('value "Broken" violates a constraint')
+            return bulk.create_reports(reports)
+
+        with patch('report.imports.create_reports', create_reports), \
+                self.assertLogs('report.imports', 'ERROR') as logs:
+            res = self.client.post(IMPORT_URL, body,
+                                   content_type='application/x-ndjson')
+            results = [json.loads(line) for line
+                       in b''.join(res.streaming_content).splitlines()]
+
+        self.assertEqual(
+            [result.get('status') for result in results[:3]],
+            ['created', 'error', 'created'])
+        self.assertEqual(results[1]['errors'], {
+            'non_field_errors': ['The report could not be saved.']})
+        self.assertNotIn('Broken', json.dumps(results))
+        self.assertIn('violates a constraint', logs.output[0])
+        self.assertEqual(
+            InspectionReport.objects.filter(user=self.user).count(), 2)
+
+    def test_import_reports_chunked_transactions(self):
+        """Test imported reports are inserted in chunks."""
+        body = '\n'.join(json.dumps(report_payload()) for _ in range(4))
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(f'{IMPORT_URL}?chunk_size=2', body,
+                                   content_type='application/x-ndjson')
+            b''.join(res.streaming_content)
+
+        savepoints = [q for q in queries.captured_queries
+                      if q['sql'].startswith('SAVEPOINT')]
+        self.assertEqual(len(savepoints), 2)
+        self.assertEqual(
+            InspectionReport.objects.filter(user=self.user).count(), 4)
+
+    def test_export_reports_ndjson(self):
+        """Test exporting the user's reports as NDJSON."""
+        reports = [create_inspection_report(self.user) for _ in range(3)]
+        other_user = get_user_model().objects.create_user(
+            'other@example.com',
+            'password123',
+        )
+        create_inspection_report(other_user)
+
+        res = self.client.get(EXPORT_URL)
+        with self.assertNumQueries(7):
+            lines = b''.join(res.streaming_content).splitlines()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.headers['Content-Type'], 'application/x-ndjson')
+        records = [json.loads(line) for line in lines]
+        self.assertEqual([r['id'] for r in records],
+                         [report.id for report in reports])
+        self.assertEqual(records[0]['roof']['flashing'], 'Loose')
+        self.assertEqual(len(records[0]['bedrooms']), 2)
+
+    def test_export_reports_csv(self):
+        """Test exporting reports as flattened CSV."""
+        report = create_inspection_report(self.user)
+
+        res = self.client.get(EXPORT_URL, {'export_format': 'csv'})
+        content = b''.join(res.streaming_content).decode()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.headers['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['id'], str(report.id))
+        self.assertEqual(rows[0]['roof.flashing'], 'Loose')
+        self.assertEqual(rows[0]['bedrooms.bedroom'], 'Primary\nGuest')
+        self.assertEqual(rows[0]['report_details.title'],
+                         'Sample report title')
+
+    def test_export_reports_unknown_format(self):
+        """Test an unsupported export format is a bad request."""
+        create_inspection_report(self.user)
+
+        res = self.client.get(EXPORT_URL, {'export_format': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        message = str(res.data['export_format'][0])
+        self.assertIn('"xml"', message)
+        self.assertIn('ndjson, csv', message)
+
+    def test_patch_section_updates_changed_columns(self):
+        """Test patching a section writes only the changed columns."""
+        report = create_inspection_report(self.user)
+        url = section_url(report.id, 'roof')
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(
+                url, {'flashing': 'Repaired', 'general': None},
+                format='json')
+
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['flashing'], 'Repaired')
+        updates = [q['sql'] for q in queries.captured_queries
+                   if q['sql'].startswith('UPDATE "core_roof"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"flashing"', updates[0])
+        self.assertNotIn('"general"', updates[0])
+        report.roof.refresh_from_db()
+        self.assertEqual(report.roof.flashing, 'Repaired')
+
+    def test_patch_section_unchanged_skips_write(self):
+        """Test patching a section with its stored values writes nothing."""
+        report = create_inspection_report(self.user)
+        version = report.version
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(
+                section_url(report.id, 'roof'), {'flashing': 'Loose'},
+                format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse([q for q in queries.captured_queries
+                          if q['sql'].startswith('UPDATE')])
+        report.refresh_from_db()
+        self.assertEqual(report.version, version)
+
+    def test_patch_subclass_section(self):
+        """Test patching a sub-class section only updates its table."""
+        report = create_inspection_report(self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(
+                section_url(report.id, 'waterheater'),
+                {'water_heater': 'Tankless'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['water_heater'], 'Tankless')
+        tables = [q['sql'].split('"')[1] for q in queries.captured_queries
+                  if q['sql'].startswith('UPDATE')]
+        self.assertEqual(tables, ['core_plumbing', 'core_inspectionreport'])
+
+    def test_get_section(self):
+        """Test retrieving a single report section."""
+        report = create_inspection_report(self.user)
+
+        res = self.client.get(section_url(report.id, 'summary'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['major_concerns'], 'Knob and tube wiring')
+
+    def test_section_not_found(self):
+        """Test unknown and many-valued sections return 404."""
+        report = create_inspection_report(self.user)
+
+        for section in ['not_a_section', 'bedrooms']:
+            with self.assertRaises(NoReverseMatch):
+                section_url(report.id, section)
+            res = self.client.get(f'{detail_url(report.id)}{section}/')
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_section_of_other_user_not_found(self):
+        """Test sections of another user's report cannot be patched."""
+        other_user = get_user_model().objects.create_user(
+            'other@example.com',
+            'password123',
+        )
+        report = create_inspection_report(other_user)
+
+        res = self.client.patch(section_url(report.id, 'roof'),
+                                {'flashing': 'Hacked'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        report.roof.refresh_from_db()
+        self.assertEqual(report.roof.flashing, 'Loose')
+
+    def test_partial_update_report_sections(self):
+        """Test patching a report updates the nested sections in place."""
+        report = create_inspection_report(self.user)
+
+        res = self.client.patch(
+            detail_url(report.id),
+            {'roof': {'flashing': 'Repaired'},
+             'summary': {'major_concerns': 'None'}},
+            format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        report.roof.refresh_from_db()
+        report.summary.refresh_from_db()
+        self.assertEqual(report.roof.flashing, 'Repaired')
+        self.assertEqual(report.summary.major_concerns, 'None')
+
+    def test_partial_update_adds_missing_section(self):
+        """Test patching a section the report was created without adds it."""
+        payload = report_payload()
+        del payload['garage']
+        res = self.client.post(REPORT_URL, payload, format='json')
+        report_id = res.data['id']
+
+        res = self.client.patch(
+            detail_url(report_id), {'garage': {'type': 'Carport'}},
+            format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['garage']['type'], 'Carport')
+        report = InspectionReport.objects.get(pk=report_id)
+        self.assertEqual(report.garage.type, 'Carport')
+        self.assertEqual(report.garage.report_uuid, report.report_details)
+
+    def test_partial_update_sub_section_of_parent(self):
+        """Test patching a sub-class section converts its parent row."""
+        report = create_inspection_report(self.user)
+        plumbing = models.Plumbing.objects.create(
+            report_uuid=report.report_details, water_service='Copper')
+        report.plumbing = plumbing
+        report.save()
+
+        res = self.client.patch(
+            detail_url(report.id), {'waterheater': {'water_heater': 'Tank'}},
+            format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        report = InspectionReport.objects.get(pk=report.id)
+        self.assertEqual(report.plumbing_id, plumbing.id)
+        self.assertEqual(report.waterheater.water_heater, 'Tank')
+        self.assertEqual(report.waterheater.water_service, 'Copper')
+
+    def test_partial_update_replaces_many_row_sections(self):
+        """Test patching a section with many rows replaces its rows."""
+        res = self.client.post(REPORT_URL, report_payload(), format='json')
+        report = InspectionReport.objects.get(pk=res.data['id'])
+        version = report.version
+
+        res = self.client.patch(
+            detail_url(report.id),
+            {'bedrooms': [{'bedroom': 'Primary'}],
+             'furnace': [{'furnace_unit': 'Oil'}, {'furnace_unit': 'Gas'}]},
+            format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row['bedroom'] for row in res.data['bedrooms']], ['Primary'])
+        details = report.report_details
+        self.assertEqual(
+            list(details.bedrooms_set.values_list('bedroom', flat=True)),
+            ['Primary'])
+        self.assertCountEqual(
+            models.Furnace.objects.filter(report_uuid=details)
+            .values_list('furnace_unit', flat=True),
+            ['Oil', 'Gas'])
+        self.assertFalse(models.HeatingSystem.objects.filter(
+            report_uuid=details, kind=None).exists())
+        report.refresh_from_db()
+        self.assertEqual(report.version, version + 1)
+
+    def test_full_update_replaces_many_row_sections(self):
+        """Test putting a report replaces the rows of its sections."""
+        res = self.client.post(REPORT_URL, report_payload(), format='json')
+        report_id = res.data['id']
+        payload = report_payload(bedrooms=3)
+        payload['main_panel'] = []
+
+        res = self.client.put(detail_url(report_id), payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['bedrooms']), 3)
+        self.assertEqual(res.data['main_panel'], [])
+        details = InspectionReport.objects.get(pk=report_id).report_details
+        self.assertEqual(details.bedrooms_set.count(), 3)
+        self.assertFalse(
+            models.MainPanel.objects.filter(report_uuid=details).exists())
+        self.assertEqual(
+            models.Furnace.objects.filter(report_uuid=details).count(), 1)
+
+
+class ReportPhotoApiTests(TemporaryMediaMixin, ReportTestCase):
+    """Test retrieving report photos by size."""
+
+    def setUp(self):
+        super().setUp()
+        for ordinal, name in enumerate(['first.jpg', 'roof.jpg']):
+            ReportPhoto.objects.create(
+                report=self.report, section='roof', ordinal=ordinal,
+                image=save_image(name))
+
+    def test_original_photo(self):
+        """Test the last photo of a section redirects to its original."""
+        res = self.client.get(photo_url(self.report.id, 'roof'))
+
+        self.assertEqual(res.status_code, status.HTTP_302_FOUND)
+        self.assertEqual(res['Location'], '/api/report/media/roof.jpg')
+
+    def test_legacy_field_name(self):
+        """Test sections can be named by their legacy photo column."""
+        res = self.client.get(photo_url(self.report.id, 'roof_photos'))
+
+        self.assertEqual(res.status_code, status.HTTP_302_FOUND)
+        self.assertEqual(res['Location'], '/api/report/media/roof.jpg')
+
+    def test_variant_falls_back_until_built(self):
+        """Test a variant is served once built, the original until then."""
+        url = photo_url(self.report.id, 'roof')
+
+        res = self.client.get(url, {'size': 'thumbnail'})
+        self.assertEqual(res['Location'], '/api/report/media/roof.jpg')
+
+        build_variants(workers=0)
+        res = self.client.get(url, {'size': 'thumbnail'})
+
+        self.assertEqual(res.status_code, status.HTTP_302_FOUND)
+        self.assertEqual(res['Location'],
+                         '/api/report/media/variants/roof.thumbnail.jpg')
+
+    def test_missing_variant_is_queued(self):
+        """Test requesting a variant never queued queues it."""
+        PhotoVariant.objects.all().delete()
+
+        self.client.get(photo_url(self.report.id, 'roof'),
+                        {'size': 'webp'})
+
+        self.assertEqual(PhotoVariant.objects.filter(
+            source='roof.jpg', status=PhotoVariant.PENDING).count(), 3)
+
+    def test_unknown_size(self):
+        """Test unknown sizes are rejected."""
+        res = self.client.get(photo_url(self.report.id, 'roof'),
+                              {'size': 'huge'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_empty_or_unknown_section_not_found(self):
+        """Test sections without photos and unknown ones are not found."""
+        for field in ['kitchen', 'kitchen_photos', 'report_uuid', 'save']:
+            res = self.client.get(photo_url(self.report.id, field))
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_photo_of_other_user_not_found(self):
+        """Test photos of another user's report are not found."""
+        other_user = get_user_model().objects.create_user(
+            'other@example.com',
+            'password123',
+        )
+        self.client.force_authenticate(other_user)
+
+        res = self.client.get(photo_url(self.report.id, 'roof'))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ReportPhotosApiTests(TemporaryMediaMixin, ReportTestCase):
+    """Test listing and adding report photos."""
+
+    def upload(self, section, name='photo.jpg', color='red', **params):
+        """Upload a photo to a section of the report."""
+        image = SimpleUploadedFile(
+            name, jpeg(color, size=(10, 10)), 'image/jpeg')
+        return self.client.post(
+            photos_url(self.report.id),
+            {'section': section, 'image': image, **params},
+            format='multipart',
+        )
+
+    def test_add_photos(self):
+        """Test photos are added last in their section."""
+        res = self.upload('roof', caption='Flashing')
+        self.upload('roof', color='blue')
+        self.upload('kitchen')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['caption'], 'Flashing')
+        self.assertEqual(
+            list(ReportPhoto.objects.order_by('id').values_list(
+                'section', 'ordinal')),
+            [('roof', 0), ('roof', 1), ('kitchen', 0)],
+        )
+
+    def test_add_photo_invalid_section(self):
+        """Test photos need a known section and an image."""
+        res = self.upload('attic')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('section', res.data)
+
+    def test_list_photos_grouped_in_one_query(self):
+        """Test photos are listed by section in one query."""
+        self.upload('roof', color='blue')
+        self.upload('kitchen')
+        self.upload('roof', color='green')
+
+        with self.assertNumQueries(1):
+            res = self.client.get(photos_url(self.report.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(res.data), ['roof', 'kitchen'])
+        self.assertEqual([p['ordinal'] for p in res.data['roof']], [0, 1])
+
+    def test_list_photos_empty(self):
+        """Test a report without photos lists nothing."""
+        res = self.client.get(photos_url(self.report.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {})
+
+    def test_photos_of_other_user_not_found(self):
+        """Test photos of another user's report are not found."""
+        self.upload('roof')
+        other_user = get_user_model().objects.create_user(
+            'other@example.com',
+            'password123',
+        )
+        self.client.force_authenticate(other_user)
+
+        res = self.client.get(photos_url(self.report.id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        res = self.upload('roof')
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_copy_wide_photos(self):
+        """Test the data migration copies Photos columns to rows."""
+        migration = importlib.import_module(
+            'core.migrations.0013_copy_photos_to_reportphoto')
+        first = models.Photos(report_uuid=self.report.report_details)
+        first.roof_photos.name = 'roof-1.jpg'
+        first.kitchen_photos.name = 'kitchen.jpg'
+        first.save()
+        second = models.Photos(report_uuid=self.report.report_details)
+        second.roof_photos.name = 'roof-2.jpg'
+        second.save()
+        self.report.photos = second
+        self.report.save()
+
+        migration.copy_photos(apps, None)
+
+        self.assertEqual(
+            list(ReportPhoto.objects.order_by('section', 'ordinal')
+                 .values_list('section', 'ordinal', 'image')),
+            [('kitchen', 0, 'kitchen.jpg'),
+             ('roof', 0, 'roof-1.jpg'),
+             ('roof', 1, 'roof-2.jpg')],
+        )
+
+
+class PhotoUploadApiTests(TemporaryMediaMixin, ReportTestCase):
+    """Test resumable photo uploads."""
+
+    def setUp(self):
+        super().setUp()
+        self.content = jpeg()
+
+    def start(self, **params):
+        """Start an upload of the test image."""
+        payload = {
+            'report': self.report.id,
+            'section': 'roof',
+            'filename': 'IMG_0001.JPG',
+            'size': len(self.content),
+            **params,
+        }
+        return self.client.post(UPLOADS_URL, payload, format='json')
+
+    def send(self, upload_id, offset, chunk):
+        """Send a chunk of the upload."""
+        return self.client.patch(
+            upload_url(upload_id), chunk,
+            content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_chunked_upload(self):
+        """Test uploading a photo in chunks and committing it."""
+        res = self.start(caption='Valley')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['offset'], 0)
+        upload_id = res.data['id']
+
+        half = len(self.content) // 2
+        res = self.send(upload_id, 0, self.content[:half])
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(res['Upload-Offset'], str(half))
+
+        res = self.client.head(upload_url(upload_id))
+        self.assertEqual(res['Upload-Offset'], str(half))
+
+        self.send(upload_id, half, self.content[half:])
+        res = self.client.post(commit_url(upload_id))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        photo = ReportPhoto.objects.get(id=res.data['id'])
+        self.assertEqual(photo.report, self.report)
+        self.assertEqual((photo.section, photo.caption), ('roof', 'Valley'))
+        with photo.image.open() as stored:
+            self.assertEqual(stored.read(), self.content)
+        self.assertFalse(PhotoUpload.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.media.name,
+                                                 'partial')), [])
+
+    def test_chunk_at_wrong_offset(self):
+        """Test chunks must start at the current offset."""
+        upload_id = self.start().data['id']
+        self.send(upload_id, 0, self.content[:10])
+
+        res = self.send(upload_id, 0, self.content[:10])
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res['Upload-Offset'], '10')
+
+    def test_chunk_validation(self):
+        """Test chunks need an offset header and must fit the upload."""
+        upload_id = self.start().data['id']
+
+        res = self.client.patch(
+            upload_url(upload_id), b'abc',
+            content_type='application/offset+octet-stream')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.send(upload_id, 0, self.content + b'extra')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with self.settings(PHOTO_UPLOAD_MAX_CHUNK=10):
+            res = self.send(upload_id, 0, self.content[:11])
+        self.assertEqual(res.status_code,
+                         status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    def test_commit_incomplete_or_invalid(self):
+        """Test only complete image uploads are committed."""
+        upload_id = self.start().data['id']
+        self.send(upload_id, 0, self.content[:10])
+
+        res = self.client.post(commit_url(upload_id))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        upload_id = self.start(size=9).data['id']
+        self.send(upload_id, 0, b'not image')
+
+        res = self.client.post(commit_url(upload_id))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ReportPhoto.objects.exists())
+
+    def test_start_validation(self):
+        """Test uploads need a report of the user and a bounded size."""
+        other_user = get_user_model().objects.create_user(
+            'other@example.com',
+            'password123',
+        )
+        other_report = create_inspection_report(other_user)
+
+        res = self.start(report=other_report.id)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('report', res.data)
+
+        with self.settings(PHOTO_UPLOAD_MAX_SIZE=10):
+            res = self.start()
+        self.assertIn('size', res.data)
+
+    def test_abort_upload(self):
+        """Test deleting an upload removes the received bytes."""
+        upload_id = self.start().data['id']
+        self.send(upload_id, 0, self.content[:10])
+        upload = PhotoUpload.objects.get(id=upload_id)
+        path = partial_path(upload)
+
+        res = self.client.delete(upload_url(upload_id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(os.path.exists(path))
+
+    def test_upload_of_other_user_not_found(self):
+        """Test uploads of another user cannot be written to."""
+        upload_id = self.start().data['id']
+        other_user = get_user_model().objects.create_user(
+            'other@example.com',
+            'password123',
+        )
+        self.client.force_authenticate(other_user)
+
+        res = self.send(upload_id, 0, self.content[:10])
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class MediaApiTests(TemporaryMediaMixin, ReportTestCase):
+    """Test serving report media."""
+
+    def setUp(self):
+        super().setUp()
+        self.content = jpeg()
+        self.photo = ReportPhoto(report=self.report, section='roof')
+        self.photo.image.save('roof.jpg', SimpleUploadedFile(
+            'roof.jpg', self.content), save=False)
+        self.photo.save()
+        self.url = media_url(self.photo.image.name)
+
+    def test_photo_urls_use_media_view(self):
+        """Test serialized photos link to the authenticated media view."""
+        res = self.client.get(photos_url(self.report.id))
+
+        self.assertTrue(res.data['roof'][0]['image'].endswith(self.url))
+
+    def test_serve_photo(self):
+        """Test photos of the user's reports are served."""
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(res.streaming_content), self.content)
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertEqual(res['Content-Length'], str(len(self.content)))
+        self.assertEqual(res['Accept-Ranges'], 'bytes')
+        self.assertIn('immutable', res['Cache-Control'])
+
+    def test_conditional_request(self):
+        """Test a matching ETag is answered with 304."""
+        etag = self.client.get(self.url)['ETag']
+
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+
+    def test_range_requests(self):
+        """Test byte ranges are served partially."""
+        size = len(self.content)
+        cases = [
+            ('bytes=0-9', 0, 9),
+            ('bytes=10-', 10, size - 1),
+            ('bytes=-5', size - 5, size - 1),
+            (f'bytes=5-{size + 100}', 5, size - 1),
+        ]
+        for header, start, end in cases:
+            res = self.client.get(self.url, HTTP_RANGE=header)
+
+            self.assertEqual(res.status_code,
+                             status.HTTP_206_PARTIAL_CONTENT)
+            self.assertEqual(res['Content-Range'],
+                             f'bytes {start}-{end}/{size}')
+            self.assertEqual(b''.join(res.streaming_content),
+                             self.content[start:end + 1])
+
+    def test_unsatisfiable_and_stale_ranges(self):
+        """Test bad ranges are refused and stale If-Range is ignored."""
+        size = len(self.content)
+
+        res = self.client.get(self.url, HTTP_RANGE=f'bytes={size}-')
+        self.assertEqual(res.status_code,
+                         status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(res['Content-Range'], f'bytes */{size}')
+
+        res = self.client.get(self.url, HTTP_RANGE='bytes=0-9',
+                              HTTP_IF_RANGE='"old"')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_sendfile_offload(self):
+        """Test the transfer is handed to the front server."""
+        with self.settings(MEDIA_SENDFILE='nginx'):
+            res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['X-Accel-Redirect'],
+                         f'/protected-media/{self.photo.image.name}')
+        self.assertEqual(res.content, b'')
+
+        with self.settings(MEDIA_SENDFILE='sendfile'):
+            res = self.client.get(self.url)
+
+        self.assertEqual(res['X-Sendfile'], self.photo.image.path)
+
+    def test_serve_variant_and_legacy_photo(self):
+        """Test variants and wide Photos images of the user are served."""
+        build_variants(workers=0)
+        variant = PhotoVariant.objects.get(variant='thumbnail')
+        photos = models.Photos(report_uuid=self.report.report_details)
+        photos.kitchen_photos.save('kitchen.jpg', SimpleUploadedFile(
+            'kitchen.jpg', b'kitchen'))
+
+        res = self.client.get(media_url(variant.image.name))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('no-cache', res['Cache-Control'])
+
+        res = self.client.get(media_url(photos.kitchen_photos.name))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_media_of_other_user_not_found(self):
+        """Test media of other users and unknown names are not served."""
+        other_user = get_user_model().objects.create_user(
+            'other@example.com',
+            'password123',
+        )
+        client = APIClient()
+        client.force_authenticate(other_user)
+
+        res = client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        for name in ['unknown.jpg', '../roof.jpg', 'blobs/../../etc/passwd']:
+            res = self.client.get('/api/report/media/' + name)
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_auth_required(self):
+        """Test media is not served without authentication."""
+        res = APIClient().get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ReportDocumentApiTests(ReportTestCase):
+    """Test rendering report documents."""
+
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+
+    def test_render_html(self):
+        """Test the HTML document holds the report's sections."""
+        res = self.client.get(document_url(self.report.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'text/html; charset=utf-8')
+        html = res.content.decode()
+        self.assertIn('<title>Sample report title</title>', html)
+        self.assertIn('<section id="roof">', html)
+        self.assertIn('Loose', html)
+        self.assertIn('Guest', html)
+
+    def test_edit_rerenders_only_changed_section(self):
+        """Test fragments of unchanged sections come from the cache."""
+        self.client.get(document_url(self.report.id))
+        self.client.patch(section_url(self.report.id, 'roof'),
+                          {'flashing': 'Repaired'}, format='json')
+
+        with patch('report.documents.render_section',
+                   wraps=documents.render_section) as render_section:
+            res = self.client.get(document_url(self.report.id))
+
+        self.assertEqual(
+            [c.args[0] for c in render_section.call_args_list], ['roof'])
+        self.assertIn('Repaired', res.content.decode())
+        self.assertNotIn('Loose', res.content.decode())
+
+    def test_unsupported_format(self):
+        """Test unknown or unavailable formats are rejected."""
+        with patch('report.documents.weasyprint', None):
+            res = self.client.get(document_url(self.report.id),
+                                  {'document_format': 'pdf'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_document_of_other_user_not_found(self):
+        """Test documents of another user's report are not found."""
+        other_user = get_user_model().objects.create_user(
+            'other@example.com',
+            'password123',
+        )
+        self.client.force_authenticate(other_user)
+
+        res = self.client.get(document_url(self.report.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,199 @@
+"""
+Tests for full-text search of report findings.
+"""
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework import status
+
+from core.models import InspectionReport, ReportSearch
+from report.tests.helpers import (
+    REPORT_URL,
+    SEARCH_URL,
+    AuthenticatedTestCase,
+    create_inspection_report,
+    detail_url,
+    report_payload,
+    section_url,
+)
+
+
+class ReportSearchApiTests(AuthenticatedTestCase):
+    """Test searching the findings of reports."""
+
+    def create(self, **sections):
+        """Create a report through the API and return its id."""
+        res = self.client.post(
+            REPORT_URL, {**report_payload(), **sections}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res.data['id']
+
+    def search(self, text):
+        """Return the ids of the reports matching a search."""
+        res = self.client.get(SEARCH_URL, {'q': text})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [result['id'] for result in res.data['results']]
+
+    def test_search_ranks_summary_first(self):
+        """Test matches in the summary rank above other sections."""
+        in_furnace = self.create()
+        in_summary = self.create(
+            summary={'major_concerns': 'Gas smell near meter'})
+        self.create(furnace=[{'furnace_unit': 'Electric'}],
+                    waterheater={'water_heater': 'Electric'})
+
+        self.assertEqual(self.search('gas'), [in_summary, in_furnace])
+
+    def test_search_returns_headline(self):
+        """Test results highlight the matched words with their section."""
+        report_id = self.create()
+
+        res = self.client.get(SEARCH_URL, {'q': 'knob wiring'})
+
+        self.assertEqual(res.data['count'], 1)
+        result = res.data['results'][0]
+        self.assertEqual(result['id'], report_id)
+        self.assertEqual(result['title'], 'Sample report title')
+        self.assertGreater(result['rank'], 0)
+        self.assertIn('Summary / major concerns: <mark>Knob</mark>',
+                      result['headline'])
+        self.assertIn('<mark>wiring</mark>', result['headline'])
+
+    def test_search_web_syntax(self):
+        """Test quoted phrases and excluded words are supported."""
+        cracked = self.create()
+        self.create(grounds={'patio': 'Level'},
+                    basement={'foundation': 'Poured'})
+
+        self.assertEqual(self.search('"foundation crack"'), [cracked])
+        self.assertEqual(self.search('"crack foundation"'), [])
+        self.assertEqual(self.search('vinyl -level'), [cracked])
+
+    def test_search_limited_to_user(self):
+        """Test only the reports of the user are searched."""
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(other)
+        self.create()
+        self.client.force_authenticate(self.user)
+
+        self.assertEqual(self.search('knob'), [])
+
+    def test_search_requires_query(self):
+        """Test searching without words is a bad request."""
+        res = self.client.get(SEARCH_URL, {'q': ' '})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('q', res.data)
+
+    def test_section_patch_reindexes(self):
+        """Test a saved section is searchable once committed."""
+        report_id = self.create()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.patch(
+                section_url(report_id, 'roof'), {'flashing': 'Sagging'},
+                format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.search('sagging'), [report_id])
+        self.assertEqual(self.search('loose'), [])
+
+    def test_report_patch_reindexes_once(self):
+        """Test patching several sections reindexes the report once."""
+        report_id = self.create()
+
+        with CaptureQueriesContext(connection) as queries, \
+                self.captureOnCommitCallbacks(execute=True):
+            res = self.client.patch(detail_url(report_id), {
+                'report_details': {'title': 'Lakeside cottage'},
+                'roof': {'flashing': 'Sagging'},
+                'kitchen': {'countertops': 'Marble'},
+            }, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        upserts = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('INSERT INTO "core_reportsearch"')
+        ]
+        self.assertEqual(len(upserts), 1)
+        self.assertEqual(self.search('lakeside sagging marble'), [report_id])
+
+    def test_report_put_reindexes_replaced_rows(self):
+        """Test replaced rows of a section are searchable once committed."""
+        report_id = self.create()
+        payload = report_payload()
+        payload['bedrooms'] = [{'bedroom': 'Nursery'}]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.put(
+                detail_url(report_id), payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.search('nursery'), [report_id])
+
+    def test_rolled_back_changes_not_reindexed(self):
+        """Test reports changed in a rolled back transaction are dropped."""
+        rolled_back = InspectionReport.objects.get(pk=self.create())
+        report_id = self.create()
+
+        with self.assertRaises(DatabaseError):
+            with transaction.atomic():
+                rolled_back.roof.flashing = 'Sagging'
+                rolled_back.roof.save()
+                raise DatabaseError()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.client.patch(
+                section_url(report_id, 'roof'), {'flashing': 'Sagging'},
+                format='json')
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(callbacks[0].__self__.details_ids,
+                         {InspectionReport.objects.get(
+                             pk=report_id).report_details_id})
+        self.assertEqual(self.search('sagging'), [report_id])
+
+    @override_settings(REPORT_SECTION_LAYOUT='document')
+    def test_document_layout(self):
+        """Test reports in the document layout are searched alike."""
+        report_id = self.create()
+        self.assertEqual(self.search('knob'), [report_id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                section_url(report_id, 'summary'),
+                {'major_concerns': 'Asbestos tape'}, format='json')
+
+        self.assertEqual(self.search('asbestos'), [report_id])
+        self.assertEqual(self.search('knob'), [])
+
+
+class ReindexReportsCommandTests(TestCase):
+    """Test rebuilding the search rows of reports."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+
+    def test_reindex_missing(self):
+        """Test reports without a search row are indexed."""
+        reports = [create_inspection_report(self.user) for _ in range(3)]
+        self.assertFalse(ReportSearch.objects.exists())
+
+        out = StringIO()
+        call_command('reindex_reports', missing=True, batch_size=2,
+                     stdout=out)
+
+        self.assertIn('Indexed 3 reports', out.getvalue())
+        search = ReportSearch.objects.get(report=reports[0])
+        self.assertEqual(search.user, self.user)
+        self.assertIn('Roof / flashing: Loose', search.text)
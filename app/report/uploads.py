@@ -0,0 +1,137 @@
+"""
+Resumable chunked uploads of report photos.
+"""
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from PIL import Image
+
+from core.models import PhotoUpload, ReportPhoto
+
+
+COPY_BUFFER_SIZE = 64 * 1024
+
+
+class UploadConflict(Exception):
+    """Raised when a chunk does not start at the upload's offset."""
+
+
+class UploadIncomplete(Exception):
+    """Raised when committing an upload missing bytes or not an image."""
+
+
+def upload_dir():
+    """Return the directory partial uploads are written to."""
+    return getattr(settings, 'PHOTO_UPLOAD_DIR', None) \
+        or os.path.join(settings.MEDIA_ROOT, 'partial')
+
+
+def partial_path(upload):
+    """Return the path of the bytes received for an upload."""
+    return os.path.join(upload_dir(), str(upload.pk))
+
+
+def next_photo_ordinal(report, section):
+    """Return the ordinal placing a new photo last in its section."""
+    last = ReportPhoto.objects.filter(
+        report=report, section=section,
+    ).aggregate(last=Max('ordinal'))['last']
+
+    return 0 if last is None else last + 1
+
+
+def write_chunk(upload, stream, offset, length):
+    """Write `length` bytes of a stream at `offset`, returning the offset.
+
+    The body is copied in small buffers, so memory use does not depend
+    on the chunk size. Bytes received before a dropped connection are
+    kept, and the client resumes from the offset recorded here. The
+    offset only moves forward from the value the chunk started at, so a
+    concurrent chunk for the same offset raises UploadConflict.
+    """
+    if offset != upload.offset:
+        raise UploadConflict()
+
+    os.makedirs(upload_dir(), exist_ok=True)
+    fd = os.open(partial_path(upload), os.O_WRONLY | os.O_CREAT, 0o600)
+    written = 0
+    try:
+        with os.fdopen(fd, 'wb') as partial:
+            partial.seek(offset)
+            while written < length:
+                buffer = stream.read(min(COPY_BUFFER_SIZE, length - written))
+                if not buffer:
+                    break
+                partial.write(buffer)
+                written += len(buffer)
+    finally:
+        updated = PhotoUpload.objects.filter(
+            pk=upload.pk, offset=offset,
+        ).update(offset=offset + written, updated=timezone.now())
+
+    if not updated:
+        raise UploadConflict()
+    upload.offset = offset + written
+
+    return upload.offset
+
+
+def commit_upload(upload):
+    """Attach a completed upload to its report as a photo.
+
+    The received file is streamed into photo storage and removed along
+    with the upload session.
+    """
+    path = partial_path(upload)
+    with transaction.atomic():
+        upload = PhotoUpload.objects.select_for_update().select_related(
+            'report').filter(pk=upload.pk).first()
+        if upload is None or upload.offset != upload.size \
+                or not os.path.exists(path):
+            raise UploadIncomplete('Upload is missing bytes.')
+        try:
+            with Image.open(path) as image:
+                image.verify()
+        except (OSError, ValueError, Image.DecompressionBombError):
+            raise UploadIncomplete('Upload is not a valid image.')
+
+        photo = ReportPhoto(
+            report=upload.report,
+            section=upload.section,
+            caption=upload.caption,
+            ordinal=next_photo_ordinal(upload.report, upload.section),
+        )
+        with open(path, 'rb') as received:
+            photo.image.save(upload.filename, File(received), save=False)
+        photo.save()
+        discard_upload(upload)
+
+    return photo
+
+
+def discard_upload(upload):
+    """Delete an upload session and the bytes received for it."""
+    path = partial_path(upload)
+    upload.delete()
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def expire_uploads(max_age=timedelta(days=1)):
+    """Discard uploads not written to for `max_age`, returning how many."""
+    expired = PhotoUpload.objects.filter(
+        updated__lt=timezone.now() - max_age)
+    count = 0
+    for upload in expired.iterator():
+        discard_upload(upload)
+        count += 1
+
+    return count
@@ -13,6 +13,7 @@ from report import views
 
 router = DefaultRouter()
 router.register('reports', views.InspectionReportViewSet, basename='report')
+router.register('uploads', views.PhotoUploadViewSet, basename='upload')
 # router.register('tags', views.TagViewSet)
 # router.register('ingredients', views.IngredientViewSet)
 
@@ -20,4 +21,5 @@ app_name = 'report'
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('media/<path:name>', views.MediaView.as_view(), name='media'),
 ]
@@ -9,44 +9,600 @@ from drf_spectacular.utils import (
 )
 
 
+import hashlib
+import json
+
+from django.conf import settings
+from django.urls import reverse
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseRedirect,
+    StreamingHttpResponse,
+)
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
 from rest_framework import (
     mixins,
+    status,
     viewsets,
 )
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
+from user.authentication import CachedTokenAuthentication
+from core import derivatives
 from core.models import (
     InspectionReport,
+    PhotoUpload,
+    PhotoVariant,
+    ReportPhoto,
+    ReportSearch,
+)
+from report import (
+    documents,
+    exports,
+    imports,
+    media,
+    search,
+    serializers,
+    snapshots,
+    uploads,
 )
-from report import serializers
+from report.pagination import (
+    ReportCursorPagination,
+    ReportSearchPagination,
+)
+from report.planner import plan_report_queryset
 
 
+@extend_schema_view(
+    list=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'fields',
+                OpenApiTypes.STR,
+                description='Comma separated list of fields to return.',
+            ),
+            OpenApiParameter(
+                'include',
+                OpenApiTypes.STR,
+                description='Comma separated list of sections to add.',
+            ),
+        ]
+    ),
+    retrieve=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'fields',
+                OpenApiTypes.STR,
+                description='Comma separated list of fields to return.',
+            ),
+        ]
+    ),
+)
 class InspectionReportViewSet(viewsets.ModelViewSet):
     """View for manage report APIs."""
     serializer_class = serializers.InspectionReportSerializer
     queryset = InspectionReport.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = ReportCursorPagination
+    max_import_chunk_size = 1000
+
+    def _params_to_list(self, param):
+        """Convert a comma separated query param to a list of strings."""
+        value = self.request.query_params.get(param, '')
+        return [name for name in value.split(',') if name]
+
+    def _params_to_fields(self, param):
+        """Return the field names of a parameter, rejecting unknown ones."""
+        names = self._params_to_list(param)
+        known = self.get_serializer_class()().fields
+        unknown = [name for name in names if name not in known]
+        if unknown:
+            raise ValidationError(
+                {param: [f'Unknown fields: {", ".join(unknown)}.']})
+        return names
+
+    def get_requested_fields(self):
+        """Return the fields to render, or None for every field.
+
+        Requested fields always include the report id.
+        """
+        if self.action == 'section':
+            return [self.kwargs['section']]
+        if self.request.method != 'GET' or self.action == 'document':
+            return None
+        fields = self._params_to_fields('fields')
+        if fields:
+            return ['id', *fields] if 'id' not in fields else fields
+        if self.action == 'list':
+            return (serializers.InspectionReportListSerializer.default_fields
+                    + self._params_to_fields('include'))
+        return None
 
     def get_queryset(self):
         """Retrieve report details for authenticated user."""
-        queryset = self.queryset
-
-        return queryset.filter(
+        queryset = self.queryset.filter(
             user=self.request.user
-            ).order_by('-report_details_id').distinct()
+            ).order_by('-id')
+
+        return plan_report_queryset(queryset, self.get_requested_fields())
 
     def get_serializer_class(self):
         """Return the serializer class for request."""
         if self.action == 'list':
-            return serializers.InspectionReportSerializer
+            return serializers.InspectionReportListSerializer
         return self.serializer_class
 
+    def get_serializer(self, *args, **kwargs):
+        """Return the serializer restricted to the requested fields."""
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a report, answering conditional requests early."""
+        try:
+            version = InspectionReport.objects.filter(
+                user=request.user, pk=kwargs['pk'],
+            ).values('version', 'modified').first()
+        except (TypeError, ValueError):
+            version = None
+        if version is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        etag = quote_etag(self._representation_version(version['version']))
+        last_modified = int(version['modified'].timestamp())
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            not_modified.headers['ETag'] = etag
+            return not_modified
+
+        if self.get_requested_fields() is None \
+                and request.accepted_renderer.format == 'json':
+            content = snapshots.load_snapshot(
+                kwargs['pk'], version['version'])
+            if content is None:
+                content = snapshots.save_snapshots(
+                    [self.get_object()])[0].content
+            response = HttpResponse(content, content_type='application/json')
+        else:
+            response = super().retrieve(request, *args, **kwargs)
+        response.headers['ETag'] = etag
+        response.headers['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def _representation_version(self, version):
+        """Return the version of the report as rendered for the request.
+
+        Each set of requested fields is a different representation, so
+        its version carries a digest of the field names.
+        """
+        fields = self.get_requested_fields()
+        if fields is None:
+            return str(version)
+        names = ','.join(sorted(set(fields)))
+        digest = hashlib.blake2b(names.encode(), digest_size=8).hexdigest()
+        return f'{version}-{digest}'
+
     def perform_create(self, serializer):
-        """Create a new report."""
+        """Create a new report, reloading it to render the response.
+
+        The report is read back through the planned queryset, so the
+        sections with many rows are not fetched row by row.
+        """
+        report = serializer.save(user=self.request.user)
+        serializer.instance = self.get_queryset().get(pk=report.pk)
+
+    @extend_schema(
+        methods=['GET'],
+        operation_id='report_reports_section_retrieve',
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    @extend_schema(
+        methods=['PATCH'],
+        operation_id='report_reports_section_partial_update',
+        request=OpenApiTypes.OBJECT,
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    @action(methods=['GET', 'PATCH'], detail=True,
+            url_path=r'(?P<section>(?:{}))'.format(
+                '|'.join(serializers.SECTION_NAMES)),
+            url_name='section')
+    def section(self, request, pk=None, section=None):
+        """Retrieve or partially update a single report section.
+
+        PATCH compares the submitted values with the stored row and saves
+        only the changed columns, skipping the write when nothing changed.
+        Sections of reports in the document layout are merged into the
+        findings document the same way. Report details are a row in
+        either layout.
+        """
+        report_serializer = serializers.InspectionReportSerializer()
+        field = report_serializer.fields[section]
+        report = self.get_object()
+        if (report.findings is not None
+                and section in report_serializer.section_fields()):
+            return self._findings_section(request, report, section, field)
+        instance = getattr(report, field.source)
+        if instance is None:
+            raise Http404
+
+        serializer_class = type(field)
+        if request.method == 'GET':
+            return Response(serializer_class(instance).data)
+
+        serializer = serializer_class(
+            instance, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializers.save_changed_fields(instance, serializer.validated_data)
+
+        return Response(serializer.data)
+
+    def _findings_section(self, request, report, section, field):
+        """Retrieve or update a section of a report's findings document."""
+        data = report.findings.get(section)
+        if data is None:
+            raise Http404
+        if request.method == 'PATCH':
+            serializer = type(field)(data=request.data, partial=True)
+            serializer.is_valid(raise_exception=True)
+            data = serializers.merge_section(
+                field, data, serializer.validated_data)
+            serializers.save_changed_fields(
+                report, {'findings': {**report.findings, section: data}},
+                extra_fields=['version', 'modified'])
+
+        return Response(serializers.ordered_section(field, data))
+
+    @extend_schema(
+        responses={
+            (200, 'text/html'): OpenApiTypes.STR,
+            (200, 'application/pdf'): OpenApiTypes.BINARY,
+        },
+        parameters=[
+            OpenApiParameter(
+                'document_format',
+                OpenApiTypes.STR, enum=['html', 'pdf'],
+                description='Render as HTML (default) or PDF.',
+            ),
+        ],
+    )
+    @action(methods=['GET'], detail=True, url_path='document',
+            url_name='document')
+    def document(self, request, pk=None):
+        """Render the formatted report as an HTML or PDF document."""
+        document_format = request.query_params.get('document_format', 'html')
+        if document_format not in documents.document_formats():
+            raise ValidationError({'document_format': [
+                f'Unsupported document format "{document_format}".']})
+
+        content = documents.render_document(
+            self.get_object(), document_format)
+        content_type = {
+            'html': 'text/html; charset=utf-8',
+            'pdf': 'application/pdf',
+        }[document_format]
+        response = HttpResponse(content, content_type=content_type)
+        if document_format == 'pdf':
+            response.headers['Content-Disposition'] = (
+                f'inline; filename="report-{pk}.pdf"')
+        return response
+
+    @extend_schema(
+        methods=['GET'],
+        operation_id='report_reports_photos_list',
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    @extend_schema(
+        methods=['POST'],
+        operation_id='report_reports_photos_create',
+        request={'multipart/form-data': serializers.ReportPhotoSerializer},
+        responses={201: serializers.ReportPhotoSerializer},
+    )
+    @action(methods=['GET', 'POST'], detail=True, url_path='photos',
+            url_name='photos')
+    def photos(self, request, pk=None):
+        """List the photos of a report grouped by section, or add one.
+
+        Photos are read in one query on the (report, section, ordinal)
+        index. New photos are placed last in their section.
+        """
+        if request.method == 'POST':
+            report = get_object_or_404(
+                InspectionReport, user=request.user, pk=pk)
+            serializer = serializers.ReportPhotoSerializer(
+                data=request.data, context=self.get_serializer_context())
+            serializer.is_valid(raise_exception=True)
+            serializer.save(report=report, ordinal=uploads.next_photo_ordinal(
+                report, serializer.validated_data['section']))
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+        try:
+            photos = list(ReportPhoto.objects.filter(
+                report__user=request.user, report_id=pk,
+            ).order_by('section', 'ordinal', 'id'))
+        except (TypeError, ValueError):
+            raise Http404
+        if not photos:
+            get_object_or_404(InspectionReport, user=request.user, pk=pk)
+
+        grouped = {section: [] for section, _ in ReportPhoto.SECTION_CHOICES}
+        data = serializers.ReportPhotoSerializer(
+            photos, many=True, context=self.get_serializer_context()).data
+        for photo in data:
+            grouped[photo['section']].append(photo)
+
+        return Response(
+            {section: rows for section, rows in grouped.items() if rows})
+
+    @extend_schema(
+        responses={302: None},
+        parameters=[
+            OpenApiParameter(
+                'size',
+                OpenApiTypes.STR,
+                enum=['original', *derivatives.photo_variants()],
+                description='Variant of the photo to return.',
+            ),
+        ],
+    )
+    @action(methods=['GET'], detail=True,
+            url_path=r'photos/(?P<field>[a-z_]+)', url_name='photo')
+    def photo(self, request, pk=None, field=None):
+        """Redirect to the last photo of a section at the requested size.
+
+        Sections can also be named by their legacy photo column, such as
+        `roof_photos`. The original is returned while the variant is
+        still being built.
+        """
+        try:
+            photo = ReportPhoto.objects.filter(
+                report__user=request.user, report_id=pk,
+                section=field.removesuffix('_photos'),
+            ).order_by('-ordinal', '-id').first()
+        except (TypeError, ValueError):
+            photo = None
+        if photo is None:
+            raise Http404
+        image = photo.image
+
+        size = request.query_params.get('size', 'original')
+        if size != 'original':
+            if size not in derivatives.photo_variants():
+                raise ValidationError({'size': [f'Unknown size "{size}".']})
+            variant = PhotoVariant.objects.filter(
+                source=image.name, variant=size).first()
+            if variant is None:
+                derivatives.enqueue_variants([image.name])
+            elif variant.status == PhotoVariant.DONE:
+                image = variant.image
+
+        return HttpResponseRedirect(
+            reverse('report:media', args=[image.name]))
+
+    @extend_schema(
+        request={'application/x-ndjson': OpenApiTypes.STR},
+        responses={200: OpenApiTypes.STR},
+        parameters=[
+            OpenApiParameter(
+                'chunk_size',
+                OpenApiTypes.INT,
+                description='Number of reports inserted per transaction.',
+            ),
+        ],
+    )
+    @action(methods=['POST'], detail=False, url_path='import',
+            url_name='import')
+    def import_reports(self, request):
+        """Import reports from a newline-delimited JSON body."""
+        try:
+            chunk_size = int(request.query_params.get('chunk_size', 100))
+        except ValueError:
+            chunk_size = 100
+        chunk_size = min(max(chunk_size, 1), self.max_import_chunk_size)
+
+        results = imports.import_reports(
+            request.stream or [], request.user, chunk_size)
+        lines = (
+            json.dumps(result) + '\n'
+            for result in imports.with_summary(results)
+        )
+        return StreamingHttpResponse(
+            lines, content_type='application/x-ndjson')
+
+    @extend_schema(
+        responses={200: OpenApiTypes.STR},
+        parameters=[
+            OpenApiParameter(
+                'export_format',
+                OpenApiTypes.STR, enum=exports.EXPORT_FORMATS,
+                description='Export as NDJSON (default) or flattened CSV.',
+            ),
+        ],
+    )
+    @action(methods=['GET'], detail=False, url_path='export',
+            url_name='export')
+    def export_reports(self, request):
+        """Stream every report of the user with all sections."""
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in exports.EXPORT_FORMATS:
+            supported = ', '.join(exports.EXPORT_FORMATS)
+            raise ValidationError({'export_format': [
+                f'Unsupported export format "{export_format}". '
+                f'Supported formats: {supported}.']})
+
+        queryset = InspectionReport.objects.filter(user=request.user)
+        lines = exports.export_lines(queryset, export_format)
+        content_type = {
+            'ndjson': 'application/x-ndjson',
+            'csv': 'text/csv',
+        }[export_format]
+        response = StreamingHttpResponse(lines, content_type=content_type)
+        response.headers['Content-Disposition'] = (
+            f'attachment; filename="reports.{export_format}"')
+        return response
+
+    @extend_schema(
+        responses={200: serializers.ReportSearchSerializer(many=True)},
+        parameters=[
+            OpenApiParameter(
+                'q',
+                OpenApiTypes.STR,
+                required=True,
+                description='Words to find in the report findings. Quoted '
+                            'phrases, OR and -excluded words are supported.',
+            ),
+        ],
+    )
+    @action(methods=['GET'], detail=False, url_path='search',
+            url_name='search', pagination_class=ReportSearchPagination)
+    def search_reports(self, request):
+        """Search the findings of the user's reports, best match first.
+
+        Matches in the summary rank above those in the report details,
+        which rank above the other sections. Each result has a headline
+        of the matching findings with the matched words in <mark> tags.
+        """
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            raise ValidationError({'q': ['This query parameter is required.']})
+
+        results = search.search_reports(
+            ReportSearch.objects.filter(user=request.user), text)
+        page = self.paginate_queryset(results)
+        serializer = serializers.ReportSearchSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class PhotoUploadViewSet(mixins.CreateModelMixin,
+                         mixins.RetrieveModelMixin,
+                         mixins.DestroyModelMixin,
+                         viewsets.GenericViewSet):
+    """Resumable uploads of report photos.
+
+    Create a session with the photo's size, PATCH the bytes in chunks
+    starting at the `Upload-Offset` header, read the offset back after a
+    dropped connection and commit once every byte arrived.
+    """
+    serializer_class = serializers.PhotoUploadSerializer
+    queryset = PhotoUpload.objects.all()
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """Retrieve uploads of the authenticated user."""
+        return self.queryset.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        """Create a new upload session."""
         serializer.save(user=self.request.user)
 
+    def perform_destroy(self, instance):
+        """Abort an upload, removing the bytes received."""
+        uploads.discard_upload(instance)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Return the upload with the offset to resume from."""
+        response = super().retrieve(request, *args, **kwargs)
+        response.headers['Upload-Offset'] = str(response.data['offset'])
+        return response
+
+    @extend_schema(
+        request={'application/offset+octet-stream': OpenApiTypes.BINARY},
+        responses={204: None},
+        parameters=[
+            OpenApiParameter(
+                'Upload-Offset',
+                OpenApiTypes.INT,
+                location=OpenApiParameter.HEADER,
+                required=True,
+                description='Offset of the first byte of the chunk.',
+            ),
+        ],
+    )
+    def partial_update(self, request, *args, **kwargs):
+        """Write a chunk of the photo at the given offset."""
+        upload = self.get_object()
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers.get('Content-Length') or 0)
+        except (KeyError, ValueError):
+            raise ValidationError(
+                {'Upload-Offset': ['An integer offset header is required.']})
+        if length > settings.PHOTO_UPLOAD_MAX_CHUNK:
+            return Response(status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        if offset + length > upload.size:
+            raise ValidationError(
+                {'Upload-Offset': ['Chunk ends past the upload size.']})
+
+        try:
+            uploads.write_chunk(upload, request.stream, offset, length)
+        except uploads.UploadConflict:
+            upload.refresh_from_db(fields=['offset'])
+            return Response(
+                status=status.HTTP_409_CONFLICT,
+                headers={'Upload-Offset': str(upload.offset)},
+            )
+        return Response(
+            status=status.HTTP_204_NO_CONTENT,
+            headers={'Upload-Offset': str(upload.offset)},
+        )
+
+    @extend_schema(
+        request=None,
+        responses={201: serializers.ReportPhotoSerializer},
+    )
+    @action(methods=['POST'], detail=True, url_path='commit',
+            url_name='commit')
+    def commit(self, request, pk=None):
+        """Attach a completed upload to its report as a photo."""
+        try:
+            photo = uploads.commit_upload(self.get_object())
+        except uploads.UploadIncomplete as exc:
+            raise ValidationError({'non_field_errors': [str(exc)]})
+
+        serializer = serializers.ReportPhotoSerializer(
+            photo, context=self.get_serializer_context())
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class MediaView(APIView):
+    """Serve a photo of the authenticated user's reports.
+
+    Only ownership is checked in Python; the bytes are sent by the
+    front server when MEDIA_SENDFILE is configured.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        responses={
+            (200, 'application/octet-stream'): OpenApiTypes.BINARY,
+            (206, 'application/octet-stream'): OpenApiTypes.BINARY,
+            304: None,
+        },
+    )
+    def get(self, request, name):
+        """Return a media file after checking the user may see it."""
+        if not media.is_safe_name(name) \
+                or not media.user_can_access(request.user, name):
+            raise Http404
+        try:
+            return media.serve(request, name)
+        except FileNotFoundError:
+            raise Http404
+
 
 @extend_schema_view(
     list=extend_schema(
@@ -0,0 +1,174 @@
+"""
+Cached token authentication for the API.
+"""
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from core.metrics import AUTH_FAILURES, count_cache
+
+
+class TokenCache:
+    """LRU cache of authenticated tokens with a time to live.
+
+    The cache is off unless TOKEN_CACHE_ALIAS names a Django cache
+    shared by every worker, as a worker could otherwise keep accepting
+    a token revoked through another. Entries live in that backend and
+    in process memory. Each user has a generation in the backend,
+    replaced on every invalidation; entries cached under another
+    generation, by any worker, are treated as misses.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._user_keys = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'TOKEN_CACHE_TTL', 300)
+
+    @property
+    def maxsize(self):
+        return getattr(settings, 'TOKEN_CACHE_SIZE', 1024)
+
+    @property
+    def shared(self):
+        alias = getattr(settings, 'TOKEN_CACHE_ALIAS', None)
+        return caches[alias] if alias else None
+
+    @property
+    def enabled(self):
+        return self.shared is not None
+
+    def get(self, key):
+        """Return the cached (user, token) for a key, or None."""
+        shared = self.shared
+        if shared is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._discard(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None:
+            _, user, token, generation = entry
+            if generation == self._generation(shared, user.pk):
+                return copy.copy(user), token
+            with self._lock:
+                self._discard(key)
+
+        entry = shared.get(f'token-auth:{key}')
+        if entry is not None:
+            user, token, generation = entry
+            if generation == self._generation(shared, user.pk):
+                self._store(key, user, token, generation)
+                return copy.copy(user), token
+
+        return None
+
+    def set(self, key, user, token):
+        """Cache the user and token authenticated by a key."""
+        shared = self.shared
+        if shared is None:
+            return
+        shared.add(f'token-auth-gen:{user.pk}', uuid.uuid4().hex,
+                   timeout=None)
+        generation = self._generation(shared, user.pk)
+        shared.set(f'token-auth:{key}', (user, token, generation),
+                   timeout=self.ttl)
+        self._store(key, user, token, generation)
+
+    def invalidate(self, key, user_pk):
+        """Drop a token of a user from the cache of every worker."""
+        with self._lock:
+            self._discard(key)
+        shared = self.shared
+        if shared is not None:
+            shared.delete(f'token-auth:{key}')
+            self._next_generation(shared, user_pk)
+
+    def invalidate_user(self, user_pk):
+        """Drop every token of a user from the cache of every worker."""
+        with self._lock:
+            for key in list(self._user_keys.get(user_pk, ())):
+                self._discard(key)
+        shared = self.shared
+        if shared is not None:
+            self._next_generation(shared, user_pk)
+
+    def clear(self):
+        """Drop every entry held in process memory."""
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+
+    def _generation(self, shared, user_pk):
+        return shared.get(f'token-auth-gen:{user_pk}')
+
+    def _next_generation(self, shared, user_pk):
+        shared.set(f'token-auth-gen:{user_pk}', uuid.uuid4().hex,
+                   timeout=None)
+
+    def _store(self, key, user, token, generation):
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (
+                time.monotonic() + self.ttl, user, token, generation)
+            self._user_keys.setdefault(user.pk, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._user_keys.get(entry[1].pk)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._user_keys[entry[1].pk]
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that caches the token and user lookup."""
+
+    def authenticate_credentials(self, key):
+        if not token_cache.enabled:
+            return self._lookup_credentials(key)
+
+        cached = token_cache.get(key)
+        if cached is None:
+            count_cache('token', misses=1)
+            user, token = self._lookup_credentials(key)
+            token_cache.set(key, user, token)
+            return user, token
+
+        count_cache('token', hits=1)
+        user, token = cached
+        if not user.is_active:
+            AUTH_FAILURES.inc(reason='token')
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.'))
+
+        return user, token
+
+    def _lookup_credentials(self, key):
+        try:
+            return super().authenticate_credentials(key)
+        except exceptions.AuthenticationFailed:
+            AUTH_FAILURES.inc(reason='token')
+            raise
@@ -0,0 +1,66 @@
+"""
+Password hashers for the API.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+_hashing_slots = threading.BoundedSemaphore(
+    getattr(settings, 'PASSWORD_HASHER_CONCURRENCY', 2))
+_held = threading.local()
+
+
+class HasherBusy(Exception):
+    """Raised when no password hashing slot frees up in time."""
+
+
+@contextmanager
+def hashing_slot():
+    """Hold one of the process' password hashing slots.
+
+    Hashing is CPU bound, so capping the number of concurrent hashes
+    leaves worker threads free for other requests during login bursts.
+    A thread already holding a slot, as verify() does when it calls
+    encode(), keeps using it.
+    """
+    if getattr(_held, 'slot', False):
+        yield
+        return
+
+    timeout = getattr(settings, 'PASSWORD_HASHER_TIMEOUT', 5)
+    if not _hashing_slots.acquire(timeout=timeout):
+        raise HasherBusy()
+    _held.slot = True
+    try:
+        yield
+    finally:
+        _held.slot = False
+        _hashing_slots.release()
+
+
+class ConcurrencyLimitMixin:
+    """Run password hashing inside a hashing slot."""
+
+    def encode(self, *args, **kwargs):
+        with hashing_slot():
+            return super().encode(*args, **kwargs)
+
+    def verify(self, *args, **kwargs):
+        with hashing_slot():
+            return super().verify(*args, **kwargs)
+
+
+class ScryptPasswordHasher(ConcurrencyLimitMixin,
+                           hashers.ScryptPasswordHasher):
+    """Scrypt hasher with the cost taken from settings."""
+    work_factor = getattr(settings, 'PASSWORD_SCRYPT_WORK_FACTOR', 2 ** 14)
+    block_size = getattr(settings, 'PASSWORD_SCRYPT_BLOCK_SIZE', 8)
+    maxmem = 256 * work_factor * block_size
+
+
+class PBKDF2PasswordHasher(ConcurrencyLimitMixin,
+                           hashers.PBKDF2PasswordHasher):
+    """PBKDF2 hasher verifying hashes made before scrypt was used."""
@@ -0,0 +1,58 @@
+"""
+Django command to benchmark the configured password hashers.
+"""
+import statistics
+import time
+
+from django.contrib.auth.hashers import ScryptPasswordHasher, get_hashers
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """Django command to time password hashing and suggest a scrypt cost."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rounds',
+            type=int,
+            default=5,
+            help='Number of hashes timed per hasher.',
+        )
+        parser.add_argument(
+            '--target-ms',
+            type=float,
+            default=50,
+            help='Hashing time per login to tune scrypt for.',
+        )
+
+    def _time_hasher(self, hasher, rounds):
+        """Return the median milliseconds to hash a password."""
+        salt = hasher.salt()
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            hasher.encode('benchmark-password', salt)
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        rounds = options['rounds']
+        for hasher in get_hashers():
+            self.stdout.write(
+                f'{hasher.algorithm:<20} '
+                f'{self._time_hasher(hasher, rounds):8.1f} ms')
+
+        work_factor = 2 ** 10
+        while True:
+            hasher = ScryptPasswordHasher()
+            hasher.work_factor = work_factor
+            hasher.maxmem = 256 * work_factor * hasher.block_size
+            elapsed = self._time_hasher(hasher, rounds)
+            if elapsed >= options['target_ms'] or work_factor >= 2 ** 20:
+                break
+            work_factor *= 2
+
+        self.stdout.write(self.style.SUCCESS(
+            f'PASSWORD_SCRYPT_WORK_FACTOR={work_factor} '
+            f'({elapsed:.1f} ms per hash)'))
@@ -5,12 +5,17 @@ from django.contrib.auth import (
     get_user_model,
     authenticate,
 )
-from rest_framework import serializers
+from rest_framework import exceptions, serializers
 
 from django.utils.translation import gettext as _
 
+from core.instrumentation import TimedRepresentationMixin
+from core.metrics import AUTH_FAILURES
+from user.hashers import HasherBusy
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(TimedRepresentationMixin,
+                     serializers.ModelSerializer):
     """Serializer for the user object."""
 
     class Meta:
@@ -20,18 +25,25 @@ class UserSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         """Create and return a user with encrypted password."""
-        return get_user_model().objects.create_user(**validated_data)
+        try:
+            return get_user_model().objects.create_user(**validated_data)
+        except HasherBusy:
+            raise exceptions.Throttled(wait=1)
 
     def update(self, instance, validated_data):
-        """Update and return user."""
-        password = validated_data.pop('password', None)
-        user = super().update(instance, validated_data)
+        """Update and return user.
 
+        A new password is hashed before anything is saved, so a busy
+        hasher leaves the user unchanged.
+        """
+        password = validated_data.pop('password', None)
         if password:
-            user.set_password(password)
-            user.save()
+            try:
+                instance.set_password(password)
+            except HasherBusy:
+                raise exceptions.Throttled(wait=1)
 
-        return user
+        return super().update(instance, validated_data)
 
 
 class AuthTokenSerializer(serializers.Serializer):
@@ -46,12 +58,17 @@ class AuthTokenSerializer(serializers.Serializer):
         """Validate and authenticate the user."""
         email = attrs.get('email')
         password = attrs.get('password')
-        user = authenticate(
-            request=self.context.get('request'),
-            username=email,
-            password=password,
-        )
+        try:
+            user = authenticate(
+                request=self.context.get('request'),
+                username=email,
+                password=password,
+            )
+        except HasherBusy:
+            AUTH_FAILURES.inc(reason='busy')
+            raise exceptions.Throttled(wait=1)
         if not user:
+            AUTH_FAILURES.inc(reason='credentials')
             msg = _('Unable to authenticate with provided credentials.')
             raise serializers.ValidationError(msg, code='authorization')
 
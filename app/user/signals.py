@@ -0,0 +1,27 @@
+"""
+Signal handlers keeping the token cache current.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+
+from rest_framework.authtoken.models import Token
+
+from user.authentication import token_cache
+
+
+def invalidate_user_tokens(sender, instance, **kwargs):
+    """Drop cached tokens of a saved or deleted user."""
+    token_cache.invalidate_user(instance.pk)
+
+
+def invalidate_token(sender, instance, **kwargs):
+    """Drop a saved or deleted token from the cache."""
+    token_cache.invalidate(instance.key, instance.user_id)
+
+
+def connect():
+    """Connect the token cache signal handlers."""
+    post_save.connect(invalidate_user_tokens, sender=get_user_model())
+    post_delete.connect(invalidate_user_tokens, sender=get_user_model())
+    post_save.connect(invalidate_token, sender=Token)
+    post_delete.connect(invalidate_token, sender=Token)
@@ -0,0 +1,10 @@
+"""
+Helpers for user tests.
+"""
+from django.urls import reverse
+
+
+CREATE_USER_URL = reverse('user:create')
+TOKEN_URL = reverse('user:token')
+ME_URL = reverse('user:me')
+LOGOUT_URL = reverse('user:logout')
@@ -0,0 +1,184 @@
+"""
+Tests for cached token authentication.
+"""
+import time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import TokenCache, token_cache
+from user.tests.helpers import LOGOUT_URL, ME_URL
+
+
+@override_settings(TOKEN_CACHE_ALIAS='default')
+class CachedTokenAuthenticationTests(TestCase):
+    """Test authenticating with cached tokens."""
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            fname='Test',
+            lname='Name',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def tearDown(self):
+        cache.clear()
+        token_cache.clear()
+
+    def test_token_lookup_cached(self):
+        """Test the token is only looked up on the first request."""
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_deactivated_user_rejected(self):
+        """Test deactivating a user invalidates the cached token."""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_rotated_token_rejected(self):
+        """Test a deleted token is no longer accepted."""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        Token.objects.create(user=self.user)
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_invalidates_token(self):
+        """Test logging out deletes and uncaches the token."""
+        self.client.get(ME_URL)
+
+        res = self.client.post(LOGOUT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cached_token_expires(self):
+        """Test cached tokens are looked up again after the TTL."""
+        now = time.time()
+        with patch('time.monotonic', return_value=0), \
+                patch('time.time', return_value=now):
+            self.client.get(ME_URL)
+
+        with patch('time.monotonic', return_value=301), \
+                patch('time.time', return_value=now + 301):
+            with self.assertNumQueries(1):
+                self.client.get(ME_URL)
+
+    @override_settings(TOKEN_CACHE_SIZE=1)
+    def test_least_recently_used_evicted(self):
+        """Test the least recently used token is evicted from memory."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        other_token = Token.objects.create(user=other)
+        other_client = APIClient()
+        other_client.credentials(
+            HTTP_AUTHORIZATION=f'Token {other_token.key}')
+        self.client.get(ME_URL)
+
+        other_client.get(ME_URL)
+
+        self.assertNotIn(self.token.key, token_cache._entries)
+        self.assertIn(other_token.key, token_cache._entries)
+
+    def test_shared_cache_backend(self):
+        """Test tokens are shared with and invalidated in the backend."""
+        self.client.get(ME_URL)
+        token_cache.clear()
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalidation_reaches_other_workers(self):
+        """Test a token invalidated by one worker is dropped by another."""
+        workers = [TokenCache(), TokenCache()]
+        for worker in workers:
+            worker.set(self.token.key, self.user, self.token)
+            self.assertIsNotNone(worker.get(self.token.key))
+
+        workers[0].invalidate(self.token.key, self.user.pk)
+
+        self.assertIsNone(workers[1].get(self.token.key))
+
+    def test_user_invalidation_reaches_other_workers(self):
+        """Test a user invalidated by one worker is dropped by another."""
+        workers = [TokenCache(), TokenCache()]
+        for worker in workers:
+            worker.set(self.token.key, self.user, self.token)
+
+        workers[0].invalidate_user(self.user.pk)
+
+        self.assertIsNone(workers[1].get(self.token.key))
+        workers[1].set(self.token.key, self.user, self.token)
+        self.assertIsNotNone(workers[0].get(self.token.key))
+
+
+class UnsharedTokenCacheTests(TestCase):
+    """Test tokens are not cached without a cache shared by workers."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_looked_up_every_request(self):
+        """Test every request looks its token up."""
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                res = self.client.get(ME_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_revocation_reaches_other_workers(self):
+        """Test a worker rejects a user deactivated through another.
+
+        Requests are served by a second worker's cache while the
+        deactivation invalidates the cache of this one.
+        """
+        other_worker = TokenCache()
+        with patch('user.authentication.token_cache', other_worker):
+            self.client.get(ME_URL)
+
+            self.user.is_active = False
+            self.user.save()
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
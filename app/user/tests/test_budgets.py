@@ -0,0 +1,97 @@
+"""
+Query and time budgets of the user API.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.testing import budget, route_names
+from user.authentication import token_cache
+from user.tests.helpers import (
+    CREATE_USER_URL,
+    LOGOUT_URL,
+    ME_URL,
+    TOKEN_URL,
+)
+
+BUDGETED_ROUTES = {'create', 'token', 'me', 'logout'}
+
+# Hashing a password is slow by design, so requests that hash one get
+# a larger time budget.
+HASHING_MS = 1000
+
+
+@override_settings(TOKEN_CACHE_ALIAS='default')
+class UserBudgetTests(TestCase):
+    """Test user endpoints stay within their query and time budgets."""
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.token = Token.objects.create(user=self.user)
+
+    def authenticate(self):
+        """Send the user's token with the requests that follow."""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_every_route_has_a_budget(self):
+        """Test the budgets below cover every user route."""
+        self.assertEqual(route_names('user.urls'), BUDGETED_ROUTES)
+
+    def test_create(self):
+        """Test creating a user."""
+        with budget(queries=2, ms=HASHING_MS):
+            res = self.client.post(CREATE_USER_URL, {
+                'email': 'new@example.com',
+                'password': 'testpass123',
+                'fname': 'New',
+                'lname': 'User',
+            })
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_token(self):
+        """Test logging in with an existing token."""
+        with budget(queries=2, ms=HASHING_MS):
+            res = self.client.post(TOKEN_URL, {
+                'email': 'user@example.com',
+                'password': 'testpass123',
+            })
+
+        self.assertEqual(res.data['token'], self.token.key)
+
+    def test_me(self):
+        """Test the token lookup is cached across requests."""
+        self.authenticate()
+        with budget(queries=1, ms=100):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with budget(queries=0, ms=100):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_update_me(self):
+        """Test updating the user's profile."""
+        self.authenticate()
+        with budget(queries=2, ms=100):
+            res = self.client.patch(ME_URL, {'fname': 'Updated'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_logout(self):
+        """Test logging out deletes the token."""
+        self.authenticate()
+        with budget(queries=2, ms=100):
+            res = self.client.post(LOGOUT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
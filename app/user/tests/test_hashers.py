@@ -0,0 +1,96 @@
+"""
+Tests for password hashing.
+"""
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from user import hashers
+from user.tests.helpers import CREATE_USER_URL, ME_URL, TOKEN_URL
+
+
+class HasherTests(TestCase):
+    """Test the configured password hashers."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.payload = {'email': 'test@example.com', 'password': 'pass123'}
+
+    def test_new_passwords_use_scrypt(self):
+        """Test new passwords are hashed with scrypt."""
+        user = get_user_model().objects.create_user(**self.payload)
+
+        self.assertTrue(user.password.startswith('scrypt$'))
+
+    def test_login_upgrades_pbkdf2_hash(self):
+        """Test logging in rehashes a PBKDF2 password with scrypt."""
+        user = get_user_model().objects.create_user(
+            email=self.payload['email'])
+        user.password = make_password(self.payload['password'],
+                                      hasher='pbkdf2_sha256')
+        user.save()
+
+        res = self.client.post(TOKEN_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$'))
+        self.assertTrue(user.check_password(self.payload['password']))
+
+    def test_login_throttled_when_hashers_busy(self):
+        """Test login returns 429 when no hashing slot frees up."""
+        get_user_model().objects.create_user(**self.payload)
+
+        with mock.patch.object(hashers._hashing_slots, 'acquire',
+                               return_value=False):
+            res = self.client.post(TOKEN_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+
+    def test_registration_throttled_when_hashers_busy(self):
+        """Test registering returns 429 when no hashing slot frees up."""
+        with mock.patch.object(hashers._hashing_slots, 'acquire',
+                               return_value=False):
+            res = self.client.post(CREATE_USER_URL, {
+                'email': 'test@example.com',
+                'password': 'testpass123',
+                'fname': 'Test',
+                'lname': 'Name',
+            })
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_password_change_throttled_when_hashers_busy(self):
+        """Test changing password returns 429 and leaves the user as is."""
+        user = get_user_model().objects.create_user(**self.payload)
+        self.client.force_authenticate(user)
+
+        with mock.patch.object(hashers._hashing_slots, 'acquire',
+                               return_value=False):
+            res = self.client.patch(
+                ME_URL, {'fname': 'New', 'password': 'newpass123'})
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+        user.refresh_from_db()
+        self.assertNotEqual(user.fname, 'New')
+        self.assertTrue(user.check_password(self.payload['password']))
+
+    def test_benchmark_hashers(self):
+        """Test the benchmark suggests a scrypt work factor."""
+        out = StringIO()
+
+        call_command('benchmark_hashers', rounds=1, target_ms=0, stdout=out)
+
+        self.assertIn('scrypt', out.getvalue())
+        self.assertIn('PASSWORD_SCRYPT_WORK_FACTOR=1024', out.getvalue())